@@ -0,0 +1,103 @@
+"""added statistics rollups
+
+Revision ID: 777ff64964dc
+Revises: 30677878a0ed
+Create Date: 2026-10-16 23:20:41.512306
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "777ff64964dc"
+down_revision = "30677878a0ed"
+branch_labels = None
+depends_on = None
+
+# Period start for each rollup, formatted the way SQLAlchemy stores datetimes
+PERIOD_STARTS = {
+    "day": "strftime('%Y-%m-%d 00:00:00.000000', r.created_at)",
+    "week": "strftime('%Y-%m-%d 00:00:00.000000', r.created_at, 'weekday 0', '-6 days')",
+    "month": "strftime('%Y-%m-01 00:00:00.000000', r.created_at)",
+}
+
+
+def upgrade() -> None:
+    op.create_table(
+        "task_stat_rollups",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column(
+            "period",
+            sa.Enum("day", "week", "month", name="rollupperiod"),
+            nullable=False,
+        ),
+        sa.Column("period_start", sa.DateTime(), nullable=False),
+        sa.Column("todo_title", sa.String(), nullable=False),
+        sa.Column("category_name", sa.String(), nullable=False),
+        sa.Column("todo_id", sa.Integer(), nullable=False),
+        sa.Column("appearances", sa.Integer(), nullable=False),
+        sa.Column("times_completed", sa.Integer(), nullable=False),
+        sa.Column("times_skipped", sa.Integer(), nullable=False),
+        sa.Column("times_incomplete", sa.Integer(), nullable=False),
+        sa.Column("in_progress_seconds", sa.Float(), nullable=False),
+        sa.Column("in_progress_count", sa.Integer(), nullable=False),
+        sa.Column("last_seen", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("period", "period_start", "todo_title", "category_name"),
+    )
+    op.create_table(
+        "report_rollups",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column(
+            "period",
+            sa.Enum("day", "week", "month", name="rollupperiod"),
+            nullable=False,
+        ),
+        sa.Column("period_start", sa.DateTime(), nullable=False),
+        sa.Column("report_count", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("period", "period_start"),
+    )
+
+    # Backfill from the existing reports
+    for period, period_start in PERIOD_STARTS.items():
+        op.execute(
+            f"""
+            INSERT INTO report_rollups (period, period_start, report_count)
+            SELECT '{period}', {period_start}, count(*)
+            FROM reports r
+            GROUP BY 2
+            """
+        )
+        op.execute(
+            f"""
+            INSERT INTO task_stat_rollups (
+                period, period_start, todo_title, category_name, todo_id,
+                appearances, times_completed, times_skipped, times_incomplete,
+                in_progress_seconds, in_progress_count, last_seen
+            )
+            SELECT
+                '{period}',
+                {period_start},
+                t.todo_title,
+                t.category_name,
+                max(t.todo_id),
+                count(*),
+                count(CASE WHEN t.final_status = 'complete' THEN 1 END),
+                count(CASE WHEN t.final_status = 'skipped' THEN 1 END),
+                count(CASE WHEN t.final_status NOT IN ('complete', 'skipped') THEN 1 END),
+                coalesce(sum(CASE WHEN t.in_progress_duration_seconds > 0
+                    THEN t.in_progress_duration_seconds END), 0),
+                count(CASE WHEN t.in_progress_duration_seconds > 0 THEN 1 END),
+                max(r.created_at)
+            FROM task_reports t
+            JOIN reports r ON r.id = t.report_id
+            GROUP BY 2, t.todo_title, t.category_name
+            """
+        )
+
+
+def downgrade() -> None:
+    op.drop_table("report_rollups")
+    op.drop_table("task_stat_rollups")
@@ -1,22 +1,35 @@
+from deps import get_synced_async_db, state_etag
 from fastapi import APIRouter, Depends, HTTPException
-from models import Category, get_db
+from models import Category
 from schemas import CategoryWithTodos
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
 router = APIRouter()
 
 
-@router.get("/categories", response_model=list[CategoryWithTodos])
-def get_categories(db: Session = Depends(get_db)):
+@router.get(
+    "/categories",
+    response_model=list[CategoryWithTodos],
+    dependencies=[Depends(state_etag)],
+)
+async def get_categories(db: AsyncSession = Depends(get_synced_async_db)):
     """Get all categories with their todos"""
-    categories = db.query(Category).all()
+    categories = (
+        await db.scalars(select(Category).options(selectinload(Category.todos)))
+    ).all()
     return categories
 
 
 @router.get("/categories/{category_id}", response_model=CategoryWithTodos)
-def get_category(category_id: int, db: Session = Depends(get_db)):
+async def get_category(
+    category_id: int, db: AsyncSession = Depends(get_synced_async_db)
+):
     """Get a specific category with its todos"""
-    category = db.query(Category).filter(Category.id == category_id).first()
+    category = await db.get(
+        Category, category_id, options=[selectinload(Category.todos)]
+    )
     if not category:
         raise HTTPException(status_code=404, detail="Category not found")
     return category
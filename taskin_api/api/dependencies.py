@@ -1,9 +1,14 @@
-from datetime import datetime
-
+import structlog
 from config_loader import TimeDependency
 from dep_manager import dep_man
+from deps import (
+    TimeslotContext,
+    get_synced_db,
+    get_timeslot_context,
+    timed_state_etag,
+)
 from fastapi import APIRouter, Depends, Query
-from models import Category, Event, OneOffTodo, TaskStatus, Todo, get_db
+from models import Category, OneOffTodo, TaskStatus, Todo
 from schemas import (
     DependencyEdge,
     DependencyGraph,
@@ -11,9 +16,10 @@ from schemas import (
     NodeType,
     RGBColor,
 )
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 
 router = APIRouter()
+logger = structlog.stdlib.get_logger().bind(module="dependencies")
 
 
 def in_timeslot(time_dependency: TimeDependency, current_seconds: float) -> bool:
@@ -27,11 +33,16 @@ def in_timeslot(time_dependency: TimeDependency, current_seconds: float) -> bool
     return True
 
 
-@router.get("/dependency-graph", response_model=DependencyGraph)
+@router.get(
+    "/dependency-graph",
+    response_model=DependencyGraph,
+    dependencies=[Depends(timed_state_etag)],
+)
 def get_dependency_graph(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_synced_db),
     graph_type: str = Query("scoped", enum=["full", "scoped"]),
     filter_time_deps: bool = Query(False),
+    timeslots: TimeslotContext = Depends(get_timeslot_context),
 ):
     """
     Get the complete dependency graph showing relationships between all todos.
@@ -39,7 +50,7 @@ def get_dependency_graph(
     Uses the Graph structure from dependencies.py which is pre-calculated.
     """
     # Get all todos and categories
-    todos = db.query(Todo).all()
+    todos = db.query(Todo).options(joinedload(Todo.category)).all()
     categories = db.query(Category).all()
     oneoffs = (
         db.query(OneOffTodo).filter(OneOffTodo.status != TaskStatus.complete).all()
@@ -60,7 +71,6 @@ def get_dependency_graph(
     oneoff_id_map: dict[int, int] = {}
     todo_id_map: dict[int, int] = {}
     category_id_map: dict[int, int] = {}
-    current_time = datetime.now()
 
     filter_time_dep_ids: set[int] = set()
     # Add todo nodes
@@ -68,15 +78,8 @@ def get_dependency_graph(
         if todo.id not in graph.nodes:
             continue  # Skip todos not in the graph (e.g., completed todos)
 
-        # Use computed timeslots from dependency manager
-        within_time_window = True
-        ts_map = dep_man.get_timeslots(db.query(Event).all())
-        ts = ts_map.get(todo.id)
-        if ts:
-            if ts.start and current_time < ts.start:
-                within_time_window = False
-            if ts.end and current_time > ts.end:
-                within_time_window = False
+        # Use the timeslots computed once for this request
+        within_time_window = timeslots.in_window(todo.id)
 
         if (
             filter_time_deps
@@ -176,7 +179,9 @@ def get_dependency_graph(
                     )
                 )
             else:
-                print(f"Warning: Todo dependency id {dep_tid} not found in todo_id_map")
+                logger.warning(
+                    "Todo dependency not found in todo_id_map", todo_id=dep_tid
+                )
         for cat_dep in node.cat_dependencies:
             if cat_dep == dep_man.ONEOFF_END_ID:
                 edges.append(
@@ -194,8 +199,9 @@ def get_dependency_graph(
                     )
                 )
             else:
-                print(
-                    f"Warning: Category dependency id {cat_dep} not found in category_id_map"
+                logger.warning(
+                    "Category dependency not found in category_id_map",
+                    category_id=cat_dep,
                 )
     for cat_id, cat_node in graph.categories.items():
         if not cat_node.dependants and cat_id in category_id_map:
@@ -225,8 +231,9 @@ def get_dependency_graph(
                     )
                 )
             else:
-                print(
-                    f"Warning: Category dependency todo id {dep_cat_id} not found in category_id_map"
+                logger.warning(
+                    "Category dependency todo not found in category_id_map",
+                    todo_id=dep_cat_id,
                 )
 
     # Handle oneoff dependencies
@@ -1,10 +1,12 @@
 import datetime
 
+from dep_manager import dep_man
 from fastapi import APIRouter, Depends, HTTPException, Query
 from models import Event, get_db
 from pydantic import BaseModel
 from schemas import EventResponse
 from sqlalchemy.orm import Session
+from state_signals import StateChange, state_signals
 
 router = APIRouter()
 
@@ -37,7 +39,8 @@ def trigger_event(
         event.timestamp = datetime.datetime.now()
     db.commit()
     db.refresh(event)
-    # Here you would add logic to handle the event triggering
+    dep_man.update_event(event)
+    state_signals.emit(StateChange.event)
     return EventTriggerResponse(
         message=f"Event '{event_name}' triggered successfully. event timestamp set to {event.timestamp}"
     )
@@ -1,11 +1,8 @@
 from fastapi import APIRouter, Depends
-from models import Report, TaskStatus, datetime, get_db
-from schemas import (
-    AggregatedStatistics,
-    ResetReportResponse,
-    TaskStatistics,
-)
-from sqlalchemy.orm import Session
+from models import Report, datetime, get_db
+from rollups import query_statistics
+from schemas import AggregatedStatistics, ResetReportResponse
+from sqlalchemy.orm import Session, selectinload
 
 router = APIRouter()
 
@@ -17,6 +14,7 @@ def get_report(start_date: datetime, end_date: datetime, db: Session = Depends(g
     """Get all reset reports within the date range [start_date, end_date], newest first."""
     reports = (
         db.query(Report)
+        .options(selectinload(Report.task_reports))
         .filter(Report.created_at >= start_date, Report.created_at <= end_date)
         .order_by(Report.created_at.desc())
         .all()
@@ -24,87 +22,6 @@ def get_report(start_date: datetime, end_date: datetime, db: Session = Depends(g
     return reports
 
 
-def generate_aggregated_statistics(reports: list[Report]) -> AggregatedStatistics:
-    task_statistics_map: dict[tuple[str, str], TaskStatistics] = {}
-    total_inprog_nz: dict[int, int] = {}
-    total_completions = 0
-    total_skips = 0
-    total_incompletes = 0
-    for report in reports:
-        for task_report in report.task_reports:
-            ts = task_statistics_map.get(
-                (task_report.todo_title, task_report.category_name)
-            )
-            if not ts:
-                ts = TaskStatistics(
-                    todo_id=task_report.todo_id,
-                    todo_title=task_report.todo_title,
-                    category_name=task_report.category_name,
-                    completion_rate=0.0,
-                    skip_rate=0.0,
-                    avg_in_progress_duration_seconds=None,
-                    times_completed=0,
-                    times_skipped=0,
-                    tot_in_progress_duration_seconds=0.0,
-                    total_appearances=0,
-                    times_incomplete=0,
-                )
-                task_statistics_map[
-                    (task_report.todo_title, task_report.category_name)
-                ] = ts
-
-            ts.total_appearances += 1
-            if task_report.final_status == TaskStatus.complete:
-                ts.times_completed += 1
-                total_completions += 1
-            elif task_report.final_status == TaskStatus.skipped:
-                ts.times_skipped += 1
-                total_skips += 1
-            else:
-                ts.times_incomplete += 1
-                total_incompletes += 1
-            if (
-                task_report.in_progress_duration_seconds is not None
-                and task_report.in_progress_duration_seconds > 0
-            ):
-                ts.tot_in_progress_duration_seconds += (
-                    task_report.in_progress_duration_seconds
-                )
-                if task_report.todo_id not in total_inprog_nz:
-                    total_inprog_nz[task_report.todo_id] = 0
-                total_inprog_nz[task_report.todo_id] += 1
-
-    task_statistics: list[TaskStatistics] = []
-    for ts in task_statistics_map.values():
-        # Calculate rates
-        if ts.total_appearances > 0:
-            ts.completion_rate = ts.times_completed / ts.total_appearances
-            ts.skip_rate = ts.times_skipped / ts.total_appearances
-            ts.avg_in_progress_duration_seconds = (
-                ts.tot_in_progress_duration_seconds / total_inprog_nz.get(ts.todo_id, 1)
-            )
-        else:
-            ts.completion_rate = 0.0
-            ts.skip_rate = 0.0
-            ts.avg_in_progress_duration_seconds = None
-
-        task_statistics.append(ts)
-
-    def sort_key(x: TaskStatistics):
-        return x.completion_rate
-
-    # Sort by completion rate descending
-    task_statistics.sort(key=sort_key, reverse=True)
-
-    return AggregatedStatistics(
-        report_count=len(reports),
-        task_statistics=task_statistics,
-        total_completions=total_completions,
-        total_skips=total_skips,
-        total_incompletes=total_incompletes,
-    )
-
-
 @router.get("/statistics/{start_date}/{end_date}", response_model=AggregatedStatistics)
 def get_statistics(
     start_date: datetime, end_date: datetime, db: Session = Depends(get_db)
@@ -120,11 +37,4 @@ def get_statistics(
     Args:
         report_count: Number of recent reports to analyze (default 10)
     """
-    # Get the most recent N reports
-    reports = (
-        db.query(Report)
-        .filter(Report.created_at >= start_date, Report.created_at <= end_date)
-        .order_by(Report.created_at.desc())
-        .all()
-    )
-    return generate_aggregated_statistics(reports)
+    return query_statistics(db, start_date, end_date)
@@ -1,16 +1,23 @@
 from datetime import datetime
 
-import requests
+from change_log import prune_change_log, record_changes
 from config_loader import CONFIG
 from fastapi import APIRouter, Depends
 from models import (
+    Category,
+    ChangeEntity,
     Report,
     TaskReport,
     TaskStatus,
     Todo,
     get_db,
 )
+from rollups import record_report
+from sqlalchemy import DateTime, and_, case, func, insert, literal, select, update
 from sqlalchemy.orm import Session
+from state_signals import StateChange, state_signals
+from status_store import status_store
+from webhooks import webhooks
 
 router = APIRouter()
 
@@ -26,112 +33,143 @@ def generate_aggregated_avg_comp_rate(reports: list[Report]) -> float:
     return total_rate / len(reports)
 
 
-@router.post("/reset")
-def reset_all_todos(db: Session = Depends(get_db)):
+def bulk_reset(db: Session, now: datetime) -> tuple[Report, int, int]:
     """
-    Reset todos to incomplete status based on their reset_interval.
-    - Skipped todos ALWAYS reset (reset_interval ignored)
-    - Complete todos increment reset_count and reset when count % interval == 0
+    Apply the reset in a handful of set-based statements.
 
-    Generates a ResetReport with per-task statistics including in-progress duration.
-
-    Example:
-    - reset_interval=1: resets every time (daily)
-    - reset_interval=5: resets every 5 calls (every 5 days)
-    - skipped status: always resets regardless of interval
+    Writes the report and its task reports, then moves todos to their next state.
+    Returns the report, the total number of todos, and how many are incomplete
+    after the reset. The caller commits.
     """
-    todos = db.query(Todo).all()
+    reported = Todo.reset_count == 0
+    counts = db.execute(
+        select(
+            func.count(),
+            func.count().filter(reported),
+            func.count().filter(reported, Todo.status == TaskStatus.complete),
+            func.count().filter(reported, Todo.status == TaskStatus.skipped),
+        ).select_from(Todo)
+    ).one()
+    total, reported_todos, completed_todos, skipped_todos = counts
 
-    # Create the reset report
     report = Report(
-        created_at=datetime.now(),
-        total_todos=len([todo for todo in todos if todo.reset_count == 0]),
-        completed_todos=0,
-        skipped_todos=0,
-        incomplete_todos=0,
+        created_at=now,
+        total_todos=reported_todos,
+        completed_todos=completed_todos,
+        skipped_todos=skipped_todos,
+        incomplete_todos=reported_todos - completed_todos - skipped_todos,
     )
     db.add(report)
     db.flush()  # Get the report ID
-    total_todos = 0
-    completed_todos = 0
-    skipped_todos = 0
-    incomplete_todos = 0
-
-    # Process each todo and create task reports
-    for todo in todos:
-        if todo.reset_count == 0:
-            # Calculate in-progress duration (cumulative + current session if still in progress)
-            in_progress_duration = todo.cumulative_in_progress_seconds
-            if (
-                todo.status == TaskStatus.in_progress
-                and todo.in_progress_start is not None
-            ):
-                # Still in progress, add current session duration
-                current_session = (
-                    datetime.now() - todo.in_progress_start
-                ).total_seconds()
-                in_progress_duration += current_session
-
-            # Use None if no time was spent in progress
-            if in_progress_duration == 0:
-                in_progress_duration = None
-
-            if todo.status == TaskStatus.complete:
-                completed_todos += 1
-                final_status = TaskStatus.complete
-            elif todo.status == TaskStatus.skipped:
-                skipped_todos += 1
-                final_status = TaskStatus.skipped
-            else:
-                incomplete_todos += 1
-                final_status = TaskStatus.incomplete
-
-            # Create task report
-            task_report = TaskReport(
-                report_id=report.id,
-                todo_id=todo.id,
-                todo_title=todo.title,
-                category_name=todo.category.name if todo.category else "Unknown",
-                final_status=final_status,
-                in_progress_duration_seconds=in_progress_duration,
-            )
-            db.add(task_report)
 
-        # Track counts for the report
-
-        # Skipped todos ALWAYS reset to incomplete
-        if todo.status == TaskStatus.skipped:
-            todo.status = TaskStatus.incomplete
-            todo.reset_count = 0
+    # In-progress duration is the cumulative time plus the current session if the
+    # todo is still in progress; NULL if no time was spent in progress
+    current_session = case(
+        (
+            and_(
+                Todo.status == TaskStatus.in_progress,
+                Todo.in_progress_start.is_not(None),
+            ),
+            (
+                func.julianday(literal(now, DateTime))
+                - func.julianday(Todo.in_progress_start)
+            )
+            * 86400,
+        ),
+        else_=0.0,
+    )
+    final_status = case(
+        (
+            Todo.status == TaskStatus.complete,
+            literal(TaskStatus.complete, Todo.status.type),
+        ),
+        (
+            Todo.status == TaskStatus.skipped,
+            literal(TaskStatus.skipped, Todo.status.type),
+        ),
+        else_=literal(TaskStatus.incomplete, Todo.status.type),
+    )
+    db.execute(
+        insert(TaskReport).from_select(
+            [
+                TaskReport.report_id,
+                TaskReport.todo_id,
+                TaskReport.todo_title,
+                TaskReport.category_name,
+                TaskReport.final_status,
+                TaskReport.in_progress_duration_seconds,
+            ],
+            select(
+                literal(report.id),
+                Todo.id,
+                Todo.title,
+                func.coalesce(Category.name, "Unknown"),
+                final_status,
+                func.nullif(Todo.cumulative_in_progress_seconds + current_session, 0),
+            )
+            .select_from(Todo)
+            .outerjoin(Category, Todo.category_id == Category.id)
+            .where(reported),
+        )
+    )
 
-        elif todo.status == TaskStatus.in_progress:
-            todo.status = TaskStatus.incomplete
-            todo.reset_count = 0
-        # Complete todos reset based on interval
-        elif todo.status == TaskStatus.complete:
-            current_count = todo.reset_count + 1
-            interval = todo.reset_interval
+    # Skipped and in-progress todos always reset; complete todos reset every
+    # reset_interval calls and count up in between
+    always_resets = Todo.status.in_([TaskStatus.skipped, TaskStatus.in_progress])
+    next_count = Todo.reset_count + 1
+    interval_elapsed = and_(
+        Todo.status == TaskStatus.complete, next_count % Todo.reset_interval == 0
+    )
+    db.execute(
+        update(Todo)
+        .values(
+            status=case(
+                (always_resets, literal(TaskStatus.incomplete, Todo.status.type)),
+                (interval_elapsed, literal(TaskStatus.incomplete, Todo.status.type)),
+                else_=Todo.status,
+            ),
+            reset_count=case(
+                (always_resets, 0),
+                (interval_elapsed, 0),
+                (Todo.status == TaskStatus.complete, next_count),
+                else_=Todo.reset_count,
+            ),
+            in_progress_start=None,
+            cumulative_in_progress_seconds=0.0,
+        )
+        .execution_options(synchronize_session=False)
+    )
 
-            # Increment the reset counter
-            todo.reset_count = current_count  # type: ignore
+    record_report(db, report)
+    record_changes(db, ChangeEntity.todo, db.scalars(select(Todo.id)))
+    prune_change_log(db)
 
-            # Check if it's time to reset this todo
-            if current_count % interval == 0:
-                # Time to reset this todo
-                todo.status = TaskStatus.incomplete
-                todo.reset_count = 0
+    total_todos = db.scalar(
+        select(func.count()).where(Todo.status == TaskStatus.incomplete)
+    )
+    return report, total, total_todos or 0
 
-        if todo.status == TaskStatus.incomplete:
-            total_todos += 1
 
-        todo.in_progress_start = None
-        todo.cumulative_in_progress_seconds = 0.0
+@router.post("/reset")
+def reset_all_todos(db: Session = Depends(get_db)):
+    """
+    Reset todos to incomplete status based on their reset_interval.
+    - Skipped todos ALWAYS reset (reset_interval ignored)
+    - Complete todos increment reset_count and reset when count % interval == 0
 
-    report.completed_todos = completed_todos
-    report.skipped_todos = skipped_todos
-    report.incomplete_todos = incomplete_todos
+    Generates a ResetReport with per-task statistics including in-progress duration.
 
-    db.commit()
+    Example:
+    - reset_interval=1: resets every time (daily)
+    - reset_interval=5: resets every 5 calls (every 5 days)
+    - skipped status: always resets regardless of interval
+    """
+    # Statuses are rewritten in SQL, so the in-memory store is flushed first and
+    # reloaded afterwards
+    with status_store.rewriting(db):
+        report, total, total_todos = bulk_reset(db, datetime.now())
+        db.commit()
+    state_signals.emit(StateChange.reset)
 
     reports = db.query(Report).order_by(Report.created_at.desc()).limit(30 + 1).all()
     if CONFIG.warning:
@@ -139,34 +177,31 @@ def reset_all_todos(db: Session = Depends(get_db)):
         weekly_config = CONFIG.warning.weekly
         last_week_avg_comp_rate = generate_aggregated_avg_comp_rate(reports[:7]) * 100
         if last_week_avg_comp_rate < weekly_config.critical.threshold:
-            requests.post(
+            webhooks.send(
                 str(weekly_config.webhook_url),
-                json={
+                {
                     "message": weekly_config.critical.message,
                     "average_completion_rate": f"{last_week_avg_comp_rate:.2f}%",
                     "color": "15548997",
                 },
-                timeout=5,
             )
         elif last_week_avg_comp_rate < weekly_config.warning.threshold:
-            requests.post(
+            webhooks.send(
                 str(weekly_config.webhook_url),
-                json={
+                {
                     "message": weekly_config.warning.message,
                     "average_completion_rate": f"{last_week_avg_comp_rate:.2f}%",
                     "color": "15105570",
                 },
-                timeout=5,
             )
         else:
-            requests.post(
+            webhooks.send(
                 str(weekly_config.webhook_url),
-                json={
+                {
                     "message": weekly_config.info_message,
                     "average_completion_rate": f"{last_week_avg_comp_rate:.2f}%",
                     "color": "5763719",
                 },
-                timeout=5,
             )
         if len(reports) >= 2:
             last_month_avg_comp_rate = (
@@ -181,44 +216,41 @@ def reset_all_todos(db: Session = Depends(get_db)):
                 percentage_change = 0
 
             if percentage_change < daily_config.critical.threshold:
-                requests.post(
+                webhooks.send(
                     str(daily_config.webhook_url),
-                    json={
+                    {
                         "message": daily_config.critical.message,
                         "today_completion_rate": f"{today_avg_comp_rate:.2f}%",
                         "percentage_change": f"{percentage_change:.2f}%",
                         "month_avg_completion_rate": f"{last_month_avg_comp_rate:.2f}%",
                         "color": "15548997",
                     },
-                    timeout=5,
                 )
             elif percentage_change < daily_config.warning.threshold:
-                requests.post(
+                webhooks.send(
                     str(daily_config.webhook_url),
-                    json={
+                    {
                         "message": daily_config.warning.message,
                         "today_completion_rate": f"{today_avg_comp_rate:.2f}%",
                         "percentage_change": f"{percentage_change:.2f}%",
                         "month_avg_completion_rate": f"{last_month_avg_comp_rate:.2f}%",
                         "color": "15105570",
                     },
-                    timeout=5,
                 )
             else:
-                requests.post(
+                webhooks.send(
                     str(daily_config.webhook_url),
-                    json={
+                    {
                         "message": daily_config.info_message,
                         "today_completion_rate": f"{today_avg_comp_rate:.2f}%",
                         "percentage_change": f"{percentage_change:.2f}%",
                         "month_avg_completion_rate": f"{last_month_avg_comp_rate:.2f}%",
                         "color": "5763719",
                     },
-                    timeout=5,
                 )
 
     return {
-        "total": len(todos),
+        "total": total,
         "report_id": report.id,
         "total_tasks": total_todos,
     }
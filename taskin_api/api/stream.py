@@ -0,0 +1,19 @@
+from fastapi import APIRouter, Request
+from fastapi.responses import StreamingResponse
+from stream_service import live_stream
+
+router = APIRouter()
+
+
+@router.get("/stream")
+async def stream_state_changes(request: Request):
+    """
+    Stream state changes as server-sent events. See LiveStream for the event types;
+    clients should catch up through /sync when they (re)connect or receive resync.
+    Event ids are opaque state tags, not /sync versions.
+    """
+    return StreamingResponse(
+        live_stream.events(request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
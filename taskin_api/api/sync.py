@@ -0,0 +1,18 @@
+from change_log import changes_since
+from deps import get_synced_db
+from fastapi import APIRouter, Depends, Query
+from schemas import SyncResponse
+from sqlalchemy.orm import Session
+
+router = APIRouter()
+
+
+@router.get("/sync", response_model=SyncResponse)
+def sync_changes(since: int = Query(0, ge=0), db: Session = Depends(get_synced_db)):
+    """
+    Get the categories, todos, one-offs and events changed since a change log version,
+    plus the ids of those deleted. Pass the version from the previous response; if
+    it is 0 or too old the response has full set and the client should refetch.
+    /stream event ids are a separate cursor and cannot be passed as since.
+    """
+    return changes_since(db, since)
@@ -2,80 +2,89 @@ from datetime import datetime
 
 from config_loader import TimeDependency
 from dep_manager import dep_man
-from fastapi import APIRouter, Depends, HTTPException
-from models import (
-    Event,
-    OneOffTodo,
-    TaskStatus,
-    Todo,
-    get_db,
+from deps import (
+    TimeslotContext,
+    get_synced_async_db,
+    get_timeslot_context,
+    timed_state_etag,
 )
-from schemas import Timeslot, TodoResponse, TodoWithCategory
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException
+from models import TaskStatus, Todo
+from schemas import StatusUpdate, Timeslot, TodoResponse, TodoWithCategory
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from state_signals import StateChange, state_signals
+from status_store import apply_status, status_store
 
 router = APIRouter()
 
 
 @router.get("/timeslots", response_model=dict[int, Timeslot])
-def get_timeslots(db: Session = Depends(get_db)):
+def get_timeslots(timeslots: TimeslotContext = Depends(get_timeslot_context)):
     """Get the timeslots for todos with time dependencies"""
-    events = db.query(Event).all()
-    todo_timeslots = dep_man.get_timeslots(events)
-    return todo_timeslots
+    return timeslots.timeslots
 
 
 @router.get("/todos", response_model=list[TodoWithCategory])
-def get_todos(
+async def get_todos(
     status: TaskStatus | None = None,
     category_id: int | None = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_synced_async_db),
 ):
     """Get all todos with optional filtering by status and category"""
-    query = db.query(Todo)
+    query = select(Todo).options(joinedload(Todo.category))
 
     if status:
-        query = query.filter(Todo.status == status)
+        query = query.where(Todo.status == status)
     if category_id:
-        query = query.filter(Todo.category_id == category_id)
+        query = query.where(Todo.category_id == category_id)
 
-    todos = query.all()
+    todos = (await db.scalars(query)).all()
     return todos
 
 
 @router.get("/todos/{todo_id}", response_model=TodoWithCategory)
-def get_todo(todo_id: int, db: Session = Depends(get_db)):
+async def get_todo(todo_id: int, db: AsyncSession = Depends(get_synced_async_db)):
     """Get a specific todo"""
-    todo = db.query(Todo).filter(Todo.id == todo_id).first()
+    todo = await db.get(Todo, todo_id, options=[joinedload(Todo.category)])
     if not todo:
         raise HTTPException(status_code=404, detail="Todo not found")
     return todo
 
 
+@router.patch("/todos/status", response_model=list[TodoResponse])
+async def update_todo_statuses(updates: list[StatusUpdate]):
+    """Update the status of many todos at once.
+
+    Updates are applied in order, so a later entry for the same todo wins. Returns
+    the updated todos in the order they were first listed. The changes are written
+    to the database in the background.
+    """
+    ids = list(dict.fromkeys(update.id for update in updates))
+    now = datetime.now()
+    with status_store.editing():
+        missing = status_store.missing_todos(ids)
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Todos not found: {missing}")
+        for update in updates:
+            apply_status(status_store.edit_todo(update.id), update.status, now)
+        todos = [status_store.todos[tid] for tid in ids]
+    if updates:
+        state_signals.emit(StateChange.status)
+    return todos
+
+
 @router.patch("/todos/{todo_id}/status", response_model=TodoResponse)
-def update_todo_status(todo_id: int, status: TaskStatus, db: Session = Depends(get_db)):
+async def update_todo_status(todo_id: int, status: TaskStatus):
     """Update only the status of a todo"""
-    db_todo = db.query(Todo).filter(Todo.id == todo_id).first()
-    if not db_todo:
-        raise HTTPException(status_code=404, detail="Todo not found")
-
-    old_status = db_todo.status
-
-    # Track status transitions for statistics
-    if status == TaskStatus.in_progress and old_status != TaskStatus.in_progress:
-        # Entering in-progress state - record the start time
-        db_todo.in_progress_start = datetime.now()
-    elif old_status == TaskStatus.in_progress and status != TaskStatus.in_progress:
-        # Leaving in-progress state - accumulate the duration
-        if db_todo.in_progress_start is not None:
-            duration = (datetime.now() - db_todo.in_progress_start).total_seconds()
-            db_todo.cumulative_in_progress_seconds += duration
-            db_todo.in_progress_start = None
-    if status == TaskStatus.incomplete:
-        db_todo.reset_count = 0  # Reset the reset_count when marking incomplete
-    db_todo.status = status
-    db.commit()
-    db.refresh(db_todo)
-    return db_todo
+    with status_store.editing():
+        if status_store.missing_todos([todo_id]):
+            raise HTTPException(status_code=404, detail="Todo not found")
+        todo = status_store.edit_todo(todo_id)
+        apply_status(todo, status, datetime.now())
+    state_signals.emit(StateChange.status)
+    return todo
 
 
 def in_timeslot(time_dependency: TimeDependency, current_seconds: float) -> bool:
@@ -89,75 +98,24 @@ def in_timeslot(time_dependency: TimeDependency, current_seconds: float) -> bool
     return True
 
 
-@router.get("/recommended-todos", response_model=list[TodoWithCategory])
-def get_recommended_todos(db: Session = Depends(get_db)):
+@router.get(
+    "/recommended-todos",
+    response_model=list[TodoWithCategory],
+    dependencies=[Depends(timed_state_etag)],
+)
+async def get_recommended_todos(
+    timeslots: TimeslotContext = Depends(get_timeslot_context),
+):
     """
     Get todos that are ready to work on (all dependencies satisfied).
     A todo is recommended if:
-    - It's not already complete or skipped
-    - All of its dependencies (from the DDM) are complete or skipped
-
-    This uses the Deep Dependency Map (DDM) which provides O(1) lookup of all
-    dependencies for each todo, including:
-    - All explicit dependencies
-    - Recursive walk up the dependency tree
-    - Expanded category dependencies
+    - It's not already complete or skipped, and within its timeslot
+    - None of its deep dependencies (from the DDM) are, and if it depends on the
+      one-off node, no one-off is open
+
+    The status store keeps this set up to date: each todo counts its blocking deep
+    dependencies, and a status change, event trigger or timeslot boundary only
+    adjusts the counts of the todos that depend on what changed. This returns the
+    maintained set without looking at any other todo or touching the database.
     """
-    # Get all incomplete and in-progress todos (exclude complete and skipped)
-    incomplete_todos = (
-        db.query(Todo)
-        .filter(Todo.status.in_([TaskStatus.incomplete, TaskStatus.in_progress]))
-        .all()
-    )
-
-    # Get incomplete/in-progress todo IDs (these are blocking)
-    current_time = datetime.now()
-    # Current time used to evaluate computed timeslots
-
-    # Use computed timeslots (deprecated maps removed)
-    events = db.query(Event).all()
-    timeslots = dep_man.get_timeslots(events)
-    blocking_todo_ids = set()
-    for todo in incomplete_todos:
-        ts = timeslots.get(todo.id)
-        if not ts:
-            blocking_todo_ids.add(todo.id)
-            continue
-        # If a timeslot exists, check current time within [start, end]
-        if ts.start and current_time < ts.start:
-            continue
-        if ts.end and current_time > ts.end:
-            continue
-        blocking_todo_ids.add(todo.id)
-
-    # Check if there are any incomplete oneoffs
-    has_incomplete_oneoffs = (
-        db.query(OneOffTodo).filter(OneOffTodo.status != TaskStatus.complete).count()
-        > 0
-    )
-
-    recommended = []
-    ddm = dep_man.full_graph.ddm
-
-    for todo in incomplete_todos:
-        # Get all dependencies for this todo from the DDM
-        all_deps = ddm.get_deps(todo.id)
-
-        # Check if any of the dependencies are still incomplete
-        incomplete_deps = all_deps & blocking_todo_ids
-
-        if incomplete_deps or todo.id not in blocking_todo_ids:
-            # Has incomplete dependencies, not ready
-            continue
-
-        # Check if this todo depends on oneoffs
-        if dep_man.ONEOFF_START_ID in all_deps:
-            # This todo has oneoffs as a dependency
-            if has_incomplete_oneoffs:
-                # Oneoffs not complete yet
-                continue
-
-        # All dependencies satisfied!
-        recommended.append(todo)
-
-    return recommended
+    return status_store.recommended_todos(dep_man.full_graph, timeslots)
@@ -0,0 +1,172 @@
+"""Benchmark for Graph.dedupe.
+
+Compares the bitset transitive reduction against the previous implementation,
+which recursed from every root and rebuilt filtered deep-dependency sets for
+each edge. It re-walks each dependant subtree once per path to it, so its cost
+grows exponentially with depth and it is only run up to --legacy-max todos.
+Run from the taskin_api directory:
+
+    python benchmarks/bench_dedupe.py [todo_count ...] [--legacy-max N]
+"""
+
+import argparse
+import dataclasses
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from dep_manager import Graph
+
+
+def legacy_dedupe(graph: Graph):
+    """Graph.dedupe as it was before it became a bitset transitive reduction"""
+
+    def filtered_ddm(current_tid: int, filter: set[int], filter_cat: set[int]):
+        filtered: set[int] = set()
+        current_ddm_deps = graph.ddm.get_deps(current_tid)
+        category_deps = set[int]()
+        for filter_category in filter_cat:
+            category_deps.update(graph.categories[filter_category].dependencies)
+        if not filter.intersection(current_ddm_deps) and not category_deps.intersection(
+            current_ddm_deps
+        ):
+            return graph.ddm.get_deps(current_tid)
+        for dep in graph.nodes[current_tid].dependencies:
+            if dep in filter:
+                continue
+            filtered.update(filtered_ddm(dep, set(), set()))
+            filtered.add(dep)
+        for cat_dep in graph.nodes[current_tid].cat_dependencies:
+            if cat_dep in filter_cat:
+                continue
+            filtered.update(filtered_ddm_category(cat_dep, set()))
+        return filtered
+
+    def filtered_ddm_category(current_cid: int, filter_tid: set[int]):
+        filtered: set[int] = set()
+        for tid in graph.categories[current_cid].dependencies:
+            if tid in filter_tid:
+                continue
+            filtered.update(filtered_ddm(tid, set(), set()))
+            filtered.add(tid)
+        return filtered
+
+    def dedupe_category(cid: int):
+        node = graph.categories[cid]
+        to_remove: set[int] = set()
+        category_deps = set[int]()
+        for cat_dep in node.dependencies:
+            category_deps.update(graph.ddm.get_deps(cat_dep))
+            category_deps.add(cat_dep)
+        for dep in node.dependencies:
+            if filtered_ddm_category(cid, {dep}) == category_deps:
+                to_remove.add(dep)
+        for rem in to_remove:
+            node.dependencies -= {rem}
+            graph.nodes[rem].cat_dependant = None
+        for dept in list(node.dependants):
+            dedupe_node(dept)
+
+    def dedupe_node(tid: int):
+        node = graph.nodes[tid]
+        to_remove: set[int] = set()
+        for dep in node.dependencies:
+            if filtered_ddm(tid, {dep}, set()) == graph.ddm.get_deps(tid):
+                to_remove.add(dep)
+        for rem in to_remove:
+            node.dependencies -= {rem}
+            graph.nodes[rem].dependants -= {tid}
+        to_remove_cat: set[int] = set()
+        for cat_dep in node.cat_dependencies:
+            if filtered_ddm(tid, set(), {cat_dep}) == graph.ddm.get_deps(tid):
+                to_remove_cat.add(cat_dep)
+        for rem in to_remove_cat:
+            node.cat_dependencies -= {rem}
+            graph.categories[rem].dependants -= {tid}
+        for dept in list(node.dependants):
+            dedupe_node(dept)
+        if node.cat_dependant is not None:
+            dedupe_category(node.cat_dependant)
+
+    if not graph._ddm_live:
+        graph.build_ddm()
+    for root in graph._find_root_tids():
+        dedupe_node(root)
+
+
+def build_graph(todo_count: int, seed: int = 0) -> Graph:
+    """Wide synthetic DAG: categories of 20 todos, each todo depending on a few
+    recent todos and sometimes on an earlier category"""
+    rng = random.Random(seed)
+    graph = Graph()
+    per_category = 20
+    for tid in range(todo_count):
+        graph.add_todo(tid, tid // per_category)
+    for tid in range(todo_count):
+        window = range(max(0, tid - 200), tid)
+        for dep in rng.sample(window, min(len(window), rng.randint(1, 4))):
+            graph.add_dep_node(tid, dep)
+        cid = tid // per_category
+        if cid and rng.random() < 0.1:
+            graph.add_cat_dep(tid, rng.randrange(max(0, cid - 10), cid))
+    graph.build_ddm()
+    return graph
+
+
+def clone(graph: Graph) -> Graph:
+    """Copy with unshared nodes; legacy_dedupe writes to nodes in place"""
+    cloned = Graph()
+    cloned.nodes = {tid: dataclasses.replace(node) for tid, node in graph.nodes.items()}
+    cloned.categories = {
+        cid: dataclasses.replace(node) for cid, node in graph.categories.items()
+    }
+    cloned.build_ddm()
+    return cloned
+
+
+def time_dedupe(graph: Graph, dedupe) -> tuple[float, Graph]:
+    working = graph.copy() if dedupe is Graph.dedupe else clone(graph)
+    start = time.perf_counter()
+    dedupe(working)
+    return time.perf_counter() - start, working
+
+
+def edges(graph: Graph) -> dict[int, tuple]:
+    return {
+        tid: (node.dependencies, node.cat_dependencies, node.cat_dependant)
+        for tid, node in graph.nodes.items()
+    }
+
+
+def edge_count(graph: Graph) -> int:
+    return sum(
+        len(node.dependencies) + len(node.cat_dependencies)
+        for node in graph.nodes.values()
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("sizes", nargs="*", type=int, default=[100, 1000, 10000])
+    parser.add_argument("--legacy-max", type=int, default=100)
+    args = parser.parse_args()
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 10 * max(args.sizes)))
+
+    for todo_count in args.sizes:
+        graph = build_graph(todo_count)
+        elapsed, reduced = time_dedupe(graph, Graph.dedupe)
+        print(f"{todo_count} todos, {edge_count(graph)} -> {edge_count(reduced)} edges")
+        print(f"  bitset reduction: {elapsed * 1000:10.2f} ms")
+        if todo_count > args.legacy_max:
+            continue
+        legacy_elapsed, legacy = time_dedupe(graph, legacy_dedupe)
+        assert edges(legacy) == edges(reduced)
+        print(f"  recursive dedupe: {legacy_elapsed * 1000:10.2f} ms")
+        print(f"  speedup:          {legacy_elapsed / elapsed:10.2f}x")
+
+
+if __name__ == "__main__":
+    main()
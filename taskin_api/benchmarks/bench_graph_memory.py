@@ -0,0 +1,152 @@
+"""Memory benchmark for Graph node storage.
+
+Compares slotted nodes holding shared immutable sets against the previous layout,
+plain dataclasses holding a mutable set per field, for a loaded graph and for the
+filtered copies scope_subgraph keeps per request. Sizes count every container once
+and leave out the ints, which both layouts share. Run from the taskin_api directory:
+
+    python benchmarks/bench_graph_memory.py [todo_count ...] [--filtered N]
+"""
+
+import argparse
+import random
+import sys
+from collections.abc import Iterable
+from dataclasses import dataclass, fields, is_dataclass
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from bench_dedupe import build_graph
+from dep_manager import Graph
+
+
+@dataclass
+class LegacyTodoNode:
+    tid: int
+    cid: int
+    cat_dependencies: set[int]
+    dependencies: set[int]
+    cat_dependant: int | None
+    dependants: set[int]
+
+
+@dataclass
+class LegacyCategoryNode:
+    cid: int
+    dependencies: set[int]
+    dependants: set[int]
+
+
+def legacy_nodes(graph: Graph) -> tuple[dict, dict]:
+    """The graph's nodes as they were stored before node sets became immutable"""
+    nodes = {
+        tid: LegacyTodoNode(
+            tid=node.tid,
+            cid=node.cid,
+            cat_dependencies=set(node.cat_dependencies),
+            dependencies=set(node.dependencies),
+            cat_dependant=node.cat_dependant,
+            dependants=set(node.dependants),
+        )
+        for tid, node in graph.nodes.items()
+    }
+    categories = {
+        cid: LegacyCategoryNode(
+            cid=node.cid,
+            dependencies=set(node.dependencies),
+            dependants=set(node.dependants),
+        )
+        for cid, node in graph.categories.items()
+    }
+    return nodes, categories
+
+
+def footprint(roots: Iterable[object], skip: set[int] | None = None) -> int:
+    """Bytes held by the containers reachable from roots, each counted once.
+    Objects whose ids are in skip are left out, along with everything below them."""
+    seen = set(skip or ())
+    stack = list(roots)
+    total = 0
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, int) or obj is None:
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            stack.extend(obj.values())
+        elif isinstance(obj, (set, frozenset, list, tuple)):
+            stack.extend(obj)
+        elif is_dataclass(obj):
+            if hasattr(obj, "__dict__"):
+                total += sys.getsizeof(obj.__dict__)
+            stack.extend(getattr(obj, field.name) for field in fields(obj))
+    return total
+
+
+def object_ids(roots: Iterable[object]) -> set[int]:
+    """Ids of the node objects and node sets reachable from roots"""
+    ids: set[int] = set()
+    for root in roots:
+        assert isinstance(root, dict)
+        for node in root.values():
+            ids.add(id(node))
+            ids.update(
+                id(getattr(node, name))
+                for name in ("cat_dependencies", "dependencies", "dependants")
+                if hasattr(node, name)
+            )
+    return ids
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("sizes", nargs="*", type=int, default=[100, 1000, 5000])
+    parser.add_argument("--filtered", type=int, default=10)
+    args = parser.parse_args()
+
+    for todo_count in args.sizes:
+        graph = build_graph(todo_count)
+        graph.dedupe()
+        legacy = legacy_nodes(graph)
+        compact_bytes = footprint([graph.nodes, graph.categories])
+        legacy_bytes = footprint(legacy)
+        ddm_bytes = footprint([graph.ddm.ddm])
+        print(f"{todo_count} todos, {len(graph.categories)} categories")
+        print(f"  legacy nodes:  {legacy_bytes / 1024:10.1f} KiB")
+        print(f"  compact nodes: {compact_bytes / 1024:10.1f} KiB")
+        print(f"  saved:         {1 - compact_bytes / legacy_bytes:10.1%}")
+        print(f"  (DDM sets:     {ddm_bytes / 1024:10.1f} KiB)")
+
+        # What a filtered copy adds on top of the graph it came from
+        rng = random.Random(todo_count)
+        excluded = set(rng.sample(sorted(graph.nodes), args.filtered))
+        filtered = graph.filter_out(excluded)
+        shared = object_ids([graph.nodes, graph.categories])
+        added = footprint([filtered.nodes, filtered.categories], skip=shared)
+        legacy_nodes_of, legacy_categories_of = legacy_nodes(filtered)
+        written = [
+            legacy_nodes_of[tid]
+            for tid, node in filtered.nodes.items()
+            if id(node) not in shared
+        ]
+        written.extend(
+            legacy_categories_of[cid]
+            for cid, node in filtered.categories.items()
+            if id(node) not in shared
+        )
+        # The previous copy-on-write also copied the id tables and written nodes
+        legacy_added = footprint(written) + sum(
+            sys.getsizeof(table) for table in (filtered.nodes, filtered.categories)
+        )
+        print(
+            f"  filtered copy without {args.filtered} todos, "
+            f"{len(written)} nodes written:"
+        )
+        print(f"    legacy:  {legacy_added / 1024:10.1f} KiB")
+        print(f"    compact: {added / 1024:10.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
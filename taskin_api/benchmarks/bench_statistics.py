@@ -0,0 +1,187 @@
+"""Benchmark for the statistics endpoint on a synthetic history.
+
+Compares the previous Python aggregation (load every report, lazy-load its task
+reports, loop) with the SQL aggregate over raw task reports and with the rollup
+path the endpoint uses. Run from the taskin_api directory:
+
+    python benchmarks/bench_statistics.py [days] [tasks]
+"""
+
+import argparse
+import datetime
+import random
+import sys
+import tempfile
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from models import Base, Report, TaskReport, TaskStatus
+from rollups import aggregate_statistics, query_statistics, record_report
+from schemas import AggregatedStatistics, TaskStatistics
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+
+
+def legacy_statistics(db: Session, start_date, end_date) -> AggregatedStatistics:
+    """The statistics endpoint as it was before aggregation moved into SQL"""
+    reports = (
+        db.query(Report)
+        .filter(Report.created_at >= start_date, Report.created_at <= end_date)
+        .order_by(Report.created_at.desc())
+        .all()
+    )
+    task_statistics_map: dict[tuple[str, str], TaskStatistics] = {}
+    total_inprog_nz: dict[int, int] = {}
+    totals = [0, 0, 0]
+    for report in reports:
+        for task_report in report.task_reports:
+            key = (task_report.todo_title, task_report.category_name)
+            ts = task_statistics_map.get(key)
+            if not ts:
+                ts = task_statistics_map[key] = TaskStatistics(
+                    todo_id=task_report.todo_id,
+                    todo_title=task_report.todo_title,
+                    category_name=task_report.category_name,
+                    completion_rate=0.0,
+                    skip_rate=0.0,
+                    avg_in_progress_duration_seconds=None,
+                    times_completed=0,
+                    times_skipped=0,
+                    tot_in_progress_duration_seconds=0.0,
+                    total_appearances=0,
+                    times_incomplete=0,
+                )
+            ts.total_appearances += 1
+            if task_report.final_status == TaskStatus.complete:
+                ts.times_completed += 1
+                totals[0] += 1
+            elif task_report.final_status == TaskStatus.skipped:
+                ts.times_skipped += 1
+                totals[1] += 1
+            else:
+                ts.times_incomplete += 1
+                totals[2] += 1
+            duration = task_report.in_progress_duration_seconds
+            if duration is not None and duration > 0:
+                ts.tot_in_progress_duration_seconds += duration
+                total_inprog_nz[task_report.todo_id] = (
+                    total_inprog_nz.get(task_report.todo_id, 0) + 1
+                )
+    for ts in task_statistics_map.values():
+        ts.completion_rate = ts.times_completed / ts.total_appearances
+        ts.skip_rate = ts.times_skipped / ts.total_appearances
+        ts.avg_in_progress_duration_seconds = (
+            ts.tot_in_progress_duration_seconds / total_inprog_nz.get(ts.todo_id, 1)
+        )
+    task_statistics = sorted(
+        task_statistics_map.values(), key=lambda x: x.completion_rate, reverse=True
+    )
+    return AggregatedStatistics(
+        report_count=len(reports),
+        task_statistics=task_statistics,
+        total_completions=totals[0],
+        total_skips=totals[1],
+        total_incompletes=totals[2],
+    )
+
+
+def build_history(db: Session, days: int, task_count: int, seed: int = 0):
+    """One reset a day at a random evening time, with every task reported"""
+    rng = random.Random(seed)
+    first_day = datetime.datetime(2023, 1, 1)
+    tasks = [(i + 1, f"task-{i}", f"category-{i % 12}") for i in range(task_count)]
+    statuses = list(TaskStatus)
+    for day in range(days):
+        report = Report(
+            created_at=first_day
+            + datetime.timedelta(days=day, hours=21, seconds=rng.randint(0, 7200)),
+            total_todos=task_count,
+            completed_todos=0,
+            skipped_todos=0,
+            incomplete_todos=0,
+        )
+        db.add(report)
+        db.flush()
+        db.execute(
+            insert(TaskReport),
+            [
+                {
+                    "report_id": report.id,
+                    "todo_id": todo_id,
+                    "todo_title": title,
+                    "category_name": category,
+                    "final_status": rng.choice(statuses),
+                    "in_progress_duration_seconds": rng.choice(
+                        [None, rng.uniform(1, 3600)]
+                    ),
+                }
+                for todo_id, title, category in tasks
+            ],
+        )
+        record_report(db, report)
+    db.commit()
+    return first_day
+
+
+def _counts(stats: AggregatedStatistics):
+    return stats.report_count, {
+        (ts.todo_title, ts.category_name): (
+            ts.total_appearances,
+            ts.times_completed,
+            ts.times_skipped,
+            ts.times_incomplete,
+        )
+        for ts in stats.task_statistics
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("days", nargs="?", type=int, default=730)
+    parser.add_argument("tasks", nargs="?", type=int, default=150)
+    args = parser.parse_args()
+    days, task_count = args.days, args.tasks
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{tmp}/bench.db")
+        Base.metadata.create_all(bind=engine)
+        with Session(engine) as db:
+            first_day = build_history(db, days, task_count)
+        last_day = first_day + datetime.timedelta(days=days)
+        print(f"{days} days x {task_count} tasks = {days * task_count} task reports")
+
+        ranges = {
+            "last 30 days": (last_day - datetime.timedelta(days=30), last_day),
+            "last year": (last_day - datetime.timedelta(days=365), last_day),
+            "everything": (first_day, last_day),
+        }
+        paths = {
+            "python loop": legacy_statistics,
+            "sql aggregate": lambda db, start, end: aggregate_statistics(
+                db, [], [(start, end + datetime.timedelta(microseconds=1))]
+            ),
+            "rollups": query_statistics,
+        }
+        for label, (start, end) in ranges.items():
+            # Offset into the day so both raw edges and rollups are exercised
+            start += datetime.timedelta(hours=7)
+            end -= datetime.timedelta(hours=5)
+            results = []
+            print(label)
+            for name, path in paths.items():
+                runs = 3
+
+                def run():
+                    with Session(engine) as db:
+                        return path(db, start, end)
+
+                results.append(_counts(run()))
+                elapsed = timeit.timeit(run, number=runs) / runs
+                print(f"  {name:14} {elapsed * 1000:9.2f} ms")
+            assert all(result == results[0] for result in results), label
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""Microbenchmark for DependencyManager.get_timeslots.
+
+Compares the compiled time plan against the previous implementation, which
+walked the config and re-resolved titles, events and computed times on every
+call. Run from the taskin_api directory:
+
+    python benchmarks/bench_timeslots.py [todo_count]
+"""
+
+import argparse
+import datetime
+import random
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config_loader import (
+    AppConfig,
+    CategoryConfig,
+    ComputeTimeConfig,
+    ComputeTimeDependency,
+    TimeDependency,
+    TodoConfig,
+)
+from dep_manager import ComputedTime, DependencyManager
+from models import Event
+from schemas import Timeslot
+
+
+def legacy_get_timeslots(dep_man: DependencyManager, events: list[Event]):
+    """get_timeslots as it was before the time plan was compiled"""
+    computed_times: dict[str, ComputedTime] = {}
+
+    for compute_time in dep_man.config.computed_times:
+        try:
+            computed_times[compute_time.name] = ComputedTime.from_config(
+                compute_time, {event.name: event for event in events}
+            )
+        except ValueError:
+            continue
+
+    todo_timeslot: dict[int, Timeslot] = {}
+    event_time_map = {event.name: event.timestamp for event in events}
+    for category in dep_man.config.categories:
+        for todo in category.todos:
+            todo_id = dep_man.todo_id_map.get(todo.title)
+            if not todo_id:
+                continue
+            time_dep = todo.depends_on_time
+            if not (
+                (time_dep.start or time_dep.end)
+                or todo.depends_on_events
+                or todo.depends_on_compute_times
+            ):
+                continue
+
+            now = datetime.datetime.now()
+            start_time = now.replace(hour=0, minute=0, second=0, microsecond=0)
+            time_slot_start = None
+            time_slot_end = None
+            if time_dep:
+                if time_dep.start is not None:
+                    dep_start = start_time + datetime.timedelta(
+                        seconds=time_dep.start % 86400
+                    )
+                    if time_slot_start is None or dep_start > time_slot_start:
+                        time_slot_start = dep_start
+                if time_dep.end is not None:
+                    dep_end = start_time + datetime.timedelta(
+                        seconds=time_dep.end % 86400
+                    )
+                    if time_slot_end is None or dep_end < time_slot_end:
+                        time_slot_end = dep_end
+
+            modified_events = todo.depends_on_events.copy()
+            for compute_dep in todo.depends_on_compute_times:
+                compute_time = computed_times.get(compute_dep.name)
+                if not compute_time:
+                    continue
+                computed_minute = compute_time.get_time_for_index(compute_dep.index)
+
+                modified_events[compute_time.event_name] = TimeDependency(
+                    start=computed_minute,
+                    end=None,
+                )
+
+            for event_name, event_time_dep in modified_events.items():
+                event_timestamp = event_time_map.get(event_name)
+                if not event_timestamp:
+                    continue
+
+                if event_time_dep.start is not None:
+                    dep_start = event_timestamp + datetime.timedelta(
+                        seconds=event_time_dep.start % 86400
+                    )
+                    if time_slot_start is None or dep_start > time_slot_start:
+                        time_slot_start = dep_start
+
+                if event_time_dep.end is not None:
+                    dep_end = event_timestamp + datetime.timedelta(
+                        seconds=event_time_dep.end % 86400
+                    )
+                    if time_slot_end is None or dep_end < time_slot_end:
+                        time_slot_end = dep_end
+
+            todo_timeslot[todo_id] = Timeslot(start=time_slot_start, end=time_slot_end)
+            if time_slot_start and time_slot_end and time_slot_start >= time_slot_end:
+                todo_timeslot[todo_id] = Timeslot(start=None, end=None)
+
+    return todo_timeslot
+
+
+def build_manager(todo_count: int, seed: int = 0):
+    """Synthetic config where every todo has time, event and computed deps"""
+    rng = random.Random(seed)
+    event_names = [f"event-{i}" for i in range(20)]
+    computed_times = [
+        ComputeTimeConfig(
+            name=f"computed-{i}",
+            src_event=rng.choice(event_names),
+            end_time=rng.randint(40000, 86000),
+            sections=4,
+            minimum_window=3600,
+        )
+        for i in range(10)
+    ]
+    todo_configs = []
+    for i in range(todo_count):
+        todo_configs.append(
+            TodoConfig(
+                title=f"todo-{i}",
+                depends_on_time=TimeDependency(
+                    start=rng.choice([None, rng.randint(0, 43200)]),
+                    end=rng.choice([None, rng.randint(43200, 86399)]),
+                ),
+                depends_on_events={
+                    name: TimeDependency(
+                        start=rng.randint(0, 7200), end=rng.randint(7200, 80000)
+                    )
+                    for name in rng.sample(event_names, 2)
+                },
+                depends_on_compute_times=[
+                    ComputeTimeDependency(
+                        name=rng.choice(computed_times).name, index=rng.randint(0, 3)
+                    )
+                ],
+            )
+        )
+    config = AppConfig(
+        categories=[CategoryConfig(name="bench", todos=todo_configs)],
+        computed_times=computed_times,
+    )
+    midnight = datetime.datetime.now().replace(hour=0, minute=0, second=0)
+    events = [
+        Event(
+            id=i + 1,
+            name=name,
+            timestamp=midnight + datetime.timedelta(seconds=rng.randint(0, 43200)),
+        )
+        for i, name in enumerate(event_names[:-2])  # leave some never triggered
+    ]
+    # Only the time plan is under test, so skip load_from_db's graph build and
+    # dedupe, which dominate setup time for a category this wide.
+    dep_man = DependencyManager(config)
+    dep_man.todo_id_map = {f"todo-{i}": i + 1 for i in range(todo_count)}
+    dep_man.time_plan = dep_man._compile_time_plan()
+    return dep_man, events
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("todo_count", nargs="?", type=int, default=5000)
+    todo_count = parser.parse_args().todo_count
+    dep_man, events = build_manager(todo_count)
+    assert dep_man.get_timeslots(events) == legacy_get_timeslots(dep_man, events)
+
+    runs = 10
+    legacy = timeit.timeit(lambda: legacy_get_timeslots(dep_man, events), number=runs)
+    compiled = timeit.timeit(lambda: dep_man.get_timeslots(events), number=runs)
+    print(f"{todo_count} todos, {runs} runs")
+    print(f"  config walk:   {legacy / runs * 1000:8.2f} ms/call")
+    print(f"  compiled plan: {compiled / runs * 1000:8.2f} ms/call")
+    print(f"  speedup:       {legacy / compiled:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
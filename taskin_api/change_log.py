@@ -0,0 +1,128 @@
+"""
+Change log for delta sync.
+
+Every flush that creates, updates or deletes a category, todo, one-off or event adds a
+change_log row for it, in the same transaction; bulk statements that bypass the ORM
+record their rows with record_changes. A client that last synced at some version then
+only needs the rows logged after it. Old entries are pruned by age, and a client older
+than the oldest entry is told to refetch everything.
+"""
+
+import os
+from collections.abc import Iterable
+from datetime import datetime, timedelta
+
+from models import Category, ChangeEntity, ChangeLog, Event, OneOffTodo, Todo
+from schemas import (
+    CategoryResponse,
+    EventResponse,
+    OneOffTodoResponse,
+    SyncResponse,
+    SyncTombstones,
+    TodoResponse,
+)
+from sqlalchemy import delete, event, func, insert, select
+from sqlalchemy.orm import Session
+
+CHANGE_LOG_RETENTION_DAYS = int(os.environ.get("CHANGE_LOG_RETENTION_DAYS", "30"))
+
+TRACKED_MODELS = {
+    Category: ChangeEntity.category,
+    Todo: ChangeEntity.todo,
+    OneOffTodo: ChangeEntity.oneoff,
+    Event: ChangeEntity.event,
+}
+
+
+def record_changes(db: Session, entity: ChangeEntity, ids: Iterable[int]):
+    """Log changes made outside the ORM, such as bulk updates. The caller commits."""
+    now = datetime.now()
+    rows = [
+        {"entity": entity, "entity_id": entity_id, "changed_at": now}
+        for entity_id in dict.fromkeys(ids)
+    ]
+    if rows:
+        db.execute(insert(ChangeLog), rows)
+
+
+@event.listens_for(Session, "after_flush")
+def _record_flushed_changes(session: Session, flush_context):
+    now = datetime.now()
+    rows = []
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        entity = TRACKED_MODELS.get(type(obj))
+        if entity is None:
+            continue
+        if obj in session.dirty and not session.is_modified(obj):
+            continue
+        rows.append({"entity": entity, "entity_id": obj.id, "changed_at": now})
+    if rows:
+        session.connection().execute(insert(ChangeLog), rows)
+
+
+def prune_change_log(db: Session, retention: timedelta | None = None):
+    """Drop entries older than the retention, always keeping the newest one so the
+    current version survives. The caller commits."""
+    if retention is None:
+        retention = timedelta(days=CHANGE_LOG_RETENTION_DAYS)
+    db.execute(
+        delete(ChangeLog).where(
+            ChangeLog.changed_at < datetime.now() - retention,
+            ChangeLog.id < select(func.max(ChangeLog.id)).scalar_subquery(),
+        )
+    )
+
+
+def changes_since(db: Session, since: int) -> SyncResponse:
+    """
+    Rows changed after version since, with the ids of rows deleted since then.
+
+    If entries after since have been pruned, or since is not a version this log
+    has handed out, the response only carries the current version and full=True.
+    """
+    latest, oldest = db.execute(
+        select(func.max(ChangeLog.id), func.min(ChangeLog.id))
+    ).one()
+    latest = latest or 0
+    if since <= 0 or since > latest or since < oldest - 1:
+        return SyncResponse(version=latest, full=True)
+
+    changed: dict[ChangeEntity, set[int]] = {entity: set() for entity in ChangeEntity}
+    for entity, entity_id in db.execute(
+        select(ChangeLog.entity, ChangeLog.entity_id)
+        .where(ChangeLog.id > since, ChangeLog.id <= latest)
+        .distinct()
+    ):
+        changed[entity].add(entity_id)
+
+    def current(model, entity: ChangeEntity) -> list:
+        ids = changed[entity]
+        if not ids:
+            return []
+        return list(
+            db.scalars(select(model).where(model.id.in_(ids)).order_by(model.id))
+        )
+
+    categories = current(Category, ChangeEntity.category)
+    todos = current(Todo, ChangeEntity.todo)
+    oneoffs = current(OneOffTodo, ChangeEntity.oneoff)
+    events = current(Event, ChangeEntity.event)
+
+    # Anything logged that no longer exists was deleted
+    def gone(rows: list, entity: ChangeEntity) -> list[int]:
+        return sorted(changed[entity] - {row.id for row in rows})
+
+    return SyncResponse(
+        version=latest,
+        full=False,
+        categories=[CategoryResponse.model_validate(row) for row in categories],
+        todos=[TodoResponse.model_validate(row) for row in todos],
+        oneoffs=[OneOffTodoResponse.model_validate(row) for row in oneoffs],
+        events=[EventResponse.model_validate(row) for row in events],
+        deleted=SyncTombstones(
+            categories=gone(categories, ChangeEntity.category),
+            todos=gone(todos, ChangeEntity.todo),
+            oneoffs=gone(oneoffs, ChangeEntity.oneoff),
+            events=gone(events, ChangeEntity.event),
+        ),
+    )
@@ -91,4 +91,4 @@ def init_config(config_path: str = "config.yml") -> AppConfig:
 
 CONFIG = init_config(_CONFIG_PATH)
 
-WEBHOOK_URL = str(CONFIG.webhook_url)
+WEBHOOK_URL = str(CONFIG.webhook_url) if CONFIG.webhook_url else None
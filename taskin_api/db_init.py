@@ -2,10 +2,13 @@ import os
 
 from alembic import command
 from alembic.config import Config
+from change_log import prune_change_log
 from config_loader import CONFIG, CategoryConfig, TodoConfig
 from dep_manager import dep_man
 from models import Category, Event, SessionLocal, TaskStatus, Todo
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
+from state_signals import StateChange, state_signals
+from status_store import status_store
 
 
 def sync_db_from_config(db: Session):
@@ -136,19 +139,25 @@ def sync_db_from_config(db: Session):
     if stale_categories:
         print(f"Removed {len(stale_categories)} stale category/categories")
 
+    prune_change_log(db)
+
     db.commit()
     print(
         f"Database synced with config: {len(config_categories)} categories, {len(config_todos)} todos, {len(config_event_names)} events"
     )
 
     dep_man.load_from_db(
-        categories=db.query(Category).all(), events=db.query(Event).all()
+        categories=db.query(Category).options(selectinload(Category.todos)).all(),
+        events=db.query(Event).all(),
     )
 
     unready_todos = db.query(Todo.id).filter(Todo.reset_count > 0).all()
     unready_ids = {tid for (tid,) in unready_todos}
     dep_man.scope_subgraph(unready_ids)
 
+    status_store.load(db)
+    state_signals.emit(StateChange.config)
+
 
 def initialize_database():
     """Initialize database and sync with config data"""
@@ -1,41 +1,98 @@
 import datetime
+import threading
 
 # from models import Category, Todo
-from dataclasses import dataclass
+from collections import OrderedDict
+from collections.abc import Iterable
+from dataclasses import dataclass, replace
 
-from config_loader import CONFIG, AppConfig, ComputeTimeConfig, TimeDependency
+import structlog
+from config_loader import CONFIG, AppConfig, ComputeTimeConfig
 from models import Category, Event
 from schemas import Timeslot
 
+# Node sets are immutable, so graphs can share them, and every empty one is this
+_EMPTY: frozenset[int] = frozenset()
 
-@dataclass
+
+def _frozen(tids: Iterable[int]) -> frozenset[int]:
+    tids = frozenset(tids)
+    return tids if tids else _EMPTY
+
+
+@dataclass(slots=True)
 class TodoNode:
     tid: int
     cid: int
-    cat_dependencies: set[int]
-    dependencies: set[int]
+    cat_dependencies: frozenset[int]
+    dependencies: frozenset[int]
     cat_dependant: int | None
-    dependants: set[int]
+    dependants: frozenset[int]
 
 
-@dataclass
+@dataclass(slots=True)
 class CategoryNode:
     cid: int
-    dependencies: set[int]
-    dependants: set[int]
+    dependencies: frozenset[int]
+    dependants: frozenset[int]
+
+
+class DependencyCycleError(ValueError):
+    """Todos that depend on each other in a loop, each on the next"""
+
+    def __init__(self, cycle: list[int], titles: dict[int, str] | None = None):
+        self.cycle = cycle
+        names = [(titles or {}).get(tid, str(tid)) for tid in cycle]
+        super().__init__("Dependency cycle: " + " -> ".join([*names, names[0]]))
+
+    def with_titles(self, titles: dict[int, str]) -> "DependencyCycleError":
+        return DependencyCycleError(self.cycle, titles)
 
 
 class DDM:
+    """Deep dependency map. Copies share their sets until one side writes to them."""
+
     def __init__(self) -> None:
         self.ddm: dict[int, set[int]] = {}
+        # Todos whose sets belong to this map alone and may be changed in place
+        self._owned: set[int] = set()
 
     def get_deps(self, tid: int) -> set[int]:
         return self.ddm.get(tid, set())
 
+    def _writable(self, tid: int) -> set[int]:
+        deps = self.ddm.get(tid)
+        if deps is None or tid not in self._owned:
+            deps = self.ddm[tid] = set() if deps is None else deps.copy()
+            self._owned.add(tid)
+        return deps
+
+    def set_deps(self, tid: int, deps: set[int]) -> None:
+        """Stores deps as tid's deep dependencies, taking ownership of the set"""
+        self.ddm[tid] = deps
+        self._owned.add(tid)
+
     def add_deps(self, tid: int, deps: set[int]) -> None:
-        if tid not in self.ddm:
-            self.ddm[tid] = set()
-        self.ddm[tid].update(deps)
+        self._writable(tid).update(deps)
+
+    def discard_dep(self, tid: int, dep: int) -> None:
+        if dep in self.ddm.get(tid, ()):
+            self._writable(tid).discard(dep)
+
+    def discard_deps(self, tid: int, deps: set[int]) -> None:
+        if not deps.isdisjoint(self.ddm.get(tid, ())):
+            self._writable(tid).difference_update(deps)
+
+    def remove_todo(self, tid: int) -> None:
+        self.ddm.pop(tid, None)
+        self._owned.discard(tid)
+
+    def copy(self) -> "DDM":
+        new_ddm = DDM()
+        new_ddm.ddm = self.ddm.copy()
+        # Every set is now shared, so neither side may write to one in place
+        self._owned = set()
+        return new_ddm
 
     def filter(self, filter_tids: set[int]) -> "DDM":
         filtered = DDM()
@@ -61,38 +118,203 @@ class DDM:
         return hash(frozenset((tid, frozenset(deps)) for tid, deps in self.ddm.items()))
 
 
+class BitsetDDM:
+    """Compact DDM storing each todo's deep dependencies as an integer bitmask.
+
+    Todo ids are mapped to dense bit indexes. Filtered copies share the index
+    with their source, so comparing them is a comparison of plain ints.
+    """
+
+    def __init__(self) -> None:
+        self.index: dict[int, int] = {}
+        self.tids: list[int] = []
+        self.masks: dict[int, int] = {}
+
+    @classmethod
+    def from_ddm(cls, ddm: DDM, like: "BitsetDDM | None" = None) -> "BitsetDDM":
+        """Builds a bitset DDM, reusing the todo indexing of `like` if given"""
+        bitset_ddm = cls()
+        if like is not None:
+            bitset_ddm.index = like.index
+            bitset_ddm.tids = like.tids
+        for tid, deps in ddm.ddm.items():
+            bitset_ddm.add_deps(tid, deps)
+        return bitset_ddm
+
+    def _bit(self, tid: int) -> int:
+        if tid not in self.index:
+            self.index[tid] = len(self.tids)
+            self.tids.append(tid)
+        return 1 << self.index[tid]
+
+    def mask_of(self, tids: Iterable[int]) -> int:
+        """Bitmask of the given todo ids, ignoring ids this DDM has never seen"""
+        mask = 0
+        for tid in tids:
+            if tid in self.index:
+                mask |= 1 << self.index[tid]
+        return mask
+
+    def get_mask(self, tid: int) -> int:
+        return self.masks.get(tid, 0)
+
+    def get_deps(self, tid: int) -> set[int]:
+        deps: set[int] = set()
+        mask = self.masks.get(tid, 0)
+        while mask:
+            low_bit = mask & -mask
+            deps.add(self.tids[low_bit.bit_length() - 1])
+            mask ^= low_bit
+        return deps
+
+    def depends_on(self, tid: int, dep: int) -> bool:
+        return bool(self.masks.get(tid, 0) & self.mask_of((dep,)))
+
+    def add_deps(self, tid: int, deps: Iterable[int]) -> None:
+        mask = self.masks.get(tid, 0)
+        for dep in deps:
+            mask |= self._bit(dep)
+        self.masks[tid] = mask
+
+    def filter(self, filter_tids: set[int]) -> "BitsetDDM":
+        keep = ~self.mask_of(filter_tids)
+        filtered = BitsetDDM()
+        filtered.index = self.index
+        filtered.tids = self.tids
+        filtered.masks = {
+            tid: mask & keep
+            for tid, mask in self.masks.items()
+            if tid not in filter_tids
+        }
+        return filtered
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, BitsetDDM):
+            return NotImplemented
+        if self.index is other.index:
+            return self.masks == other.masks
+        if self.masks.keys() != other.masks.keys():
+            return False
+        return all(self.get_deps(tid) == other.get_deps(tid) for tid in self.masks)
+
+    def __contains__(self, tid: int) -> bool:
+        return tid in self.masks
+
+    def __bool__(self) -> bool:
+        return bool(self.masks)
+
+    def __hash__(self) -> int:
+        return hash(frozenset(self.masks))
+
+
 class Graph:
     def __init__(self) -> None:
         self.nodes: dict[int, TodoNode] = {}
         self.categories: dict[int, CategoryNode] = {}
         self.ddm: DDM = DDM()
+        # Once the DDM has been built, mutations keep it up to date in place
+        self._ddm_live = False
+        # Nodes this graph may change in place; the rest are shared with copies
+        self._owned_nodes: set[int] = set()
+        self._owned_categories: set[int] = set()
+
+    def _node(self, tid: int) -> TodoNode:
+        """The todo's node, copied first if it is shared with another graph"""
+        node = self.nodes[tid]
+        if tid not in self._owned_nodes:
+            # The sets are immutable, so the copy keeps sharing them
+            node = self.nodes[tid] = replace(node)
+            self._owned_nodes.add(tid)
+        return node
+
+    def _category(self, cid: int) -> CategoryNode:
+        """The category's node, copied first if it is shared with another graph"""
+        node = self.categories[cid]
+        if cid not in self._owned_categories:
+            node = self.categories[cid] = replace(node)
+            self._owned_categories.add(cid)
+        return node
+
+    def _parents(self, tid: int) -> frozenset[int]:
+        """Finds the todos that directly depend on tid, including via its category"""
+        node = self.nodes[tid]
+        if node.cat_dependant is None:
+            return node.dependants
+        return node.dependants | self.categories[node.cat_dependant].dependants
+
+    def _ancestors(self, *tids: int) -> set[int]:
+        """Finds every todo whose deep dependencies include any of tids"""
+        ancestors: set[int] = set()
+        stack = list(tids)
+        while stack:
+            for parent in self._parents(stack.pop()):
+                if parent not in ancestors:
+                    ancestors.add(parent)
+                    stack.append(parent)
+        return ancestors
+
+    def _propagate_deps(self, tid: int, deps: set[int]):
+        """Adds deps to the deep dependencies of tid and every todo above it"""
+        if not self._ddm_live or not deps:
+            return
+        seen = {tid}
+        stack = [tid]
+        while stack:
+            current = stack.pop()
+            if deps <= self.ddm.get_deps(current):
+                continue  # everything above already reaches deps through current
+            self.ddm.add_deps(current, deps)
+            for parent in self._parents(current):
+                if parent not in seen:
+                    seen.add(parent)
+                    stack.append(parent)
+
+    def _category_deps(self, cid: int) -> set[int]:
+        """Deep dependencies gained by depending on a category"""
+        deps: set[int] = set()
+        for tid in self.categories[cid].dependencies:
+            deps.add(tid)
+            deps.update(self.ddm.get_deps(tid))
+        return deps
 
     def add_todo(self, tid: int, cid: int):
         if cid not in self.categories:
             self.categories[cid] = CategoryNode(
-                cid=cid, dependencies=set(), dependants=set()
+                cid=cid, dependencies=_EMPTY, dependants=_EMPTY
             )
-        if tid not in self.nodes:
+            self._owned_categories.add(cid)
+        is_new = tid not in self.nodes
+        if is_new:
             self.nodes[tid] = TodoNode(
                 tid=tid,
                 cid=cid,
-                cat_dependencies=set(),
-                dependencies=set(),
+                cat_dependencies=_EMPTY,
+                dependencies=_EMPTY,
                 cat_dependant=cid,
-                dependants=set(),
+                dependants=_EMPTY,
             )
-        self.categories[cid].dependencies.add(tid)
+            self._owned_nodes.add(tid)
+        if tid not in self.categories[cid].dependencies:
+            category = self._category(cid)
+            category.dependencies = category.dependencies | {tid}
+        if is_new and self._ddm_live:
+            self.ddm.add_deps(tid, set())
+            for dept in self.categories[cid].dependants:
+                self._propagate_deps(dept, {tid})
 
     def add_dep_node(self, tid: int, dep_tid: int):
         if not (tid in self.nodes and dep_tid in self.nodes):
             raise ValueError("Todo nodes must be added before adding dependencies")
-        tid_deps = self.nodes[tid]
-        dep_tid_deps = self.nodes[dep_tid]
+        tid_deps = self._node(tid)
+        dep_tid_deps = self._node(dep_tid)
         if tid_deps.cid == dep_tid_deps.cid:
             dep_tid_deps.cat_dependant = None
-            self.categories[tid_deps.cid].dependencies.discard(dep_tid)
-        tid_deps.dependencies.add(dep_tid)
-        dep_tid_deps.dependants.add(tid)
+            category = self._category(tid_deps.cid)
+            category.dependencies = _frozen(category.dependencies - {dep_tid})
+        tid_deps.dependencies = tid_deps.dependencies | {dep_tid}
+        dep_tid_deps.dependants = dep_tid_deps.dependants | {tid}
+        if self._ddm_live:
+            self._propagate_deps(tid, {dep_tid} | self.ddm.get_deps(dep_tid))
 
     def add_cat_dep(self, tid: int, dep_cid: int):
         if tid not in self.nodes:
@@ -102,17 +324,12 @@ class Graph:
         if dep_cid not in self.categories:
             raise ValueError("Unknown category dependency")
 
-        tid_deps = self.nodes[tid]
-        tid_deps.cat_dependencies.add(dep_cid)
-        self.categories[dep_cid].dependants.add(tid)
-
-    def _find_floor_cids(self):
-        """Finds floor nodes (no dependants)"""
-        floors: list[int] = []
-        for cid, node in self.categories.items():
-            if not node.dependants:
-                floors.append(cid)
-        return floors
+        tid_deps = self._node(tid)
+        tid_deps.cat_dependencies = tid_deps.cat_dependencies | {dep_cid}
+        category = self._category(dep_cid)
+        category.dependants = category.dependants | {tid}
+        if self._ddm_live:
+            self._propagate_deps(tid, self._category_deps(dep_cid))
 
     def _find_root_tids(self):
         """Finds root nodes (no dependencies)"""
@@ -122,186 +339,351 @@ class Graph:
                 roots.append(tid)
         return roots
 
-    def _recursive_dep_solver(self, tid: int):
-        deps: set[int] = set()
-        if tid in self.ddm:
-            return self.ddm.get_deps(tid)
-        for dep in self.nodes[tid].dependencies:
-            deps.add(dep)
-            deps.update(self._recursive_dep_solver(dep))
-        for cat_dep in self.nodes[tid].cat_dependencies:
-            for cat_dep_tid in self.categories[cat_dep].dependencies:
-                deps.add(cat_dep_tid)
-                deps.update(self._recursive_dep_solver(cat_dep_tid))
-        self.ddm.add_deps(tid, deps)
-        return deps
-
     def build_ddm(self):
-        """Builds the deep dependency map"""
+        """Builds the deep dependency map
+
+        Closures are built once each, dependencies first, so no todo or category is
+        expanded twice. A todo's closure starts as a copy of its largest child closure
+        and takes the rest as updates, and each category's closure is built once and
+        reused by every todo that depends on the category.
+        """
         self.ddm = DDM()
-        for cids in self._find_floor_cids():
-            for tid in self.categories[cids].dependencies:
-                self._recursive_dep_solver(tid)
+        cat_closures: dict[int, set[int]] = {}
+
+        def category_closure(cid: int) -> set[int]:
+            if cid not in cat_closures:
+                closure: set[int] = set()
+                for tid in self.categories[cid].dependencies:
+                    closure.add(tid)
+                    closure.update(self.ddm.ddm[tid])
+                cat_closures[cid] = closure
+            return cat_closures[cid]
+
+        for tid in self._topological_order():
+            node = self.nodes[tid]
+            parts = [self.ddm.ddm[dep] for dep in node.dependencies]
+            parts.extend(category_closure(cid) for cid in node.cat_dependencies)
+            parts.sort(key=len, reverse=True)
+            deps = set(parts[0]) if parts else set()
+            for part in parts[1:]:
+                deps.update(part)
+            deps.update(node.dependencies)
+            self.ddm.set_deps(tid, deps)
+        self._ddm_live = True
 
     def remove_node(self, tid: int):
-        if tid not in self.nodes:
-            return
-        node = self.nodes[tid]
-        for dept_tid in node.dependants:
-            for dep in node.dependencies:  # move dependencies to dependant
-                self.nodes[dept_tid].dependencies.add(dep)
-                self.nodes[dep].dependants.add(dept_tid)
+        self.remove_nodes({tid})
 
-            for cat_dep_cid in node.cat_dependencies:
-                self.nodes[dept_tid].cat_dependencies.add(cat_dep_cid)
-                self.categories[cat_dep_cid].dependants.add(dept_tid)
+    def remove_nodes(self, tids: Iterable[int]):
+        """Removes todos in one pass, splicing the graph around them
 
-        # handle node that is cat_dependant
-        if node.cat_dependant is not None:
-            for dep in node.dependencies:
-                dep_node = self.nodes[dep]
-                if dep_node.cid == node.cid:
-                    dep_node.cat_dependant = node.cat_dependant
-                    self.categories[node.cat_dependant].dependencies.add(dep)
-                else:  # pass dependencies through the category
-                    for dept in self.categories[node.cat_dependant].dependants:
-                        self.nodes[dept].dependencies.add(dep)
-                        self.nodes[dep].dependants.add(dept)
-
-            for (
-                cat_dep
-            ) in node.cat_dependencies:  # pass dependencies through the category
-                for dept in self.categories[node.cat_dependant].dependants:
-                    self.nodes[dept].cat_dependencies.add(cat_dep)
-                    self.categories[cat_dep].dependants.add(dept)
-
-        for dep in node.dependencies:
-            self.nodes[dep].dependants.discard(tid)
-        for dep in node.dependants:
-            self.nodes[dep].dependencies.discard(tid)
-        for cat_dep in node.cat_dependencies:
-            self.categories[cat_dep].dependants.discard(tid)
-        if node.cat_dependant is not None:
-            self.categories[node.cat_dependant].dependencies.discard(tid)
-            if self.categories[node.cat_dependant].dependencies == set():
-                for dept in self.categories[node.cat_dependant].dependants:
-                    self.nodes[dept].cat_dependencies.discard(node.cid)
-                del self.categories[node.cat_dependant]  # remove empty category
-        del self.nodes[tid]
-
-    def _filtered_ddm(
-        self, current_tid: int, filter: set[int], filter_cat: set[int]
-    ) -> set[int]:
-        """Filters the deep dependency map based on a set of todo IDs"""
-        filtered: set[int] = set()
-        current_ddm_deps = self.ddm.get_deps(current_tid)
-        category_deps = set[int]()
-        for filter_category in filter_cat:
-            category_deps.update(self.categories[filter_category].dependencies)
-        if not filter.intersection(current_ddm_deps) and not category_deps.intersection(
-            current_ddm_deps
-        ):
-            return self.ddm.get_deps(current_tid)
-        for dep in self.nodes[current_tid].dependencies:
-            if dep in filter:
+        Whatever a remaining todo reached through removed todos, or through a
+        category that loses exposed todos, becomes direct edges of that todo. A
+        category exposes the same-category todos its removed todos led to instead,
+        and is deleted once nothing is left to expose. The result matches removing
+        the todos one at a time, dependencies first, without spreading edges once
+        per todo.
+        """
+        removed = {tid for tid in tids if tid in self.nodes}
+        if not removed:
+            return
+        if self._ddm_live:
+            # Dependencies are spliced through, so ancestors only lose the removed todos
+            for ancestor in self._ancestors(*removed) - removed:
+                self.ddm.discard_deps(ancestor, removed)
+            for tid in removed:
+                self.ddm.remove_todo(tid)
+
+        # Categories losing exposed todos, and the todos they lose
+        exposing: dict[int, list[int]] = {}
+        for tid in removed:
+            cid = self.nodes[tid].cat_dependant
+            if cid is not None:
+                exposing.setdefault(cid, []).append(tid)
+
+        # What replaces each removed todo, and each category in exposing, for the
+        # todos that depend on it: (todos, categories)
+        replaced: dict[tuple[bool, int], tuple[set[int], set[int]]] = {}
+        exposed: dict[int, frozenset[int]] = {}
+
+        def inherit(todos: Iterable[int], cats: Iterable[int]):
+            out_todos: set[int] = set()
+            out_cats: set[int] = set()
+            for dep in todos:
+                if dep in removed:
+                    dep_todos, dep_cats = replaced[False, dep]
+                    out_todos |= dep_todos
+                    out_cats |= dep_cats
+                else:
+                    out_todos.add(dep)
+            for cid in cats:
+                if cid in exposing:
+                    dep_todos, dep_cats = replaced[True, cid]
+                    out_todos |= dep_todos
+                    out_cats |= dep_cats
+                else:
+                    out_cats.add(cid)
+            return out_todos, out_cats
+
+        def requires(key: tuple[bool, int]) -> list[tuple[bool, int]]:
+            is_category, key_id = key
+            if is_category:
+                return [(False, tid) for tid in exposing[key_id]]
+            node = self.nodes[key_id]
+            return [(False, dep) for dep in node.dependencies if dep in removed] + [
+                (True, cid) for cid in node.cat_dependencies if cid in exposing
+            ]
+
+        # Resolved dependencies first, as if removing the todos in that order
+        stack: list[tuple[tuple[bool, int], bool]] = [
+            ((False, tid), False) for tid in removed
+        ]
+        stack.extend(((True, cid), False) for cid in exposing)
+        while stack:
+            key, ready = stack.pop()
+            if key in replaced:
                 continue
-            filtered.update(
-                self._filtered_ddm(dep, set(), set())
-            )  # dont filter nodes above you
-            filtered.add(dep)
-        for cat_dep in self.nodes[current_tid].cat_dependencies:
-            if cat_dep in filter_cat:
+            if not ready:
+                stack.append((key, True))
+                stack.extend((dep, False) for dep in requires(key))
                 continue
-            filtered.update(self._filtered_ddm_category(cat_dep, set()))
-        return filtered
-
-    def _filtered_ddm_category(self, current_cid, filter_tid: set[int]) -> set[int]:
-        """Filters the deep dependency map based on a set of todo IDs"""
-        filtered: set[int] = set()
-        for tid in self.categories[current_cid].dependencies:
-            if tid in filter_tid:
+            is_category, key_id = key
+            if not is_category:
+                node = self.nodes[key_id]
+                replaced[key] = inherit(node.dependencies, node.cat_dependencies)
                 continue
-            filtered.update(self._filtered_ddm(tid, set(), set()))
-            filtered.add(tid)
-        return filtered
-
-    def _dedupe_category(self, cid: int):
-        """Remove dependency nodes that can be reached through other paths"""
-        node = self.categories[cid]
-        to_remove: set[int] = set()
-        category_deps = set[int]()
-        for cat_dep in node.dependencies:
-            category_deps.update(self.ddm.get_deps(cat_dep))
-            category_deps.add(cat_dep)
-        for dep in node.dependencies:
-            # Get filtered deep dependency map for this dependency
-            filtered_deps = self._filtered_ddm_category(cid, {dep})
-            if filtered_deps == category_deps:
-                to_remove.add(dep)
-        for rem in to_remove:
-            node.dependencies.remove(rem)
-            self.nodes[rem].cat_dependant = None
-        for dept in list(node.dependants):
-            self._dedupe_node(dept)
-
-    def _dedupe_node(self, tid: int):
-        """Remove dependency nodes that can be reached through other paths"""
-        node = self.nodes[tid]
-        to_remove: set[int] = set()
-        for dep in node.dependencies:
-            # Get filtered deep dependency map for this dependency
-            filtered_deps = self._filtered_ddm(tid, {dep}, set())
-            if filtered_deps == self.ddm.get_deps(tid):
-                to_remove.add(dep)
-        for rem in to_remove:
-            node.dependencies.remove(rem)
-            self.nodes[rem].dependants.remove(tid)
-
-        to_remove_cat: set[int] = set()
-        for cat_dep in node.cat_dependencies:
-            filtered_deps = self._filtered_ddm(tid, set(), {cat_dep})
-            if filtered_deps == self.ddm.get_deps(tid):
-                to_remove_cat.add(cat_dep)
-        for rem in to_remove_cat:
-            node.cat_dependencies.remove(rem)
-            self.categories[rem].dependants.remove(tid)
-
-        for dept in list(node.dependants):
-            self._dedupe_node(dept)
-        if node.cat_dependant is not None:
-            self._dedupe_category(node.cat_dependant)
+            # A category exposes the same-category todos its removed todos led to,
+            # and passes everything else on to its dependants
+            promoted: set[int] = set()
+            out_todos: set[int] = set()
+            out_cats: set[int] = set()
+            for tid in exposing[key_id]:
+                todos, cats = replaced[False, tid]
+                for dep in todos:
+                    if self.nodes[dep].cid == key_id:
+                        promoted.add(dep)
+                    else:
+                        out_todos.add(dep)
+                out_cats |= cats
+            exposed[key_id] = _frozen(
+                (self.categories[key_id].dependencies - removed) | promoted
+            )
+            if exposed[key_id]:
+                out_cats.add(key_id)  # the category itself stays
+            replaced[key] = (out_todos, out_cats)
+
+        # Rewire the remaining todos that depended on what changed
+        dependants: set[int] = set()
+        for tid in removed:
+            dependants |= self.nodes[tid].dependants
+        for cid in exposing:
+            dependants |= self.categories[cid].dependants
+        for tid in dependants - removed:
+            node = self._node(tid)
+            todos, cats = inherit(node.dependencies, node.cat_dependencies)
+            for dep in todos - node.dependencies:
+                dep_node = self._node(dep)
+                dep_node.dependants = dep_node.dependants | {tid}
+            for cid in cats - node.cat_dependencies:
+                category = self._category(cid)
+                category.dependants = category.dependants | {tid}
+            node.dependencies = _frozen(todos)
+            node.cat_dependencies = _frozen(cats)
+
+        # Forget the removed todos where they were dependants
+        trimmed: set[int] = set()
+        trimmed_cats: set[int] = set()
+        for tid in removed:
+            trimmed |= self.nodes[tid].dependencies
+            trimmed_cats |= self.nodes[tid].cat_dependencies
+        for tid in trimmed - removed:
+            node = self._node(tid)
+            node.dependants = _frozen(node.dependants - removed)
+        for cid in trimmed_cats:
+            if cid not in exposing or exposed[cid]:
+                category = self._category(cid)
+                category.dependants = _frozen(category.dependants - removed)
+        for cid, todos in exposed.items():
+            if not todos:
+                del self.categories[cid]  # remove empty category
+                self._owned_categories.discard(cid)
+                continue
+            for tid in todos - self.categories[cid].dependencies:
+                self._node(tid).cat_dependant = cid
+            self._category(cid).dependencies = todos
+        for tid in removed:
+            del self.nodes[tid]
+            self._owned_nodes.discard(tid)
+
+    def _topological_order(self) -> list[int]:
+        """Orders todos so each comes after everything it depends on, directly or
+        through a category"""
+        pending = {
+            tid: len(node.dependencies) + len(node.cat_dependencies)
+            for tid, node in self.nodes.items()
+        }
+        cat_pending = {
+            cid: len(cat.dependencies) for cid, cat in self.categories.items()
+        }
+        ready = [tid for tid, count in pending.items() if count == 0]
+
+        def release(tids: Iterable[int]):
+            for tid in tids:
+                pending[tid] -= 1
+                if pending[tid] == 0:
+                    ready.append(tid)
+
+        # Empty categories are satisfied from the start
+        for cid, count in cat_pending.items():
+            if count == 0:
+                release(self.categories[cid].dependants)
+
+        order: list[int] = []
+        while ready:
+            tid = ready.pop()
+            order.append(tid)
+            node = self.nodes[tid]
+            release(node.dependants)
+            if node.cat_dependant is not None:
+                cat_pending[node.cat_dependant] -= 1
+                if cat_pending[node.cat_dependant] == 0:
+                    release(self.categories[node.cat_dependant].dependants)
+        if len(order) != len(self.nodes):
+            raise DependencyCycleError(self._find_cycle(self.nodes.keys() - set(order)))
+        return order
+
+    def _find_cycle(self, stuck: set[int]) -> list[int]:
+        """
+        Finds a cycle among todos a topological sort could not place. Each of them
+        waits on another, so following dependencies must come back around.
+        """
+        path: list[int] = []
+        position: dict[int, int] = {}
+        tid = min(stuck)
+        while tid not in position:
+            position[tid] = len(path)
+            path.append(tid)
+            node = self.nodes[tid]
+            waiting = sorted(node.dependencies & stuck)
+            for cid in sorted(node.cat_dependencies):
+                waiting.extend(sorted(self.categories[cid].dependencies & stuck))
+            tid = waiting[0]
+        return path[position[tid] :]
+
+    def _reachability(
+        self, order: list[int]
+    ) -> tuple[dict[int, int], dict[int, int], dict[int, int]]:
+        """
+        Bitsets of what each todo and category reaches, with todos numbered by their
+        position in order: (bits, todo reach, category reach). A todo's reach is its
+        deep dependencies; a category's also includes its own todos.
+        """
+        bits = {tid: 1 << i for i, tid in enumerate(order)}
+        reach: dict[int, int] = {}
+        cat_reach = dict.fromkeys(self.categories, 0)
+        for tid in order:
+            node = self.nodes[tid]
+            mask = 0
+            for dep in node.dependencies:
+                mask |= reach[dep] | bits[dep]
+            for cid in node.cat_dependencies:
+                mask |= cat_reach[cid]
+            reach[tid] = mask
+            if node.cat_dependant is not None:
+                # Every todo a category exposes comes before its dependants
+                cat_reach[node.cat_dependant] |= mask | bits[tid]
+        return bits, reach, cat_reach
 
     def dedupe(self):
-        """remove dependency nodes that can be reached through other paths"""
-        if not self.ddm:
+        """remove dependency nodes that can be reached through other paths
+
+        This is a transitive reduction over todos and categories. An edge is
+        redundant when its target is reachable through the node's other edges, which
+        is a single bitset test once every node's reachability is known. Todo edges
+        are reduced first and category edges are judged against what remains, so a
+        category is kept over the direct edges it makes redundant. Only redundant
+        edges are removed, so the DDM is left unchanged.
+        """
+        if not self._ddm_live:
             self.build_ddm()
-        for root in self._find_root_tids():
-            self._dedupe_node(root)
-        self.build_ddm()
-
-    def copy(self) -> "Graph":
-        new_graph = Graph()
+        bits, reach, cat_reach = self._reachability(self._topological_order())
 
-        # Deep copy all category nodes
-        for cid, cat_node in self.categories.items():
-            new_graph.categories[cid] = CategoryNode(
-                cid=cat_node.cid,
-                dependencies=cat_node.dependencies.copy(),
-                dependants=cat_node.dependants.copy(),
-            )
+        for tid in list(self.nodes):
+            node = self.nodes[tid]
+            through = 0
+            for dep in node.dependencies:
+                through |= reach[dep]
+            for cid in node.cat_dependencies:
+                through |= cat_reach[cid]
+            redundant = [dep for dep in node.dependencies if through & bits[dep]]
+            if redundant:
+                node = self._node(tid)
+                node.dependencies = _frozen(node.dependencies.difference(redundant))
+            for dep in redundant:
+                dep_node = self._node(dep)
+                dep_node.dependants = _frozen(dep_node.dependants - {tid})
+
+            if not node.cat_dependencies:
+                continue
+            kept = 0
+            for dep in node.dependencies:
+                kept |= reach[dep] | bits[dep]
+            cids = list(node.cat_dependencies)
+            # others[i] is everything reachable without cids[i]
+            others = [kept] * len(cids)
+            acc = 0
+            for i, cid in enumerate(cids):
+                others[i] |= acc
+                acc |= cat_reach[cid]
+            acc = 0
+            for i in range(len(cids) - 1, -1, -1):
+                others[i] |= acc
+                acc |= cat_reach[cids[i]]
+            redundant_cids = [
+                cid for cid, other in zip(cids, others) if not cat_reach[cid] & ~other
+            ]
+            if redundant_cids:
+                node = self._node(tid)
+                node.cat_dependencies = _frozen(
+                    node.cat_dependencies.difference(redundant_cids)
+                )
+            for cid in redundant_cids:
+                category = self._category(cid)
+                category.dependants = _frozen(category.dependants - {tid})
+
+        # A category need not expose a todo that another of its todos reaches
+        for cid in list(self.categories):
+            category = self.categories[cid]
+            through = 0
+            for tid in category.dependencies:
+                through |= reach[tid]
+            redundant = [tid for tid in category.dependencies if through & bits[tid]]
+            if redundant:
+                category = self._category(cid)
+                category.dependencies = _frozen(
+                    category.dependencies.difference(redundant)
+                )
+            for tid in redundant:
+                self._node(tid).cat_dependant = None
 
-        # Deep copy all todo nodes
-        for tid, todo_node in self.nodes.items():
-            new_graph.nodes[tid] = TodoNode(
-                tid=todo_node.tid,
-                cid=todo_node.cid,
-                cat_dependencies=todo_node.cat_dependencies.copy(),
-                dependencies=todo_node.dependencies.copy(),
-                cat_dependant=todo_node.cat_dependant,
-                dependants=todo_node.dependants.copy(),
-            )
+    def copy(self) -> "Graph":
+        """Copy that shares its nodes and DDM sets with this graph
 
-        new_graph.build_ddm()
+        Only the id tables are copied. Either graph copies a node the first time it
+        changes it, so a derived graph costs memory in proportion to what it changes.
+        """
+        new_graph = Graph()
+        new_graph.nodes = self.nodes.copy()
+        new_graph.categories = self.categories.copy()
+        # Every node is now shared, so neither graph may change one in place
+        self._owned_nodes = set()
+        self._owned_categories = set()
+
+        if self._ddm_live:
+            new_graph.ddm = self.ddm.copy()
+            new_graph._ddm_live = True
+        else:
+            new_graph.build_ddm()
         return new_graph
 
     def validate(self) -> bool:
@@ -372,15 +754,40 @@ class Graph:
 
     def filter_out(self, tids: set[int]) -> "Graph":
         new_graph = self.copy()
-        for tid in tids:
-            new_graph.remove_node(tid)
+        new_graph.remove_nodes(tids)
         if not new_graph.validate():
             raise ValueError("Filtered graph is invalid after removing nodes")
-        new_graph.build_ddm()
         new_graph.dedupe()
         return new_graph
 
 
+def _day_offset(seconds: int | None) -> datetime.timedelta | None:
+    """Normalise a time dependency offset to a delta within a day"""
+    return None if seconds is None else datetime.timedelta(seconds=seconds % 86400)
+
+
+@dataclass(slots=True, frozen=True)
+class TimePlanEntry:
+    """Time dependencies of one todo, resolved to indexes and offsets"""
+
+    tid: int
+    start: datetime.timedelta | None  # offset from midnight
+    end: datetime.timedelta | None
+    events: tuple[
+        tuple[int, datetime.timedelta | None, datetime.timedelta | None], ...
+    ]  # (event, start, end)
+    computed: tuple[tuple[int, int, int], ...]  # (computed time, section, event)
+
+
+@dataclass(slots=True)
+class TimePlan:
+    """Compiled time dependencies; entries index into event_names/computed_times"""
+
+    event_names: list[str]
+    computed_times: list[ComputeTimeConfig]
+    entries: list[TimePlanEntry]
+
+
 class ComputedTime:
     def __init__(self, time_spaces: list[int], event_name: str):
         self.time_spaces = time_spaces
@@ -426,27 +833,67 @@ class ComputedTime:
 class DependencyManager:
     ONEOFF_START_ID = -1000  # Starting node id for one-off todos
     ONEOFF_END_ID = -1999  # Ending node id for one-off todos
+    SCOPE_CACHE_SIZE = 32  # Scoped subgraphs kept per full graph
 
     def __init__(self, config: AppConfig):
+        self.logger = structlog.stdlib.get_logger().bind(module="dep_manager")
         self.config = config
         self.full_graph = Graph()
+        self.full_bitset_ddm = BitsetDDM()
         self.todo_id_map: dict[str, int] = {}
         self.category_id_map: dict[str, int] = {}
         self.event_id_map: dict[str, int] = {}
+        self.time_plan = TimePlan(event_names=[], computed_times=[], entries=[])
+        # LRU of scoped subgraphs of full_graph, keyed by the excluded todo ids
+        self._scope_cache: OrderedDict[frozenset[int], Graph] = OrderedDict()
+        self._scope_lock = threading.Lock()
+        # Timeslots only change when an event fires or the day rolls over
+        self._events: dict[str, Event] = {}
+        self._timeslots: dict[int, Timeslot] = {}
+        self._timeslots_day: datetime.date | None = None
+        self._timeslot_lock = threading.Lock()
+
+    @staticmethod
+    def _snapshot_event(event: Event) -> Event:
+        """Detached copy of an event, safe to keep after its session closes"""
+        return Event(id=event.id, name=event.name, timestamp=event.timestamp)
+
+    def cached_timeslots(self) -> dict[int, Timeslot]:
+        """Timeslots for today from the last known events.
+
+        The table is recomputed after update_event, load_from_db or the first
+        call after midnight. It is shared, so callers must not mutate it.
+        """
+        today = datetime.date.today()
+        with self._timeslot_lock:
+            if self._timeslots_day != today:
+                self._timeslots = self.get_timeslots(list(self._events.values()))
+                self._timeslots_day = today
+            return self._timeslots
+
+    def update_event(self, event: Event):
+        """Record a triggered event and invalidate the cached timeslots"""
+        with self._timeslot_lock:
+            self._events[event.name] = self._snapshot_event(event)
+            self.event_id_map[event.name] = event.id
+            self._timeslots_day = None
+
+    def _compile_time_plan(self) -> "TimePlan":
+        """Resolve the config's time dependencies into a flat per-todo plan"""
+        plan = TimePlan(event_names=[], computed_times=[], entries=[])
+        event_index: dict[str, int] = {}
 
-    def get_timeslots(self, events: list[Event]):
-        computed_times: dict[str, ComputedTime] = {}
+        def resolve_event(name: str) -> int:
+            if name not in event_index:
+                event_index[name] = len(plan.event_names)
+                plan.event_names.append(name)
+            return event_index[name]
 
+        computed_index: dict[str, int] = {}
         for compute_time in self.config.computed_times:
-            try:
-                computed_times[compute_time.name] = ComputedTime.from_config(
-                    compute_time, {event.name: event for event in events}
-                )
-            except ValueError:
-                continue
+            computed_index[compute_time.name] = len(plan.computed_times)
+            plan.computed_times.append(compute_time)
 
-        todo_timeslot: dict[int, Timeslot] = {}
-        event_time_map = {event.name: event.timestamp for event in events}
         for category in self.config.categories:
             for todo in category.todos:
                 todo_id = self.todo_id_map.get(todo.title)
@@ -460,64 +907,111 @@ class DependencyManager:
                 ):
                     continue
 
-                now = datetime.datetime.now()
-                start_time = now.replace(hour=0, minute=0, second=0, microsecond=0)
-                time_slot_start = None
-                time_slot_end = None
-                if time_dep:
-                    if time_dep.start is not None:
-                        dep_start = start_time + datetime.timedelta(
-                            seconds=time_dep.start % 86400
-                        )
-                        if time_slot_start is None or dep_start > time_slot_start:
-                            time_slot_start = dep_start
-                    if time_dep.end is not None:
-                        dep_end = start_time + datetime.timedelta(
-                            seconds=time_dep.end % 86400
-                        )
-                        if time_slot_end is None or dep_end < time_slot_end:
-                            time_slot_end = dep_end
-
-                modified_events = todo.depends_on_events.copy()
+                # A computed time replaces any explicit dependency on its source
+                # event, the last one listed for an event wins
+                computed: dict[str, tuple[int, int, int]] = {}
                 for compute_dep in todo.depends_on_compute_times:
-                    compute_time = computed_times.get(compute_dep.name)
-                    if not compute_time:
-                        continue
-                    computed_minute = compute_time.get_time_for_index(compute_dep.index)
-
-                    modified_events[compute_time.event_name] = TimeDependency(
-                        start=computed_minute,
-                        end=None,
-                    )
-
-                for event_name, event_time_dep in modified_events.items():
-                    event_timestamp = event_time_map.get(event_name)
-                    if not event_timestamp:
+                    index = computed_index.get(compute_dep.name)
+                    if index is None:
                         continue
-
-                    if event_time_dep.start is not None:
-                        dep_start = event_timestamp + datetime.timedelta(
-                            seconds=event_time_dep.start % 86400
+                    compute_time = plan.computed_times[index]
+                    if not 0 <= compute_dep.index < compute_time.sections:
+                        # One bad config entry shouldn't take down every timeslot
+                        self.logger.warning(
+                            "Ignoring out of range computed time section",
+                            computed_time=compute_dep.name,
+                            index=compute_dep.index,
+                            todo=todo.title,
                         )
-                        if time_slot_start is None or dep_start > time_slot_start:
-                            time_slot_start = dep_start
+                        continue
+                    computed[compute_time.src_event] = (
+                        index,
+                        compute_dep.index,
+                        resolve_event(compute_time.src_event),
+                    )
 
-                    if event_time_dep.end is not None:
-                        dep_end = event_timestamp + datetime.timedelta(
-                            seconds=event_time_dep.end % 86400
-                        )
-                        if time_slot_end is None or dep_end < time_slot_end:
-                            time_slot_end = dep_end
+                plan.entries.append(
+                    TimePlanEntry(
+                        tid=todo_id,
+                        start=_day_offset(time_dep.start),
+                        end=_day_offset(time_dep.end),
+                        events=tuple(
+                            (
+                                resolve_event(event_name),
+                                _day_offset(event_dep.start),
+                                _day_offset(event_dep.end),
+                            )
+                            for event_name, event_dep in todo.depends_on_events.items()
+                            if event_name not in computed
+                        ),
+                        computed=tuple(computed.values()),
+                    )
+                )
+        return plan
+
+    def get_timeslots(self, events: list[Event]) -> dict[int, Timeslot]:
+        plan = self.time_plan
+        events_by_name = {event.name: event for event in events}
+        event_times = [
+            events_by_name[name].timestamp if name in events_by_name else None
+            for name in plan.event_names
+        ]
+        timedelta = datetime.timedelta
+        computed_offsets = [
+            [
+                timedelta(seconds=seconds % 86400)
+                for seconds in ComputedTime.from_config(
+                    compute_time, events_by_name
+                ).time_spaces
+            ]
+            if compute_time.src_event in events_by_name
+            else None
+            for compute_time in plan.computed_times
+        ]
+        start_of_day = datetime.datetime.now().replace(
+            hour=0, minute=0, second=0, microsecond=0
+        )
 
-                todo_timeslot[todo_id] = Timeslot(
+        todo_timeslot: dict[int, Timeslot] = {}
+        for entry in plan.entries:
+            time_slot_start = None
+            time_slot_end = None
+            if entry.start is not None:
+                time_slot_start = start_of_day + entry.start
+            if entry.end is not None:
+                time_slot_end = start_of_day + entry.end
+
+            for event_idx, dep_start, dep_end in entry.events:
+                event_timestamp = event_times[event_idx]
+                if event_timestamp is None:
+                    continue
+                if dep_start is not None:
+                    start = event_timestamp + dep_start
+                    if time_slot_start is None or start > time_slot_start:
+                        time_slot_start = start
+                if dep_end is not None:
+                    end = event_timestamp + dep_end
+                    if time_slot_end is None or end < time_slot_end:
+                        time_slot_end = end
+
+            for computed_idx, section, event_idx in entry.computed:
+                offsets = computed_offsets[computed_idx]
+                event_timestamp = event_times[event_idx]
+                if offsets is None or event_timestamp is None:
+                    continue
+                start = event_timestamp + offsets[section]
+                if time_slot_start is None or start > time_slot_start:
+                    time_slot_start = start
+
+            # Values are already datetimes, so skip pydantic validation
+            if time_slot_start and time_slot_end and time_slot_start >= time_slot_end:
+                todo_timeslot[entry.tid] = Timeslot.model_construct(
+                    start=None, end=None
+                )
+            else:
+                todo_timeslot[entry.tid] = Timeslot.model_construct(
                     start=time_slot_start, end=time_slot_end
                 )
-                if (
-                    time_slot_start
-                    and time_slot_end
-                    and time_slot_start >= time_slot_end
-                ):
-                    todo_timeslot[todo_id] = Timeslot(start=None, end=None)
 
         return todo_timeslot
 
@@ -561,18 +1055,52 @@ class DependencyManager:
             if dep_cat_id:
                 new_graph.add_cat_dep(self.ONEOFF_START_ID, dep_cat_id)
 
-        new_graph.build_ddm()
+        try:
+            new_graph.build_ddm()
+        except DependencyCycleError as e:
+            titles = {tid: title for title, tid in self.todo_id_map.items()}
+            titles[self.ONEOFF_START_ID] = "one-off todos"
+            raise e.with_titles(titles) from None
         new_graph.dedupe()
-        self.full_graph = new_graph
-
-    def scope_subgraph(self, excluded_tids: set[int]):
-        sub_graph = self.full_graph.filter_out(excluded_tids)
+        time_plan = self._compile_time_plan()
+        with self._scope_lock:
+            self.full_graph = new_graph
+            self.full_bitset_ddm = BitsetDDM.from_ddm(new_graph.ddm)
+            self._scope_cache.clear()
+        with self._timeslot_lock:
+            self.time_plan = time_plan
+            self._events = {event.name: self._snapshot_event(event) for event in events}
+            self._timeslots_day = None
+
+    def scope_subgraph(self, excluded_tids: set[int]) -> Graph:
+        """Returns the full graph with excluded_tids removed.
+
+        Results are cached per excluded set until the next load_from_db, so the
+        returned graph is shared and must not be mutated.
+        """
+        with self._scope_lock:
+            full_graph = self.full_graph
+            full_bitset_ddm = self.full_bitset_ddm
+            key = frozenset(tid for tid in excluded_tids if tid in full_graph.nodes)
+            cached = self._scope_cache.get(key)
+            if cached is not None:
+                self._scope_cache.move_to_end(key)
+                return cached
+
+        sub_graph = full_graph.filter_out(set(key))
         if sub_graph.validate() is False:
             raise ValueError("Scoped subgraph is invalid after filtering")
-        if sub_graph.ddm != self.full_graph.ddm.filter(excluded_tids):
+        sub_bitset_ddm = BitsetDDM.from_ddm(sub_graph.ddm, like=full_bitset_ddm)
+        if sub_bitset_ddm != full_bitset_ddm.filter(set(key)):
             raise ValueError(
                 "Scoped subgraph DDM does not match filtered full graph DDM"
             )
+
+        with self._scope_lock:
+            if self.full_graph is full_graph:  # not replaced while filtering
+                self._scope_cache[key] = sub_graph
+                while len(self._scope_cache) > self.SCOPE_CACHE_SIZE:
+                    self._scope_cache.popitem(last=False)
         return sub_graph
 
 
@@ -0,0 +1,121 @@
+"""Shared FastAPI dependencies for the API routers"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+from dep_manager import dep_man
+from fastapi import Depends, HTTPException, Request, Response
+from models import AsyncSessionLocal, SessionLocal
+from schemas import Timeslot
+from state_signals import state_signals
+from status_store import status_store
+
+
+class TimeslotContext:
+    """Todo timeslots computed once per request and evaluated at a fixed time"""
+
+    def __init__(self, timeslots: dict[int, Timeslot], now: datetime):
+        self.timeslots = timeslots
+        self.now = now
+
+    def get(self, tid: int) -> Timeslot | None:
+        return self.timeslots.get(tid)
+
+    def in_window(self, tid: int) -> bool:
+        """Check if the todo has no timeslot or the current time is within it."""
+        ts = self.timeslots.get(tid)
+        if not ts:
+            return True
+        if ts.start and self.now < ts.start:
+            return False
+        if ts.end and self.now > ts.end:
+            return False
+        return True
+
+    def window_epoch(self) -> str:
+        """Token that changes whenever any todo enters or leaves its window today"""
+        passed = 0
+        for ts in self.timeslots.values():
+            # Windows include their edges: todos enter at start and leave after end
+            if ts.start and ts.start <= self.now:
+                passed += 1
+            if ts.end and ts.end < self.now:
+                passed += 1
+        return f"{self.now.date().isoformat()}.{passed}"
+
+    def next_boundary(self) -> datetime:
+        """Earliest timeslot start or end after now, or the next midnight.
+
+        Timeslots are recomputed per day, so midnight is always a boundary.
+        """
+        boundary = self.now.replace(
+            hour=0, minute=0, second=0, microsecond=0
+        ) + timedelta(days=1)
+        for ts in self.timeslots.values():
+            for edge in (ts.start, ts.end):
+                if edge and self.now < edge < boundary:
+                    boundary = edge
+        return boundary
+
+
+def build_timeslot_context() -> TimeslotContext:
+    """Snapshot the cached timeslot table together with the current time"""
+    return TimeslotContext(dep_man.cached_timeslots(), datetime.now())
+
+
+def get_timeslot_context() -> TimeslotContext:
+    """Dependency for the request's timeslots, cached by FastAPI per request"""
+    return build_timeslot_context()
+
+
+def _conditional_get(request: Request, response: Response, tag: str):
+    etag = f'"{tag}"'
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        candidates = {
+            candidate.strip().removeprefix("W/")
+            for candidate in if_none_match.split(",")
+        }
+        if etag in candidates or "*" in candidates:
+            raise HTTPException(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    # Let browsers keep the body but revalidate it on every request
+    response.headers["Cache-Control"] = "no-cache"
+
+
+def state_etag(request: Request, response: Response):
+    """
+    Route dependency tagging the response with the state version, answering 304 when
+    the client already has it. List it in the route's dependencies so it runs before
+    any database work.
+    """
+    _conditional_get(request, response, state_signals.tag())
+
+
+def timed_state_etag(
+    request: Request,
+    response: Response,
+    timeslots: TimeslotContext = Depends(get_timeslot_context),
+):
+    """state_etag for responses that also change as todos enter or leave timeslots"""
+    _conditional_get(
+        request, response, f"{state_signals.tag()}-{timeslots.window_epoch()}"
+    )
+
+
+def get_synced_db():
+    """Database session that sees every status change accepted so far"""
+    status_store.flush()
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_synced_async_db():
+    """Async database session that sees every status change accepted so far"""
+    if status_store.pending:
+        await asyncio.to_thread(status_store.flush)
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -4,12 +4,26 @@ from contextlib import asynccontextmanager
 from typing import Any
 
 import structlog
-from api import categories, dependencies, events, oneoffs, reports, reset, todos
+from api import (
+    categories,
+    dependencies,
+    events,
+    oneoffs,
+    reports,
+    reset,
+    stream,
+    sync,
+    todos,
+)
 from db_init import initialize_database
 from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
+from models import async_engine
 from notifier_service import notifier
+from status_store import status_store
+from stream_service import live_stream
+from webhooks import webhooks
 
 # Configure logging
 log_level = os.environ.get("LOG_LEVEL", "INFO").upper()
@@ -58,14 +72,19 @@ async def lifespan(app: FastAPI):
     """Manage application lifespan - startup and shutdown."""
     # Startup
     initialize_database()
+    status_store.start()
+    webhooks.start()
 
     # Start the notifier service in the background
     notifier_task = asyncio.create_task(notifier.run())
     logger.info("Background notifier service started")
+    stream_task = asyncio.create_task(live_stream.run())
 
     yield
 
     # Shutdown
+    live_stream.stop()
+    await asyncio.gather(stream_task, return_exceptions=True)
     notifier.stop()
     notifier_task.cancel()
     try:
@@ -73,6 +92,9 @@ async def lifespan(app: FastAPI):
     except asyncio.CancelledError:
         pass
     logger.info("Background notifier service stopped")
+    await webhooks.stop()
+    await status_store.stop()
+    await async_engine.dispose()
 
 
 # Create FastAPI app with lifespan
@@ -100,6 +122,8 @@ api.include_router(dependencies.router, prefix="/api", tags=["dependencies"])
 api.include_router(reports.router, prefix="/api", tags=["reports"])
 api.include_router(reset.router, prefix="/api", tags=["reset"])
 api.include_router(events.router, prefix="/api", tags=["events"])
+api.include_router(stream.router, prefix="/api", tags=["stream"])
+api.include_router(sync.router, prefix="/api", tags=["sync"])
 
 
 @api.get("/api/health")
@@ -6,15 +6,24 @@ from datetime import datetime, timezone
 
 from sqlalchemy import (
     DateTime,
+    Engine,
     Float,
     ForeignKey,
+    Index,
     Integer,
     String,
+    UniqueConstraint,
     create_engine,
+    event,
 )
 from sqlalchemy import (
     Enum as SAEnum,
 )
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.orm import (
     DeclarativeBase,
     Mapped,
@@ -125,7 +134,7 @@ class Report(Base):
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     created_at: Mapped[datetime] = mapped_column(
-        DateTime, nullable=False, default=datetime.now(tz=timezone.utc)
+        DateTime, nullable=False, default=datetime.now(tz=timezone.utc), index=True
     )
     total_todos: Mapped[int] = mapped_column(Integer, nullable=False)
     completed_todos: Mapped[int] = mapped_column(Integer, nullable=False)
@@ -145,10 +154,13 @@ class TaskReport(Base):
     """
 
     __tablename__ = "task_reports"
+    __table_args__ = (
+        Index("ix_task_reports_title_category", "todo_title", "category_name"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     report_id: Mapped[int] = mapped_column(
-        ForeignKey("reports.id", ondelete="CASCADE"), nullable=False
+        ForeignKey("reports.id", ondelete="CASCADE"), nullable=False, index=True
     )
     todo_id: Mapped[int] = mapped_column(
         Integer, nullable=False
@@ -168,6 +180,79 @@ class TaskReport(Base):
     report: Mapped["Report"] = relationship(back_populates="task_reports")
 
 
+class RollupPeriod(enum.Enum):
+    """Bucket sizes for the statistics rollups"""
+
+    day = "day"
+    week = "week"  # starting Monday
+    month = "month"
+
+
+class TaskStatRollup(Base):
+    """Task report counts per (todo title, category) for one day, week or month.
+
+    Maintained at reset time so statistics don't need to scan every task report.
+    """
+
+    __tablename__ = "task_stat_rollups"
+    __table_args__ = (
+        UniqueConstraint("period", "period_start", "todo_title", "category_name"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    period: Mapped[RollupPeriod] = mapped_column(SAEnum(RollupPeriod), nullable=False)
+    period_start: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    todo_title: Mapped[str] = mapped_column(String, nullable=False)
+    category_name: Mapped[str] = mapped_column(String, nullable=False)
+    todo_id: Mapped[int] = mapped_column(Integer, nullable=False)  # Latest seen
+
+    appearances: Mapped[int] = mapped_column(Integer, nullable=False)
+    times_completed: Mapped[int] = mapped_column(Integer, nullable=False)
+    times_skipped: Mapped[int] = mapped_column(Integer, nullable=False)
+    times_incomplete: Mapped[int] = mapped_column(Integer, nullable=False)
+    # Sum and count of the non-zero in-progress durations
+    in_progress_seconds: Mapped[float] = mapped_column(Float, nullable=False)
+    in_progress_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    last_seen: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+
+class ReportRollup(Base):
+    """Number of reports per day, week or month"""
+
+    __tablename__ = "report_rollups"
+    __table_args__ = (UniqueConstraint("period", "period_start"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    period: Mapped[RollupPeriod] = mapped_column(SAEnum(RollupPeriod), nullable=False)
+    period_start: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    report_count: Mapped[int] = mapped_column(Integer, nullable=False)
+
+
+class ChangeEntity(enum.Enum):
+    """Kinds of row recorded in the change log"""
+
+    category = "category"
+    todo = "todo"
+    oneoff = "oneoff"
+    event = "event"
+
+
+class ChangeLog(Base):
+    """A row that was created, updated or deleted, for delta sync.
+
+    The id doubles as the state version. AUTOINCREMENT keeps ids increasing even
+    after pruning, so a client's version never refers to a later change.
+    """
+
+    __tablename__ = "change_log"
+    __table_args__ = ({"sqlite_autoincrement": True},)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    entity: Mapped[ChangeEntity] = mapped_column(SAEnum(ChangeEntity), nullable=False)
+    entity_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    changed_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
+
+
 # Database setup
 # Use correct SQLite URL formats:
 # - Relative path: sqlite:///./file.db
@@ -177,11 +262,69 @@ if environment == "dev":
 else:
     SQLALCHEMY_DATABASE_URL = "sqlite:////app/data/taskin.db"
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
+# SQLite tuning, overridable through the environment. WAL lets the UI keep reading
+# while status writes and resets commit, and synchronous=NORMAL is durable in WAL mode
+# apart from the last transactions before a power loss.
+DB_JOURNAL_MODE = os.environ.get("DB_JOURNAL_MODE", "WAL")
+DB_SYNCHRONOUS = os.environ.get("DB_SYNCHRONOUS", "NORMAL")
+DB_CACHE_SIZE_KB = int(os.environ.get("DB_CACHE_SIZE_KB", "16384"))
+DB_MMAP_SIZE = int(os.environ.get("DB_MMAP_SIZE", str(64 * 1024 * 1024)))
+DB_BUSY_TIMEOUT_MS = int(os.environ.get("DB_BUSY_TIMEOUT_MS", "5000"))
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", "10"))
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"PRAGMA journal_mode={DB_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous={DB_SYNCHRONOUS}")
+        # Negative sizes are in KiB rather than pages
+        cursor.execute(f"PRAGMA cache_size=-{DB_CACHE_SIZE_KB}")
+        cursor.execute(f"PRAGMA mmap_size={DB_MMAP_SIZE}")
+        cursor.execute(f"PRAGMA busy_timeout={DB_BUSY_TIMEOUT_MS}")
+    finally:
+        cursor.close()
+
+
+def _engine_options() -> dict:
+    return {
+        "connect_args": {
+            "check_same_thread": False,
+            "timeout": DB_BUSY_TIMEOUT_MS / 1000,
+        },
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_pre_ping": True,
+    }
+
+
+def create_sqlite_engine(url: str) -> Engine:
+    """Create a pooled engine that applies the DB_* pragmas to every connection"""
+    new_engine = create_engine(url, **_engine_options())
+    event.listen(new_engine, "connect", _set_sqlite_pragmas)
+    return new_engine
+
+
+def create_async_sqlite_engine(url: str) -> AsyncEngine:
+    """Async (aiosqlite) counterpart of create_sqlite_engine for the same database"""
+    new_engine = create_async_engine(
+        url.replace("sqlite://", "sqlite+aiosqlite://", 1), **_engine_options()
+    )
+    event.listen(new_engine.sync_engine, "connect", _set_sqlite_pragmas)
+    return new_engine
+
+
+engine = create_sqlite_engine(SQLALCHEMY_DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async sessions for the endpoints polled by the UI. Objects stay loaded after commit
+# because attributes cannot be lazily refreshed outside of an await.
+async_engine = create_async_sqlite_engine(SQLALCHEMY_DATABASE_URL)
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, autoflush=False, expire_on_commit=False
+)
+
 
 def get_db():
     """Dependency for getting database session"""
@@ -192,6 +335,12 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    """Dependency for getting an async database session"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 def init_db():
     """Initialize database tables"""
     Base.metadata.create_all(bind=engine)
@@ -1,21 +1,27 @@
 """
 Background notifier service that monitors recommended todos and sends webhook notifications
 when the recommended list changes despite task statuses remaining unchanged.
+
+The service is driven by state change signals from the API and by timers set for the
+next timeslot boundary, so it does no database work while nothing changes.
 """
 
 import asyncio
-import hashlib
-import json
-import time
+import threading
+from datetime import datetime
 from typing import Set
 
-import requests
 import structlog
 from api.todos import get_recommended_todos
 from config_loader import CONFIG
-from models import Todo, get_db
+from deps import build_timeslot_context
 from pydantic import HttpUrl
-from sqlalchemy.orm import Session
+from state_signals import StateChange, state_signals
+from webhooks import webhooks
+
+# Changes that alter task statuses or the todos themselves; they move the baseline
+# instead of notifying
+STATUS_CHANGES = frozenset({StateChange.status, StateChange.reset, StateChange.config})
 
 
 class RecommendedTodosNotifier:
@@ -24,29 +30,24 @@ class RecommendedTodosNotifier:
     without task statuses changing.
     """
 
-    def __init__(self, webhook_url: HttpUrl | None, check_interval: int = 1):
+    def __init__(self, webhook_url: HttpUrl | None):
         self.logger = structlog.stdlib.get_logger().bind(module="notifier_service")
         self.webhook_url = str(webhook_url) if webhook_url else None
-        self.check_interval = check_interval
-        self.last_task_states_hash: str | None = None
         self.last_recommended_todo_ids: Set[int] | None = None
         self.running = False
+        self._pending: set[StateChange] = set()
+        self._pending_lock = threading.Lock()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._wakeup: asyncio.Event | None = None
 
-    def _compute_task_states_hash(self, db: Session) -> str:
-        """
-        Compute a hash of all task statuses to detect when any task status changes.
-        """
-        todos = db.query(Todo).order_by(Todo.id).all()
-        state_data = [(todo.id, todo.status.value) for todo in todos]
-        state_json = json.dumps(state_data, sort_keys=True)
-        return hashlib.sha256(state_json.encode()).hexdigest()
-
-    def _get_recommended_todo_ids(self, db: Session) -> Set[int]:
+    async def _get_recommended_todo_ids(self) -> Set[int]:
         """
         Get the set of currently recommended todo IDs.
         """
         try:
-            recommended = get_recommended_todos(db=db)
+            recommended = await get_recommended_todos(
+                timeslots=build_timeslot_context()
+            )
             return {todo.id for todo in recommended}
         except Exception as e:
             self.logger.error("Failed to get recommended todos", error=str(e))
@@ -54,58 +55,45 @@ class RecommendedTodosNotifier:
 
     def _send_webhook_notification(self):
         """
-        Send a webhook notification about the recommended todos change.
+        Queue a webhook notification about the recommended todos change.
         """
         self.logger.info("Recommended list changed, sending notification")
-        payload = {"event": "recommended_todos_changed"}
-
-        try:
-            if self.webhook_url:
-                response = requests.post(
-                    self.webhook_url,
-                    json=payload,
-                    headers={"Content-Type": "application/json"},
-                    timeout=10,
-                )
-                response.raise_for_status()
-
-        except requests.exceptions.RequestException as e:
-            self.logger.error(
-                "Failed to send webhook notification",
-                error=str(e),
-                webhook_url=self.webhook_url,
-            )
+        if self.webhook_url:
+            webhooks.send(self.webhook_url, {"event": "recommended_todos_changed"})
 
-    async def check_and_notify(self):
+    def on_state_change(self, change: StateChange):
         """
-        Check if recommended todos changed without task statuses changing,
-        and send a notification if so.
+        Record a state change and wake the service. Called from request threads.
+        """
+        with self._pending_lock:
+            self._pending.add(change)
+        loop, wakeup = self._loop, self._wakeup
+        if loop is not None and wakeup is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(wakeup.set)
+
+    def _take_pending(self) -> set[StateChange]:
+        with self._pending_lock:
+            pending, self._pending = self._pending, set()
+        return pending
+
+    async def check_and_notify(self, changes: set[StateChange]):
+        """
+        Recompute the recommended todos after a state change or timeslot boundary,
+        and send a notification if they changed without task statuses changing.
         """
-        db = next(get_db())
         try:
-            # Compute current task states hash
-            current_task_states_hash = self._compute_task_states_hash(db)
-
-            # Get current recommended todo IDs
-            current_recommended_todo_ids = self._get_recommended_todo_ids(db)
+            current_recommended_todo_ids = await self._get_recommended_todo_ids()
 
             # Check if this is the first run
-            if self.last_task_states_hash is None:
+            if self.last_recommended_todo_ids is None:
                 self.logger.info(
                     "Initial check - establishing baseline",
-                    task_states_hash=current_task_states_hash,
                     recommended_count=len(current_recommended_todo_ids),
                 )
-                self.last_task_states_hash = current_task_states_hash
                 self.last_recommended_todo_ids = current_recommended_todo_ids
                 return
 
-            # Check if task statuses changed
-            task_statuses_changed = (
-                current_task_states_hash != self.last_task_states_hash
-            )
-
-            # Check if recommended todos changed
+            task_statuses_changed = bool(changes & STATUS_CHANGES)
             recommended_changed = (
                 current_recommended_todo_ids != self.last_recommended_todo_ids
             )
@@ -114,37 +102,59 @@ class RecommendedTodosNotifier:
                 self._send_webhook_notification()
 
             # Update state for next check
-            self.last_task_states_hash = current_task_states_hash
             self.last_recommended_todo_ids = current_recommended_todo_ids
 
         except Exception as e:
             self.logger.error(
                 "Error during check_and_notify", error=str(e), exc_info=True
             )
-        finally:
-            db.close()
+
+    def _seconds_to_next_boundary(self) -> float:
+        try:
+            boundary = build_timeslot_context().next_boundary()
+        except Exception as e:
+            self.logger.error("Failed to compute next timeslot boundary", error=str(e))
+            return 60.0
+        # Wake just after the edge so the timeslot comparison has flipped
+        return max((boundary - datetime.now()).total_seconds(), 0) + 0.001
 
     async def run(self):
         """
-        Main loop - check and notify every check_interval seconds.
+        Main loop - sleep until a state change is signalled or the next timeslot
+        boundary passes, then check and notify.
         """
         self.running = True
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        state_signals.subscribe(self.on_state_change)
         self.logger.info(
             "Starting notifier service",
-            check_interval=self.check_interval,
             webhook_url=self.webhook_url or "Not configured",
         )
-        last_run = time.time()
-        while self.running:
-            await asyncio.sleep(1)
-            if self.check_interval < time.time() - last_run:
-                await self.check_and_notify()
-                last_run = time.time()
+        try:
+            await self.check_and_notify(self._take_pending())
+            while self.running:
+                timeout = self._seconds_to_next_boundary()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                if not self.running:
+                    break
+                await self.check_and_notify(self._take_pending())
+        finally:
+            state_signals.unsubscribe(self.on_state_change)
+            self._loop = None
+            self._wakeup = None
 
     def stop(self):
         """Stop the notifier service."""
         self.logger.info("Stopping notifier service")
         self.running = False
+        loop, wakeup = self._loop, self._wakeup
+        if loop is not None and wakeup is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(wakeup.set)
 
 
 # Global notifier instance
@@ -0,0 +1,158 @@
+"""
+Incrementally maintained set of recommended todos.
+
+A todo is blocking while it is open and inside its timeslot window; the one-off node is
+blocking while any one-off is open. Every todo keeps a count of the blocking todos in
+its deep dependencies, and it is ready when it is blocking itself with a count of zero.
+When a todo starts or stops blocking, only the todos that depend on it are touched.
+"""
+
+from collections.abc import Iterable
+from datetime import datetime
+from typing import Protocol
+
+from dep_manager import DependencyManager, Graph
+from schemas import Timeslot
+
+
+class Timeslots(Protocol):
+    """The parts of deps.TimeslotContext the engine evaluates windows with"""
+
+    timeslots: dict[int, Timeslot]
+    now: datetime
+
+    def in_window(self, tid: int) -> bool: ...
+
+
+class ReadinessEngine:
+    """
+    Ready todos, kept up to date from status changes and timeslot windows.
+
+    Not thread safe; the status store calls it under its own lock.
+    """
+
+    def __init__(self, oneoff_node: int = DependencyManager.ONEOFF_START_ID):
+        self.oneoff_node = oneoff_node
+        self.graph: Graph | None = None
+        self.ready: set[int] = set()
+        # Todos whose deep dependencies include the key, from the graph's DDM
+        self._dependants: dict[int, list[int]] = {}
+        self._blocked_by: dict[int, int] = {}
+        self._blocking: set[int] = set()
+        self._open: set[int] = set()
+        self._oneoffs_open = False
+        self._out_of_window: set[int] = set()
+        # Table the windows were last evaluated against
+        self._timeslots: dict[int, Timeslot] = {}
+        self._boundary: datetime | None = None
+
+    # State from the status store
+
+    def reset(self, open_tids: Iterable[int], oneoffs_open: bool):
+        """Start over from a full set of open todos, rebuilding on the next sync"""
+        self._open = set(open_tids)
+        self._oneoffs_open = oneoffs_open
+        self.graph = None
+
+    def set_open(self, tid: int, is_open: bool):
+        if is_open:
+            self._open.add(tid)
+        else:
+            self._open.discard(tid)
+        self._update(tid)
+
+    def set_oneoffs_open(self, is_open: bool):
+        self._oneoffs_open = is_open
+        self._update(self.oneoff_node)
+
+    # Graph and time
+
+    def sync(self, graph: Graph, timeslots: Timeslots):
+        """
+        Catch up with a reloaded dependency graph, a new timeslot table (an event fired
+        or the day rolled over) or a timeslot boundary passing since the last sync.
+        """
+        if graph is not self.graph:
+            self._rebuild(graph, timeslots)
+            return
+        boundary = self._boundary
+        if timeslots.timeslots is not self._timeslots or (
+            boundary is not None and timeslots.now >= boundary
+        ):
+            changed = self._timeslots.keys() | timeslots.timeslots.keys()
+            self._set_windows(timeslots, changed)
+            for tid in changed:
+                self._update(tid)
+
+    def _rebuild(self, graph: Graph, timeslots: Timeslots):
+        self.graph = graph
+        self._dependants = {}
+        for tid, deps in graph.ddm.ddm.items():
+            for dep in deps:
+                self._dependants.setdefault(dep, []).append(tid)
+        self._out_of_window = set()
+        self._set_windows(timeslots, timeslots.timeslots.keys())
+        self._blocking = {tid for tid in self._open if self._is_blocking(tid)}
+        if self._is_blocking(self.oneoff_node):
+            self._blocking.add(self.oneoff_node)
+        self._blocked_by = {
+            tid: len(deps & self._blocking) for tid, deps in graph.ddm.ddm.items()
+        }
+        self.ready = {tid for tid in self._blocking if self._is_ready(tid)}
+
+    def _set_windows(self, timeslots: Timeslots, tids: Iterable[int]):
+        """Re-evaluate the windows of tids and find the next edge to watch for"""
+        for tid in tids:
+            if timeslots.in_window(tid):
+                self._out_of_window.discard(tid)
+            else:
+                self._out_of_window.add(tid)
+        self._timeslots = timeslots.timeslots
+        # Windows are inclusive, so an edge at now can still change on a later sync
+        now = timeslots.now
+        edges = [
+            edge
+            for ts in timeslots.timeslots.values()
+            for edge in (ts.start, ts.end)
+            if edge and edge >= now
+        ]
+        self._boundary = min(edges, default=None)
+
+    # Counters
+
+    def _is_blocking(self, tid: int) -> bool:
+        if tid == self.oneoff_node:
+            return self._oneoffs_open
+        return tid in self._open and tid not in self._out_of_window
+
+    def _is_ready(self, tid: int) -> bool:
+        return (
+            tid != self.oneoff_node
+            and tid in self._blocking
+            and not self._blocked_by.get(tid, 0)
+        )
+
+    def _update(self, tid: int):
+        """Apply a change in whether tid is blocking to tid and its dependants"""
+        if self.graph is None:
+            return  # counted from scratch on the next sync
+        blocking = self._is_blocking(tid)
+        if blocking == (tid in self._blocking):
+            return
+        if blocking:
+            self._blocking.add(tid)
+            step = 1
+        else:
+            self._blocking.discard(tid)
+            step = -1
+        for dependant in self._dependants.get(tid, ()):
+            count = self._blocked_by.get(dependant, 0) + step
+            self._blocked_by[dependant] = count
+            self._mark(dependant)
+        self._mark(tid)
+
+    def _mark(self, tid: int):
+        if self._is_ready(tid):
+            self.ready.add(tid)
+        else:
+            self.ready.discard(tid)
@@ -0,0 +1,326 @@
+"""
+Statistics rollups.
+
+Every reset adds its task reports to per-day, per-week and per-month aggregates, so a
+statistics query covers the whole days, weeks and months in its range with a handful
+of rollup rows and only scans raw task reports for the partial days at either end.
+"""
+
+from datetime import datetime, timedelta
+
+from models import (
+    Report,
+    ReportRollup,
+    RollupPeriod,
+    TaskReport,
+    TaskStatRollup,
+    TaskStatus,
+)
+from schemas import AggregatedStatistics, TaskStatistics
+from sqlalchemy import (
+    DateTime,
+    Float,
+    and_,
+    case,
+    cast,
+    false,
+    func,
+    literal,
+    or_,
+    select,
+    union_all,
+)
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+# Columns shared by rollup rows and the raw task report aggregate, in select order
+STAT_COLUMNS = (
+    "todo_id",
+    "appearances",
+    "times_completed",
+    "times_skipped",
+    "times_incomplete",
+    "in_progress_seconds",
+    "in_progress_count",
+    "last_seen",
+)
+
+
+def period_start(period: RollupPeriod, moment: datetime) -> datetime:
+    """Start of the period containing moment"""
+    day = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    if period == RollupPeriod.day:
+        return day
+    if period == RollupPeriod.week:
+        return day - timedelta(days=day.weekday())
+    return day.replace(day=1)
+
+
+def period_end(period: RollupPeriod, start: datetime) -> datetime:
+    """Start of the period following the one starting at start"""
+    if period == RollupPeriod.day:
+        return start + timedelta(days=1)
+    if period == RollupPeriod.week:
+        return start + timedelta(days=7)
+    if start.month == 12:
+        return start.replace(year=start.year + 1, month=1)
+    return start.replace(month=start.month + 1)
+
+
+def _task_report_aggregates():
+    """Aggregate columns over TaskReport matching STAT_COLUMNS"""
+    used = TaskReport.in_progress_duration_seconds > 0
+    return (
+        func.max(TaskReport.todo_id),
+        func.count(),
+        func.count().filter(TaskReport.final_status == TaskStatus.complete),
+        func.count().filter(TaskReport.final_status == TaskStatus.skipped),
+        func.count().filter(
+            TaskReport.final_status.not_in([TaskStatus.complete, TaskStatus.skipped])
+        ),
+        func.coalesce(
+            func.sum(TaskReport.in_progress_duration_seconds).filter(used), 0
+        ),
+        func.count().filter(used),
+    )
+
+
+def record_report(db: Session, report: Report):
+    """Add a report and its task reports to every rollup. The caller commits."""
+    for period in RollupPeriod:
+        start = period_start(period, report.created_at)
+
+        report_stmt = insert(ReportRollup).values(
+            period=period, period_start=start, report_count=1
+        )
+        db.execute(
+            report_stmt.on_conflict_do_update(
+                index_elements=["period", "period_start"],
+                set_={"report_count": ReportRollup.report_count + 1},
+            )
+        )
+
+        task_stmt = insert(TaskStatRollup).from_select(
+            ["period", "period_start", "todo_title", "category_name", *STAT_COLUMNS],
+            select(
+                literal(period, TaskStatRollup.period.type),
+                literal(start, DateTime),
+                TaskReport.todo_title,
+                TaskReport.category_name,
+                *_task_report_aggregates(),
+                literal(report.created_at, DateTime),
+            )
+            .where(TaskReport.report_id == report.id)
+            .group_by(TaskReport.todo_title, TaskReport.category_name),
+        )
+        excluded = task_stmt.excluded
+        db.execute(
+            task_stmt.on_conflict_do_update(
+                index_elements=[
+                    "period",
+                    "period_start",
+                    "todo_title",
+                    "category_name",
+                ],
+                set_={
+                    "todo_id": excluded.todo_id,
+                    "appearances": TaskStatRollup.appearances + excluded.appearances,
+                    "times_completed": TaskStatRollup.times_completed
+                    + excluded.times_completed,
+                    "times_skipped": TaskStatRollup.times_skipped
+                    + excluded.times_skipped,
+                    "times_incomplete": TaskStatRollup.times_incomplete
+                    + excluded.times_incomplete,
+                    "in_progress_seconds": TaskStatRollup.in_progress_seconds
+                    + excluded.in_progress_seconds,
+                    "in_progress_count": TaskStatRollup.in_progress_count
+                    + excluded.in_progress_count,
+                    "last_seen": func.max(TaskStatRollup.last_seen, excluded.last_seen),
+                },
+            )
+        )
+
+
+def _local_naive(moment: datetime) -> datetime:
+    if moment.tzinfo is None:
+        return moment
+    return moment.astimezone().replace(tzinfo=None)
+
+
+def split_range(
+    start: datetime, end: datetime
+) -> tuple[list[tuple[RollupPeriod, datetime]], list[tuple[datetime, datetime]]]:
+    """
+    Cover the half-open range [start, end) with whole rollup periods: months where
+    they fit, otherwise weeks and days, stopping short of the next month if that
+    month fits so the bucket count stays bounded by the number of months.
+
+    Returns the rollup buckets and the half-open raw ranges left at either end.
+    """
+    first_day = period_start(RollupPeriod.day, start)
+    if first_day < start:
+        first_day += timedelta(days=1)
+    last_day = period_start(RollupPeriod.day, end)
+    if last_day <= first_day:
+        return [], [(start, end)] if start < end else []
+
+    buckets: list[tuple[RollupPeriod, datetime]] = []
+    cursor = first_day
+    while cursor < last_day:
+        month_start = period_start(RollupPeriod.month, cursor)
+        month_end = period_end(RollupPeriod.month, month_start)
+        if month_start == cursor and month_end <= last_day:
+            period = RollupPeriod.month
+        else:
+            limit = last_day
+            if period_end(RollupPeriod.month, month_end) <= last_day:
+                limit = month_end
+            week_end = period_end(RollupPeriod.week, cursor)
+            if period_start(RollupPeriod.week, cursor) == cursor and week_end <= limit:
+                period = RollupPeriod.week
+            else:
+                period = RollupPeriod.day
+        buckets.append((period, cursor))
+        cursor = period_end(period, cursor)
+
+    raw = [(lo, hi) for lo, hi in ((start, first_day), (last_day, end)) if lo < hi]
+    return buckets, raw
+
+
+def _bucket_filter(model, buckets: list[tuple[RollupPeriod, datetime]]):
+    by_period: dict[RollupPeriod, list[datetime]] = {}
+    for period, start in buckets:
+        by_period.setdefault(period, []).append(start)
+    return or_(
+        false(),
+        *(
+            and_(model.period == period, model.period_start.in_(starts))
+            for period, starts in by_period.items()
+        ),
+    )
+
+
+def _raw_filter(raw: list[tuple[datetime, datetime]]):
+    return or_(
+        false(),
+        *(and_(Report.created_at >= lo, Report.created_at < hi) for lo, hi in raw),
+    )
+
+
+def _stat_rows(
+    buckets: list[tuple[RollupPeriod, datetime]], raw: list[tuple[datetime, datetime]]
+):
+    """Rollup rows and raw task report rows in one shape, ready to be summed"""
+    used = TaskReport.in_progress_duration_seconds > 0
+    rollup_rows = select(
+        TaskStatRollup.todo_title,
+        TaskStatRollup.category_name,
+        TaskStatRollup.todo_id,
+        TaskStatRollup.appearances,
+        TaskStatRollup.times_completed,
+        TaskStatRollup.times_skipped,
+        TaskStatRollup.times_incomplete,
+        TaskStatRollup.in_progress_seconds,
+        TaskStatRollup.in_progress_count,
+        TaskStatRollup.last_seen,
+    ).where(_bucket_filter(TaskStatRollup, buckets))
+    raw_rows = (
+        select(
+            TaskReport.todo_title,
+            TaskReport.category_name,
+            TaskReport.todo_id,
+            literal(1),
+            case((TaskReport.final_status == TaskStatus.complete, 1), else_=0),
+            case((TaskReport.final_status == TaskStatus.skipped, 1), else_=0),
+            case(
+                (
+                    TaskReport.final_status.in_(
+                        [TaskStatus.complete, TaskStatus.skipped]
+                    ),
+                    0,
+                ),
+                else_=1,
+            ),
+            case((used, TaskReport.in_progress_duration_seconds), else_=0.0),
+            case((used, 1), else_=0),
+            Report.created_at,
+        )
+        .join(Report, TaskReport.report_id == Report.id)
+        .where(_raw_filter(raw))
+    )
+    return union_all(rollup_rows, raw_rows).subquery()
+
+
+def aggregate_statistics(
+    db: Session,
+    buckets: list[tuple[RollupPeriod, datetime]],
+    raw: list[tuple[datetime, datetime]],
+) -> AggregatedStatistics:
+    """
+    Aggregate statistics over the given rollup buckets plus the reports created in
+    the raw ranges, in one grouped query.
+    """
+    rows = _stat_rows(buckets, raw)
+    appearances = func.sum(rows.c.appearances)
+    completed = func.sum(rows.c.times_completed)
+    skipped = func.sum(rows.c.times_skipped)
+    seconds = func.sum(rows.c.in_progress_seconds)
+    used = func.sum(rows.c.in_progress_count)
+    completion_rate = cast(completed, Float) / appearances
+    result = db.execute(
+        select(
+            func.max(rows.c.todo_id).label("todo_id"),
+            rows.c.todo_title,
+            rows.c.category_name,
+            completion_rate.label("completion_rate"),
+            (cast(skipped, Float) / appearances).label("skip_rate"),
+            (seconds / case((used > 0, used), else_=1)).label(
+                "avg_in_progress_duration_seconds"
+            ),
+            appearances.label("total_appearances"),
+            completed.label("times_completed"),
+            skipped.label("times_skipped"),
+            func.sum(rows.c.times_incomplete).label("times_incomplete"),
+            seconds.label("tot_in_progress_duration_seconds"),
+        )
+        .group_by(rows.c.todo_title, rows.c.category_name)
+        # Completion rate descending, most recently seen first among ties
+        .order_by(
+            completion_rate.desc(),
+            func.max(rows.c.last_seen).desc(),
+            func.max(rows.c.todo_id),
+        )
+    )
+    task_statistics = [TaskStatistics(**row._mapping) for row in result]
+
+    report_count = select(
+        func.coalesce(
+            select(func.sum(ReportRollup.report_count))
+            .where(_bucket_filter(ReportRollup, buckets))
+            .scalar_subquery(),
+            0,
+        )
+        + select(func.count())
+        .select_from(Report)
+        .where(_raw_filter(raw))
+        .scalar_subquery()
+    )
+
+    return AggregatedStatistics(
+        report_count=db.scalar(report_count) or 0,
+        task_statistics=task_statistics,
+        total_completions=sum(ts.times_completed for ts in task_statistics),
+        total_skips=sum(ts.times_skipped for ts in task_statistics),
+        total_incompletes=sum(ts.times_incomplete for ts in task_statistics),
+    )
+
+
+def query_statistics(
+    db: Session, start_date: datetime, end_date: datetime
+) -> AggregatedStatistics:
+    """Aggregate statistics for reports created within [start_date, end_date]"""
+    # Reports store naive local times; aware bounds are converted to match
+    start_date, end_date = _local_naive(start_date), _local_naive(end_date)
+    # Reports store microsecond timestamps, so this makes the end inclusive
+    buckets, raw = split_range(start_date, end_date + timedelta(microseconds=1))
+    return aggregate_statistics(db, buckets, raw)
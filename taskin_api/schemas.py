@@ -30,6 +30,7 @@ class Timeslot(BaseModel):
 class EventResponse(ORMModel):
     """Schema for event response"""
 
+    id: int
     name: str
     timestamp: datetime
 
@@ -77,6 +78,13 @@ class OneOffTodoUpdate(BaseModel):
     status: TaskStatus | None = None
 
 
+class StatusUpdate(BaseModel):
+    """One entry of a batched status update"""
+
+    id: int
+    status: TaskStatus
+
+
 class OneOffTodoResponse(ORMModel):
     id: int
     title: str
@@ -181,3 +189,28 @@ class AggregatedStatistics(BaseModel):
     total_completions: int
     total_skips: int
     total_incompletes: int
+
+
+class SyncTombstones(BaseModel):
+    """Ids of rows deleted since the client's version"""
+
+    categories: list[int] = Field(default_factory=list)
+    todos: list[int] = Field(default_factory=list)
+    oneoffs: list[int] = Field(default_factory=list)
+    events: list[int] = Field(default_factory=list)
+
+
+class SyncResponse(BaseModel):
+    """Rows changed since the client's version.
+
+    When full is set the client's version is too old (or unknown) for a delta and
+    nothing else is included; refetch everything and sync from version.
+    """
+
+    version: int
+    full: bool
+    categories: list[CategoryResponse] = Field(default_factory=list)
+    todos: list[TodoResponse] = Field(default_factory=list)
+    oneoffs: list[OneOffTodoResponse] = Field(default_factory=list)
+    events: list[EventResponse] = Field(default_factory=list)
+    deleted: SyncTombstones = Field(default_factory=SyncTombstones)
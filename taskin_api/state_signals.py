@@ -0,0 +1,63 @@
+"""
+In-process signals raised by the API when state that affects recommendations
+changes, so background services can react without polling the database.
+"""
+
+import enum
+import threading
+import time
+from typing import Callable
+
+
+class StateChange(enum.Enum):
+    """Kinds of state change the API signals"""
+
+    status = "status"  # a todo's status changed
+    oneoff = "oneoff"  # a one-off todo was created, updated or deleted
+    event = "event"  # an event was triggered
+    reset = "reset"  # the daily reset ran
+    config = "config"  # the database was synced with the config file
+
+
+class StateSignals:
+    """
+    Fan out state changes to subscribers; safe to emit from any thread.
+
+    Every emit also bumps a version, so readers can tell whether anything changed
+    since they last looked.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers: list[Callable[[StateChange], None]] = []
+        self._version = 0
+        # Versions restart with the process, so tags also carry when it started
+        self._epoch = f"{time.time_ns():x}"
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def tag(self) -> str:
+        """Opaque token for the current state, unique across restarts"""
+        return f"{self._epoch}-{self._version}"
+
+    def subscribe(self, callback: Callable[[StateChange], None]):
+        with self._lock:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable[[StateChange], None]):
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def emit(self, change: StateChange):
+        with self._lock:
+            self._version += 1
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            callback(change)
+
+
+# Global signal hub
+state_signals = StateSignals()
@@ -0,0 +1,449 @@
+"""
+In-memory todo and one-off status store with write-behind to SQLite.
+
+All status changes go through this process, so the store is the authoritative copy of
+every todo's and one-off's state. Status endpoints and recommendation queries work on
+the store alone; changes are written back to the database in batched transactions by a
+background flusher. Anything that reads statuses from the database flushes first.
+"""
+
+import asyncio
+import threading
+from collections.abc import Iterable
+from contextlib import contextmanager
+from dataclasses import dataclass, replace
+from datetime import datetime
+from typing import cast
+
+import structlog
+from change_log import record_changes
+from dep_manager import Graph
+from models import (
+    Category,
+    ChangeEntity,
+    OneOffTodo,
+    SessionLocal,
+    TaskStatus,
+    Todo,
+)
+from readiness import ReadinessEngine, Timeslots
+from sqlalchemy import Table, bindparam, update
+from sqlalchemy.orm import Session, selectinload
+
+# Statuses that still need doing; todos and one-offs in them block their dependants
+OPEN_TODO_STATUSES = frozenset({TaskStatus.incomplete, TaskStatus.in_progress})
+
+
+@dataclass(slots=True, frozen=True)
+class CategoryRecord:
+    id: int
+    name: str
+    description: str | None
+
+
+@dataclass(slots=True)
+class TodoRecord:
+    """A todo row; fields match TodoResponse so it serialises directly"""
+
+    id: int
+    title: str
+    description: str | None
+    status: TaskStatus
+    category_id: int
+    category: CategoryRecord
+    reset_interval: int
+    reset_count: int
+    position: int
+    in_progress_start: datetime | None
+    cumulative_in_progress_seconds: float
+
+
+@dataclass(slots=True)
+class OneOffRecord:
+    id: int
+    title: str
+    description: str | None
+    status: TaskStatus
+
+
+# Columns written back for each record type
+TODO_COLUMNS = (
+    "status",
+    "reset_count",
+    "in_progress_start",
+    "cumulative_in_progress_seconds",
+)
+ONEOFF_COLUMNS = ("title", "description", "status")
+
+
+def apply_status(db_todo: Todo | TodoRecord, status: TaskStatus, now: datetime):
+    """Set a todo's status, tracking in-progress time for statistics"""
+    old_status = db_todo.status
+
+    # Track status transitions for statistics
+    if status == TaskStatus.in_progress and old_status != TaskStatus.in_progress:
+        # Entering in-progress state - record the start time
+        db_todo.in_progress_start = now
+    elif old_status == TaskStatus.in_progress and status != TaskStatus.in_progress:
+        # Leaving in-progress state - accumulate the duration
+        if db_todo.in_progress_start is not None:
+            duration = (now - db_todo.in_progress_start).total_seconds()
+            db_todo.cumulative_in_progress_seconds += duration
+            db_todo.in_progress_start = None
+    if status == TaskStatus.incomplete:
+        db_todo.reset_count = 0  # Reset the reset_count when marking incomplete
+    db_todo.status = status
+
+
+class StatusStore:
+    """
+    Authoritative in-memory copy of todo and one-off state.
+
+    Mutations happen under a lock and mark records dirty; flush() writes every dirty
+    record in one transaction. The background flusher calls it shortly after a change,
+    so a burst of status updates lands as a single write.
+    """
+
+    def __init__(self, session_factory=SessionLocal, flush_delay: float = 0.05):
+        self.logger = structlog.stdlib.get_logger().bind(module="status_store")
+        self.session_factory = session_factory
+        self.flush_delay = flush_delay
+        self.todos: dict[int, TodoRecord] = {}
+        self.oneoffs: dict[int, OneOffRecord] = {}
+        self._open_todo_ids: set[int] = set()
+        self._open_oneoff_ids: set[int] = set()
+        self.readiness = ReadinessEngine()
+        self._dirty_todos: set[int] = set()
+        self._dirty_oneoffs: set[int] = set()
+        self._editing_todos: set[int] = set()
+        self._editing_oneoffs: set[int] = set()
+        self._writing = False
+        # Status edits made while rewriting(), replayed onto the reloaded todos
+        self._replay: dict[int, list[tuple[TaskStatus, datetime]]] | None = None
+        # Held while writing so readers that flush wait for in-flight writes
+        self._flush_lock = threading.Lock()
+        self._lock = threading.RLock()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._wakeup: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+
+    # Loading
+
+    @staticmethod
+    def _read_todos(db: Session) -> dict[int, TodoRecord]:
+        categories = db.query(Category).options(selectinload(Category.todos)).all()
+        todos: dict[int, TodoRecord] = {}
+        for category in categories:
+            category_record = CategoryRecord(
+                id=category.id, name=category.name, description=category.description
+            )
+            for todo in category.todos:
+                todos[todo.id] = TodoRecord(
+                    id=todo.id,
+                    title=todo.title,
+                    description=todo.description,
+                    status=todo.status,
+                    category_id=todo.category_id,
+                    category=category_record,
+                    reset_interval=todo.reset_interval,
+                    reset_count=todo.reset_count,
+                    position=todo.position,
+                    in_progress_start=todo.in_progress_start,
+                    cumulative_in_progress_seconds=todo.cumulative_in_progress_seconds,
+                )
+        return dict(sorted(todos.items()))
+
+    def _set_todos(self, todos: dict[int, TodoRecord]):
+        self.todos = todos
+        self._open_todo_ids = {
+            tid for tid, todo in todos.items() if todo.status in OPEN_TODO_STATUSES
+        }
+        self.readiness.reset(self._open_todo_ids, bool(self._open_oneoff_ids))
+
+    def load(self, db: Session):
+        """Replace the store's contents with the database's. Pending writes are lost."""
+        todos = self._read_todos(db)
+        oneoffs = db.query(OneOffTodo).order_by(OneOffTodo.id).all()
+        with self._lock:
+            self.oneoffs = {
+                item.id: OneOffRecord(
+                    id=item.id,
+                    title=item.title,
+                    description=item.description,
+                    status=item.status,
+                )
+                for item in oneoffs
+            }
+            self._open_oneoff_ids = {
+                oid
+                for oid, item in self.oneoffs.items()
+                if item.status != TaskStatus.complete
+            }
+            self._set_todos(todos)
+            self._dirty_todos.clear()
+            self._dirty_oneoffs.clear()
+
+    @contextmanager
+    def rewriting(self, db: Session):
+        """
+        Flush, then let the caller rewrite todo statuses in the database directly and
+        reload the todos from db once it has committed.
+
+        The store stays usable meanwhile, but nothing is written until the reload.
+        Status changes made during the rewrite are replayed onto the reloaded todos, so
+        they apply on top of the rewrite rather than undoing it.
+        """
+        with self._flush_lock:
+            self._flush_locked()
+            with self._lock:
+                self._replay = {}
+            try:
+                yield
+                todos = self._read_todos(db)
+                with self._lock:
+                    for tid, edits in self._replay.items():
+                        if tid in todos:
+                            for status, when in edits:
+                                apply_status(todos[tid], status, when)
+                    self._set_todos(todos)
+            finally:
+                with self._lock:
+                    self._replay = None
+
+    # Queries
+
+    def open_todo_ids(self) -> set[int]:
+        """Ids of todos that are incomplete or in progress"""
+        with self._lock:
+            return set(self._open_todo_ids)
+
+    def open_oneoff_ids(self) -> set[int]:
+        """Ids of one-offs that are not complete"""
+        with self._lock:
+            return set(self._open_oneoff_ids)
+
+    def missing_todos(self, ids: Iterable[int]) -> list[int]:
+        with self._lock:
+            return [tid for tid in ids if tid not in self.todos]
+
+    def missing_oneoffs(self, ids: Iterable[int]) -> list[int]:
+        with self._lock:
+            return [oid for oid in ids if oid not in self.oneoffs]
+
+    def snapshot(self) -> tuple[dict[int, tuple], dict[int, tuple]]:
+        """The written-back columns of every todo and one-off, for spotting changes"""
+        with self._lock:
+            return (
+                {
+                    tid: tuple(getattr(todo, c) for c in TODO_COLUMNS)
+                    for tid, todo in self.todos.items()
+                },
+                {
+                    oid: tuple(getattr(item, c) for c in ONEOFF_COLUMNS)
+                    for oid, item in self.oneoffs.items()
+                },
+            )
+
+    def copies(
+        self, todo_ids: Iterable[int], oneoff_ids: Iterable[int]
+    ) -> tuple[list[TodoRecord], list[OneOffRecord]]:
+        """Copies of the listed records that still exist, safe to read unlocked"""
+        with self._lock:
+            return (
+                [replace(self.todos[tid]) for tid in todo_ids if tid in self.todos],
+                [
+                    replace(self.oneoffs[oid])
+                    for oid in oneoff_ids
+                    if oid in self.oneoffs
+                ],
+            )
+
+    def recommended_todos(self, graph: Graph, timeslots: Timeslots) -> list[TodoRecord]:
+        """Todos that are ready to work on, in id order"""
+        with self._lock:
+            self.readiness.sync(graph, timeslots)
+            return [self.todos[tid] for tid in sorted(self.readiness.ready)]
+
+    # Mutations
+
+    @contextmanager
+    def editing(self):
+        """
+        Hold the store lock while the caller changes records fetched with edit_todo and
+        edit_oneoff; they are queued for writing on exit.
+        """
+        with self._lock:
+            try:
+                yield
+            finally:
+                changed = self._queue_edits()
+        if changed:
+            self._schedule_flush()
+
+    def _queue_edits(self) -> bool:
+        if self._replay is not None:
+            now = datetime.now()
+            for tid in self._editing_todos:
+                self._replay.setdefault(tid, []).append((self.todos[tid].status, now))
+        for tid in self._editing_todos:
+            is_open = self.todos[tid].status in OPEN_TODO_STATUSES
+            if is_open:
+                self._open_todo_ids.add(tid)
+            else:
+                self._open_todo_ids.discard(tid)
+            self.readiness.set_open(tid, is_open)
+        for oid in self._editing_oneoffs:
+            self._track_oneoff(self.oneoffs[oid])
+        changed = bool(self._editing_todos or self._editing_oneoffs)
+        self._dirty_todos |= self._editing_todos
+        self._dirty_oneoffs |= self._editing_oneoffs
+        self._editing_todos.clear()
+        self._editing_oneoffs.clear()
+        return changed
+
+    def edit_todo(self, todo_id: int) -> TodoRecord:
+        """The todo's record, to be changed inside editing()"""
+        record = self.todos[todo_id]
+        self._editing_todos.add(todo_id)
+        return record
+
+    def edit_oneoff(self, oneoff_id: int) -> OneOffRecord:
+        """The one-off's record, to be changed inside editing()"""
+        record = self.oneoffs[oneoff_id]
+        self._editing_oneoffs.add(oneoff_id)
+        return record
+
+    def add_oneoff(self, item: OneOffTodo) -> OneOffRecord:
+        """Track a one-off that has just been committed to the database"""
+        record = OneOffRecord(
+            id=item.id,
+            title=item.title,
+            description=item.description,
+            status=item.status,
+        )
+        with self._lock:
+            self.oneoffs[record.id] = record
+            self._track_oneoff(record)
+        return record
+
+    def remove_oneoff(self, oneoff_id: int) -> bool:
+        """Stop tracking a one-off. The caller deletes the row."""
+        with self._lock:
+            self._dirty_oneoffs.discard(oneoff_id)
+            self._open_oneoff_ids.discard(oneoff_id)
+            self.readiness.set_oneoffs_open(bool(self._open_oneoff_ids))
+            return self.oneoffs.pop(oneoff_id, None) is not None
+
+    def _track_oneoff(self, record: OneOffRecord):
+        if record.status != TaskStatus.complete:
+            self._open_oneoff_ids.add(record.id)
+        else:
+            self._open_oneoff_ids.discard(record.id)
+        self.readiness.set_oneoffs_open(bool(self._open_oneoff_ids))
+
+    # Write-behind
+
+    @property
+    def pending(self) -> bool:
+        """Whether there are changes not yet committed to the database"""
+        return bool(self._dirty_todos or self._dirty_oneoffs or self._writing)
+
+    def flush(self):
+        """Write every pending change in one transaction. Safe to call from any thread."""
+        with self._flush_lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        with self._lock:
+            todo_rows = [
+                {"b_id": tid, **{c: getattr(self.todos[tid], c) for c in TODO_COLUMNS}}
+                for tid in self._dirty_todos
+            ]
+            oneoff_rows = [
+                {
+                    "b_id": oid,
+                    **{c: getattr(self.oneoffs[oid], c) for c in ONEOFF_COLUMNS},
+                }
+                for oid in self._dirty_oneoffs
+            ]
+            if not (todo_rows or oneoff_rows):
+                return
+            self._dirty_todos.clear()
+            self._dirty_oneoffs.clear()
+            self._writing = True
+        try:
+            with self.session_factory() as db:
+                for model, columns, rows in (
+                    (Todo, TODO_COLUMNS, todo_rows),
+                    (OneOffTodo, ONEOFF_COLUMNS, oneoff_rows),
+                ):
+                    if rows:
+                        # Core table, so the rows are executed as one executemany
+                        table = cast(Table, model.__table__)
+                        db.execute(
+                            update(table)
+                            .where(table.c.id == bindparam("b_id"))
+                            .values({c: bindparam(c) for c in columns}),
+                            rows,
+                        )
+                record_changes(
+                    db, ChangeEntity.todo, [row["b_id"] for row in todo_rows]
+                )
+                record_changes(
+                    db, ChangeEntity.oneoff, [row["b_id"] for row in oneoff_rows]
+                )
+                db.commit()
+        except Exception:
+            # Keep the changes queued; later updates to the same records win anyway
+            with self._lock:
+                self._dirty_todos.update(
+                    row["b_id"] for row in todo_rows if row["b_id"] in self.todos
+                )
+                self._dirty_oneoffs.update(
+                    row["b_id"] for row in oneoff_rows if row["b_id"] in self.oneoffs
+                )
+            raise
+        finally:
+            self._writing = False
+
+    def _schedule_flush(self):
+        loop, wakeup = self._loop, self._wakeup
+        if loop is not None and wakeup is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(wakeup.set)
+
+    def start(self):
+        """Start the background flusher on the running event loop"""
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._task = self._loop.create_task(self._run())
+        if self.pending:
+            self._wakeup.set()
+
+    async def stop(self):
+        """Stop the background flusher and write anything still pending"""
+        task, self._task = self._task, None
+        self._loop = None
+        self._wakeup = None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        await asyncio.to_thread(self.flush)
+
+    async def _run(self):
+        assert self._wakeup is not None, "Store not started"
+        wakeup = self._wakeup
+        while True:
+            await wakeup.wait()
+            # Let a burst of changes collect into one transaction
+            await asyncio.sleep(self.flush_delay)
+            wakeup.clear()
+            try:
+                await asyncio.to_thread(self.flush)
+            except Exception as e:
+                self.logger.error("Failed to write statuses", error=str(e))
+                await asyncio.sleep(1)
+                wakeup.set()
+
+
+# Global store, loaded at startup and flushed in the background while the app runs
+status_store = StatusStore()
@@ -0,0 +1,237 @@
+"""
+Live state stream for the UI.
+
+Connected clients receive server-sent events whenever todos or one-offs change, the
+recommended set changes, or todos move in or out of their timeslots, so dashboards
+can stay current without polling.
+"""
+
+import asyncio
+import json
+from collections.abc import AsyncIterator
+from datetime import datetime
+
+import structlog
+from dep_manager import dep_man
+from deps import build_timeslot_context
+from fastapi import Request
+from schemas import OneOffTodoResponse, TodoResponse
+from state_signals import StateChange, state_signals
+from status_store import status_store
+
+
+def format_event(event: str, data, tag: str) -> str:
+    """
+    One server-sent event; the id is the state tag it reflects. Tags are not /sync
+    versions: the stream reports status changes before they are written back and
+    logged, so clients catch up through /sync with the version it last returned.
+    """
+    payload = json.dumps(data, separators=(",", ":"))
+    return f"id: {tag}\nevent: {event}\ndata: {payload}\n\n"
+
+
+class StateSnapshot:
+    """What the stream last told clients about"""
+
+    def __init__(self):
+        timeslots = build_timeslot_context()
+        self.todos, self.oneoffs = status_store.snapshot()
+        self.recommended = [
+            todo.id
+            for todo in status_store.recommended_todos(dep_man.full_graph, timeslots)
+        ]
+        self.in_window = {
+            tid for tid in timeslots.timeslots if timeslots.in_window(tid)
+        }
+
+
+class LiveStream:
+    """
+    Fans state changes out to /stream clients as server-sent events:
+
+    - todos: the todos whose status or timing changed
+    - oneoffs: created or updated one-offs, and the ids of deleted ones
+    - recommended: the ids of the recommended todos, whenever they change
+    - timeslots: ids of todos that entered or left their timeslot window
+    - resync: the client fell behind and should refetch everything
+    """
+
+    QUEUE_SIZE = 64  # Events buffered per client before it must resync
+    KEEPALIVE_SECONDS = 15.0
+
+    def __init__(self):
+        self.logger = structlog.stdlib.get_logger().bind(module="stream_service")
+        self.running = False
+        self._clients: set[asyncio.Queue[str | None]] = set()
+        self._snapshot: StateSnapshot | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._wakeup: asyncio.Event | None = None
+
+    # Clients
+
+    def subscribe(self) -> asyncio.Queue[str | None]:
+        """Register a client queue. Must be called on the event loop."""
+        if self._snapshot is None:
+            # Nobody was listening, so start diffing from now
+            self._snapshot = StateSnapshot()
+        queue: asyncio.Queue[str | None] = asyncio.Queue(self.QUEUE_SIZE)
+        self._clients.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue[str | None]):
+        self._clients.discard(queue)
+        if not self._clients:
+            self._snapshot = None
+
+    async def events(self, request: Request) -> AsyncIterator[str]:
+        """Event stream for one client, until it disconnects or the server stops"""
+        queue = self.subscribe()
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                try:
+                    message = await asyncio.wait_for(
+                        queue.get(), self.KEEPALIVE_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keepalive\n\n"
+                    continue
+                if message is None:
+                    break
+                yield message
+        finally:
+            self.unsubscribe(queue)
+
+    def _broadcast(self, messages: list[str]):
+        tag = state_signals.tag()
+        for queue in list(self._clients):
+            for message in messages:
+                try:
+                    queue.put_nowait(message)
+                except asyncio.QueueFull:
+                    while not queue.empty():
+                        queue.get_nowait()
+                    queue.put_nowait(format_event("resync", {}, tag))
+                    break
+
+    # Changes
+
+    def on_state_change(self, change: StateChange):
+        """Wake the stream. Called from request threads."""
+        loop, wakeup = self._loop, self._wakeup
+        if loop is not None and wakeup is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(wakeup.set)
+
+    def publish(self):
+        """Send clients whatever changed since the last snapshot"""
+        previous = self._snapshot
+        if previous is None:
+            return
+        current = StateSnapshot()
+        self._snapshot = current
+        tag = state_signals.tag()
+        messages: list[str] = []
+
+        todo_ids = [
+            tid
+            for tid, values in current.todos.items()
+            if previous.todos.get(tid) != values
+        ]
+        oneoff_ids = [
+            oid
+            for oid, values in current.oneoffs.items()
+            if previous.oneoffs.get(oid) != values
+        ]
+        # Copied under the store lock, so no edit or reset lands mid-serialisation;
+        # records replaced by a reset while this runs are sent by the next pass
+        todos, oneoffs = status_store.copies(todo_ids, oneoff_ids)
+        changed_todos = [
+            TodoResponse.model_validate(todo).model_dump(mode="json") for todo in todos
+        ]
+        if changed_todos:
+            messages.append(format_event("todos", changed_todos, tag))
+
+        changed_oneoffs = [
+            OneOffTodoResponse.model_validate(item).model_dump(mode="json")
+            for item in oneoffs
+        ]
+        deleted_oneoffs = sorted(previous.oneoffs.keys() - current.oneoffs.keys())
+        if changed_oneoffs or deleted_oneoffs:
+            messages.append(
+                format_event(
+                    "oneoffs",
+                    {"changed": changed_oneoffs, "deleted": deleted_oneoffs},
+                    tag,
+                )
+            )
+
+        entered = sorted(current.in_window - previous.in_window)
+        left = sorted(previous.in_window - current.in_window)
+        if entered or left:
+            messages.append(
+                format_event("timeslots", {"entered": entered, "left": left}, tag)
+            )
+
+        if current.recommended != previous.recommended:
+            messages.append(
+                format_event("recommended", {"todo_ids": current.recommended}, tag)
+            )
+
+        if messages:
+            self._broadcast(messages)
+
+    def _seconds_to_next_boundary(self) -> float:
+        try:
+            boundary = build_timeslot_context().next_boundary()
+        except Exception as e:
+            self.logger.error("Failed to compute next timeslot boundary", error=str(e))
+            return 60.0
+        # Wake just after the edge so the timeslot comparison has flipped
+        return max((boundary - datetime.now()).total_seconds(), 0) + 0.001
+
+    async def run(self):
+        """
+        Main loop - sleep until a state change is signalled or the next timeslot
+        boundary passes, then publish what changed.
+        """
+        self.running = True
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        state_signals.subscribe(self.on_state_change)
+        try:
+            while self.running:
+                timeout = self._seconds_to_next_boundary()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                if not self.running:
+                    break
+                try:
+                    self.publish()
+                except Exception as e:
+                    self.logger.error(
+                        "Error publishing state changes", error=str(e), exc_info=True
+                    )
+        finally:
+            state_signals.unsubscribe(self.on_state_change)
+            self._loop = None
+            self._wakeup = None
+
+    def stop(self):
+        """Stop the stream and end every client's response"""
+        self.running = False
+        for queue in list(self._clients):
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(None)
+        loop, wakeup = self._loop, self._wakeup
+        if loop is not None and wakeup is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(wakeup.set)
+
+
+# Global stream instance
+live_stream = LiveStream()
@@ -0,0 +1,42 @@
+import datetime
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+# Add parent directory to path to allow imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from models import Base, Category, Event, OneOffTodo, Todo
+from status_store import status_store
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """
+    Database with todos 1-3 (1 and 3 in work, 2 in morning), one-offs 1-3 and an
+    event. It is a file so the store's background flusher can reach it.
+    """
+    engine = create_engine(f"sqlite:///{tmp_path / 'taskin.db'}")
+    Base.metadata.create_all(bind=engine)
+    with Session(engine) as session:
+        session.add_all([Category(id=1, name="morning"), Category(id=2, name="work")])
+        session.add_all(
+            [Todo(id=i, title=f"todo-{i}", category_id=1 + i % 2) for i in range(1, 4)]
+        )
+        session.add_all([OneOffTodo(id=i, title=f"oneoff-{i}") for i in range(1, 4)])
+        session.add(Event(id=1, name="up", timestamp=datetime.datetime(2025, 1, 1)))
+        session.commit()
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def live_store(engine, monkeypatch):
+    """The global status store, loaded from engine and writing back to it"""
+    with Session(engine) as db:
+        status_store.load(db)
+    monkeypatch.setattr(status_store, "session_factory", sessionmaker(bind=engine))
+    return status_store
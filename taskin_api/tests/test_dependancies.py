@@ -1,3 +1,6 @@
+import dataclasses
+import datetime
+import random
 import sys
 from pathlib import Path
 
@@ -6,7 +9,16 @@ import pytest
 # Add parent directory to path to allow imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from dep_manager import DDM, Graph
+from config_loader import (
+    AppConfig,
+    CategoryConfig,
+    ComputeTimeConfig,
+    ComputeTimeDependency,
+    TimeDependency,
+    TodoConfig,
+)
+from dep_manager import DDM, BitsetDDM, DependencyCycleError, DependencyManager, Graph
+from models import Category, Event, Todo
 
 
 @pytest.fixture
@@ -36,6 +48,51 @@ def filled_graph():
     return graph
 
 
+@pytest.fixture
+def manager_config():
+    return AppConfig(
+        categories=[
+            CategoryConfig(
+                name="morning",
+                todos=[
+                    TodoConfig(title="wake"),
+                    TodoConfig(title="shower", depends_on_todos=["wake"]),
+                ],
+            ),
+            CategoryConfig(
+                name="work",
+                todos=[
+                    TodoConfig(title="email", depends_on_categories=["morning"]),
+                    TodoConfig(title="code", depends_on_todos=["email"]),
+                ],
+            ),
+        ]
+    )
+
+
+@pytest.fixture
+def manager_categories():
+    return [
+        Category(
+            id=1,
+            name="morning",
+            todos=[Todo(id=1, title="wake"), Todo(id=2, title="shower")],
+        ),
+        Category(
+            id=2,
+            name="work",
+            todos=[Todo(id=3, title="email"), Todo(id=4, title="code")],
+        ),
+    ]
+
+
+@pytest.fixture
+def manager(manager_config, manager_categories):
+    dep_man = DependencyManager(manager_config)
+    dep_man.load_from_db(manager_categories, [])
+    return dep_man
+
+
 def test_DDM(filled_ddm):
     ddm = filled_ddm.filter({2})
     assert ddm.get_deps(0) == {1, 3, 4}
@@ -87,6 +144,44 @@ def test_DDM_filter():
     assert filtered_ddm == ddm2
 
 
+def test_bitset_DDM(filled_ddm):
+    bitset_ddm = BitsetDDM.from_ddm(filled_ddm)
+    assert bitset_ddm.get_deps(0) == {1, 2, 3, 4}
+    assert bitset_ddm.get_deps(2) == {3}
+    assert bitset_ddm.get_deps(3) == set()
+    assert 1 in bitset_ddm
+    assert 4 not in bitset_ddm
+    assert bitset_ddm.depends_on(0, 4)
+    assert not bitset_ddm.depends_on(2, 1)
+
+
+def test_bitset_DDM_filter(filled_ddm):
+    bitset_ddm = BitsetDDM.from_ddm(filled_ddm)
+    filtered = bitset_ddm.filter({2})
+    assert filtered.get_deps(0) == {1, 3, 4}
+    assert filtered.get_deps(1) == {3}
+    assert 2 not in filtered
+    assert filtered == BitsetDDM.from_ddm(filled_ddm.filter({2}), like=bitset_ddm)
+    assert filtered == BitsetDDM.from_ddm(filled_ddm.filter({2}))
+
+
+def test_bitset_DDM_masks(filled_ddm):
+    bitset_ddm = BitsetDDM.from_ddm(filled_ddm)
+    blocking = bitset_ddm.mask_of({4, 99})
+    assert bitset_ddm.get_mask(0) & blocking
+    assert not bitset_ddm.get_mask(1) & blocking
+    assert bitset_ddm.mask_of({99}) == 0
+
+
+def test_bitset_DDM_not_equal():
+    ddm1 = DDM()
+    ddm1.add_deps(0, {1, 2})
+    ddm2 = DDM()
+    ddm2.add_deps(0, {1, 3})
+    assert BitsetDDM.from_ddm(ddm1) != BitsetDDM.from_ddm(ddm2)
+    assert not BitsetDDM()
+
+
 def test_graph_valid(filled_graph):
     assert filled_graph.categories[0].dependencies == {0}
     assert filled_graph.categories[1].dependencies == {4, 5}
@@ -570,7 +665,7 @@ def test_validate_dangling_dependency():
     assert graph.validate()
 
     # Manually create a dangling reference
-    graph.nodes[0].dependencies.add(999)
+    graph.nodes[0].dependencies |= {999}
     assert graph.nodes[0].dependencies == {1, 999}
     assert not graph.validate()
 
@@ -587,7 +682,7 @@ def test_validate_dangling_dependant():
     assert graph.validate()
 
     # Manually create a dangling reference
-    graph.nodes[1].dependants.add(999)
+    graph.nodes[1].dependants |= {999}
     assert graph.nodes[1].dependants == {0, 999}
     assert not graph.validate()
 
@@ -602,7 +697,7 @@ def test_validate_dangling_category_dependency():
     assert graph.validate()
 
     # Manually create a dangling category reference
-    graph.nodes[0].cat_dependencies.add(999)
+    graph.nodes[0].cat_dependencies |= {999}
     assert graph.nodes[0].cat_dependencies == {999}
     assert not graph.validate()
 
@@ -636,7 +731,7 @@ def test_validate_bidirectional_consistency_deps():
     assert graph.validate()
 
     # Break bidirectional consistency - 0 depends on 1, but 1 doesn't know about 0
-    graph.nodes[1].dependants.remove(0)
+    graph.nodes[1].dependants -= {0}
     assert graph.nodes[0].dependencies == {1}
     assert graph.nodes[1].dependants == set()
     assert not graph.validate()
@@ -655,7 +750,7 @@ def test_validate_bidirectional_consistency_dependants():
     assert graph.validate()
 
     # Break bidirectional consistency - 1 has dependant 0, but 0 doesn't depend on 1
-    graph.nodes[0].dependencies.remove(1)
+    graph.nodes[0].dependencies -= {1}
     assert graph.nodes[0].dependencies == set()
     assert graph.nodes[1].dependants == {0}
     assert not graph.validate()
@@ -674,7 +769,7 @@ def test_validate_bidirectional_category_deps():
     assert graph.validate()
 
     # Break bidirectional consistency
-    graph.categories[1].dependants.remove(0)
+    graph.categories[1].dependants -= {0}
     assert graph.nodes[0].cat_dependencies == {1}
     assert graph.categories[1].dependants == set()
     assert not graph.validate()
@@ -691,7 +786,7 @@ def test_validate_bidirectional_cat_dependant():
     assert graph.validate()
 
     # Break bidirectional consistency
-    graph.categories[0].dependencies.remove(0)
+    graph.categories[0].dependencies -= {0}
     assert graph.nodes[0].cat_dependant == 0
     assert graph.categories[0].dependencies == set()
     assert not graph.validate()
@@ -707,7 +802,7 @@ def test_validate_category_dependencies_point_to_nodes():
     assert graph.validate()
 
     # Manually add invalid node reference to category
-    graph.categories[0].dependencies.add(999)
+    graph.categories[0].dependencies |= {999}
     assert graph.categories[0].dependencies == {0, 999}
     assert not graph.validate()
 
@@ -722,7 +817,7 @@ def test_validate_category_dependants_point_to_nodes():
     assert graph.validate()
 
     # Manually add invalid node reference to category
-    graph.categories[0].dependants.add(999)
+    graph.categories[0].dependants |= {999}
     assert graph.categories[0].dependants == {999}
     assert not graph.validate()
 
@@ -753,3 +848,529 @@ def test_validate_after_dedupe():
     assert 2 not in graph.nodes[0].dependencies
     assert 0 not in graph.nodes[2].dependants
     assert graph.validate()
+
+
+def _random_graph(rng: random.Random, size: int = 30, per_category: int = 5) -> Graph:
+    """Build a random acyclic graph; edges always point from higher to lower ids"""
+    graph = Graph()
+    for tid in range(size):
+        graph.add_todo(tid, tid // per_category)
+    for tid in range(size):
+        for dep in rng.sample(range(tid), min(tid, rng.randint(0, 3))):
+            graph.add_dep_node(tid, dep)
+        lower_categories = range(tid // per_category)
+        if lower_categories and rng.random() < 0.3:
+            graph.add_cat_dep(tid, rng.choice(lower_categories))
+    return graph
+
+
+def _rebuilt_ddm(graph: Graph):
+    rebuilt = graph.copy()
+    rebuilt.build_ddm()
+    return rebuilt.ddm
+
+
+def test_incremental_ddm_add_edges(filled_graph):
+    filled_graph.add_dep_node(4, 2)
+    filled_graph.add_todo(6, 1)
+    filled_graph.add_dep_node(6, 5)
+    filled_graph.add_cat_dep(6, 0)
+    filled_graph.add_todo(7, 0)
+    assert filled_graph.ddm.get_deps(6) == {0, 1, 2, 3, 5, 7}
+    assert filled_graph.ddm.get_deps(3) == {0, 1, 2, 7}
+    assert filled_graph.ddm.get_deps(4) == {0, 1, 2, 3, 7}
+    assert filled_graph.ddm == _rebuilt_ddm(filled_graph)
+
+
+def test_incremental_ddm_remove_node(filled_graph):
+    filtered_ddm = filled_graph.ddm.filter({1})
+    filled_graph.remove_node(1)
+    assert filled_graph.ddm == filtered_ddm
+
+
+def test_dedupe_keeps_ddm(filled_graph):
+    filled_graph.add_dep_node(4, 2)
+    filled_graph.add_dep_node(5, 1)
+    expected = filled_graph.ddm.copy()
+    filled_graph.dedupe()
+    assert filled_graph.ddm == expected
+    assert filled_graph.ddm == _rebuilt_ddm(filled_graph)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_incremental_ddm_random(seed):
+    rng = random.Random(seed)
+    graph = _random_graph(rng)
+    graph.build_ddm()
+    for tid in range(30, 40):
+        graph.add_todo(tid, rng.randint(6, 7))
+        for dep in rng.sample(range(tid), 2):
+            graph.add_dep_node(tid, dep)
+        assert graph.ddm == _rebuilt_ddm(graph)
+    for tid in rng.sample(range(40), 10):
+        expected = graph.ddm.filter({tid})
+        graph.remove_node(tid)
+        assert graph.ddm == expected
+        assert graph.ddm == _rebuilt_ddm(graph)
+    graph.dedupe()
+    assert graph.ddm == _rebuilt_ddm(graph)
+    assert graph.validate()
+
+
+def _reachable(graph: Graph, tid: int) -> set[int]:
+    seen: set[int] = set()
+    stack = [tid]
+    while stack:
+        node = graph.nodes[stack.pop()]
+        deps = set(node.dependencies)
+        for cid in node.cat_dependencies:
+            deps |= graph.categories[cid].dependencies
+        for dep in deps - seen:
+            seen.add(dep)
+            stack.append(dep)
+    return seen
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_build_ddm_random(seed):
+    graph = _random_graph(random.Random(seed), size=60)
+    graph.build_ddm()
+    assert graph.ddm.ddm.keys() == graph.nodes.keys()
+    for tid in graph.nodes:
+        assert graph.ddm.get_deps(tid) == _reachable(graph, tid)
+
+
+def test_build_ddm_deep_chain():
+    depth = sys.getrecursionlimit() + 500
+    graph = Graph()
+    for tid in range(depth):
+        graph.add_todo(tid, 0)
+        if tid:
+            graph.add_dep_node(tid, tid - 1)
+    graph.build_ddm()
+    assert graph.ddm.get_deps(depth - 1) == set(range(depth - 1))
+    graph.dedupe()
+    assert graph.categories[0].dependencies == {depth - 1}
+
+
+def test_build_ddm_cycle(filled_graph):
+    filled_graph.add_dep_node(2, 5)  # 5 -> 3 -> category 0 -> 0 -> 1 -> 2 -> 5
+    with pytest.raises(DependencyCycleError) as error:
+        filled_graph.build_ddm()
+    assert error.value.cycle == [0, 1, 2, 5, 3]
+    assert str(error.value) == "Dependency cycle: 0 -> 1 -> 2 -> 5 -> 3 -> 0"
+
+
+def test_cycle_error_names_todos(manager_config, manager_categories):
+    manager_config.categories[0].todos[0].depends_on_todos = ["code"]
+    dep_man = DependencyManager(manager_config)
+    with pytest.raises(DependencyCycleError, match="wake -> code -> email -> shower"):
+        dep_man.load_from_db(manager_categories, [])
+
+
+def _legacy_dedupe(graph: Graph):
+    """Graph.dedupe as it was before it became a bitset transitive reduction"""
+
+    def filtered_ddm(current_tid: int, filter: set[int], filter_cat: set[int]):
+        filtered: set[int] = set()
+        current_ddm_deps = graph.ddm.get_deps(current_tid)
+        category_deps = set[int]()
+        for filter_category in filter_cat:
+            category_deps.update(graph.categories[filter_category].dependencies)
+        if not filter.intersection(current_ddm_deps) and not category_deps.intersection(
+            current_ddm_deps
+        ):
+            return graph.ddm.get_deps(current_tid)
+        for dep in graph.nodes[current_tid].dependencies:
+            if dep in filter:
+                continue
+            filtered.update(filtered_ddm(dep, set(), set()))
+            filtered.add(dep)
+        for cat_dep in graph.nodes[current_tid].cat_dependencies:
+            if cat_dep in filter_cat:
+                continue
+            filtered.update(filtered_ddm_category(cat_dep, set()))
+        return filtered
+
+    def filtered_ddm_category(current_cid: int, filter_tid: set[int]):
+        filtered: set[int] = set()
+        for tid in graph.categories[current_cid].dependencies:
+            if tid in filter_tid:
+                continue
+            filtered.update(filtered_ddm(tid, set(), set()))
+            filtered.add(tid)
+        return filtered
+
+    def dedupe_category(cid: int):
+        node = graph.categories[cid]
+        to_remove: set[int] = set()
+        category_deps = set[int]()
+        for cat_dep in node.dependencies:
+            category_deps.update(graph.ddm.get_deps(cat_dep))
+            category_deps.add(cat_dep)
+        for dep in node.dependencies:
+            if filtered_ddm_category(cid, {dep}) == category_deps:
+                to_remove.add(dep)
+        for rem in to_remove:
+            node.dependencies -= {rem}
+            graph.nodes[rem].cat_dependant = None
+        for dept in list(node.dependants):
+            dedupe_node(dept)
+
+    def dedupe_node(tid: int):
+        node = graph.nodes[tid]
+        to_remove: set[int] = set()
+        for dep in node.dependencies:
+            if filtered_ddm(tid, {dep}, set()) == graph.ddm.get_deps(tid):
+                to_remove.add(dep)
+        for rem in to_remove:
+            node.dependencies -= {rem}
+            graph.nodes[rem].dependants -= {tid}
+        to_remove_cat: set[int] = set()
+        for cat_dep in node.cat_dependencies:
+            if filtered_ddm(tid, set(), {cat_dep}) == graph.ddm.get_deps(tid):
+                to_remove_cat.add(cat_dep)
+        for rem in to_remove_cat:
+            node.cat_dependencies -= {rem}
+            graph.categories[rem].dependants -= {tid}
+        for dept in list(node.dependants):
+            dedupe_node(dept)
+        if node.cat_dependant is not None:
+            dedupe_category(node.cat_dependant)
+
+    if not graph._ddm_live:
+        graph.build_ddm()
+    for root in graph._find_root_tids():
+        dedupe_node(root)
+
+
+def _clone(graph: Graph) -> Graph:
+    """Copy with unshared nodes, for the legacy code, which changes nodes in place"""
+    clone = Graph()
+    clone.nodes = {tid: dataclasses.replace(node) for tid, node in graph.nodes.items()}
+    clone.categories = {
+        cid: dataclasses.replace(node) for cid, node in graph.categories.items()
+    }
+    for tid, deps in graph.ddm.ddm.items():
+        clone.ddm.add_deps(tid, deps)
+    clone._ddm_live = graph._ddm_live
+    return clone
+
+
+def _interleaved_graph(rng: random.Random, size: int) -> Graph:
+    """Random acyclic graph whose categories interleave, so a todo can reach back
+    into its own category"""
+    cids = [rng.randrange(size // 4) for _ in range(size)]
+    graph = Graph()
+    for tid, cid in enumerate(cids):
+        graph.add_todo(tid, cid)
+    for tid in range(size):
+        for dep in rng.sample(range(tid), min(tid, rng.randint(0, 4))):
+            graph.add_dep_node(tid, dep)
+        # Only categories entirely below tid, to keep the graph acyclic
+        below = sorted(set(cids) - set(cids[tid:]))
+        for cid in rng.sample(below, min(len(below), 2)):
+            if rng.random() < 0.4:
+                graph.add_cat_dep(tid, cid)
+    return graph
+
+
+def _structure(graph: Graph):
+    return (
+        {tid: dataclasses.astuple(node) for tid, node in graph.nodes.items()},
+        {cid: dataclasses.astuple(node) for cid, node in graph.categories.items()},
+    )
+
+
+def test_dedupe_matches_legacy(filled_graph):
+    filled_graph.add_dep_node(4, 2)
+    filled_graph.add_dep_node(5, 1)
+    filled_graph.add_dep_node(3, 1)
+    filled_graph.add_todo(6, 1)
+    filled_graph.add_dep_node(6, 5)
+    filled_graph.add_cat_dep(6, 0)
+    filled_graph.add_dep_node(6, 0)
+    legacy = _clone(filled_graph)
+    _legacy_dedupe(legacy)
+    filled_graph.dedupe()
+    assert _structure(filled_graph) == _structure(legacy)
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_dedupe_matches_legacy_random(seed):
+    rng = random.Random(seed)
+    graph = _interleaved_graph(rng, rng.choice([10, 20, 30]))
+    graph.build_ddm()
+    expected_ddm = _clone(graph).ddm
+    legacy = _clone(graph)
+    _legacy_dedupe(legacy)
+
+    graph.dedupe()
+    assert _structure(graph) == _structure(legacy)
+    assert graph.validate()
+    assert graph.ddm == expected_ddm
+    assert _rebuilt_ddm(graph) == expected_ddm
+    # Nothing redundant is left behind
+    reduced = _structure(graph)
+    graph.dedupe()
+    assert _structure(graph) == reduced
+
+
+def test_copy_shares_nodes_until_written(filled_graph):
+    before = _structure(filled_graph)
+    copy = filled_graph.copy()
+    assert all(copy.nodes[tid] is node for tid, node in filled_graph.nodes.items())
+    assert all(copy.ddm.ddm[tid] is deps for tid, deps in filled_graph.ddm.ddm.items())
+
+    copy.add_dep_node(5, 4)
+    assert _structure(filled_graph) == before
+    assert filled_graph.ddm.get_deps(5) == {0, 1, 2, 3}
+    assert copy.ddm.get_deps(5) == {0, 1, 2, 3, 4}
+    assert {
+        tid for tid in copy.nodes if copy.nodes[tid] is not filled_graph.nodes[tid]
+    } == {
+        4,
+        5,
+    }
+    assert copy.nodes[0] is filled_graph.nodes[0]
+
+    # Writes to the original after copying stay out of the copy too
+    copied = _structure(copy)
+    filled_graph.add_dep_node(4, 5)
+    filled_graph.remove_node(1)
+    assert _structure(copy) == copied
+    assert copy.ddm.get_deps(0) == {1, 2}
+
+
+def test_node_sets_are_shared(filled_graph):
+    source = filled_graph.nodes[4]
+    copy = filled_graph.copy()
+    copy.add_cat_dep(4, 0)
+    node = copy.nodes[4]
+    assert node is not source
+    assert node.cat_dependencies == {0}
+    assert node.dependencies is source.dependencies
+    assert node.dependants is source.dependants
+    with pytest.raises(AttributeError):
+        node.dependants.add(0)  # type: ignore[attr-defined]
+
+    empty = [
+        tids
+        for node in copy.nodes.values()
+        for tids in (node.cat_dependencies, node.dependencies, node.dependants)
+        if not tids
+    ]
+    assert len(empty) > 1
+    assert all(tids is empty[0] for tids in empty)
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_filter_out_leaves_source_unchanged(seed):
+    rng = random.Random(seed)
+    graph = _random_graph(rng, size=40)
+    graph.build_ddm()
+    graph.dedupe()
+    structure, ddm = _structure(graph), graph.ddm.copy()
+    removed = set(rng.sample(range(40), 5))
+
+    filtered = graph.filter_out(removed)
+    assert _structure(graph) == structure
+    assert graph.ddm == ddm
+    assert filtered.ddm == ddm.filter(removed)
+    assert filtered.validate()
+    # Nodes nowhere near the removed ones are still shared
+    nearby = set().union(
+        *(graph._ancestors(tid) | ddm.get_deps(tid) for tid in removed)
+    )
+    untouched = set(graph.nodes) - removed - nearby
+    assert untouched
+    assert all(filtered.nodes[tid] is graph.nodes[tid] for tid in untouched)
+
+
+def _legacy_remove_node(graph: Graph, tid: int):
+    """Graph.remove_node as it was before removals were batched, minus the DDM"""
+    node = graph.nodes[tid]
+    for dept_tid in node.dependants:
+        for dep in node.dependencies:
+            graph.nodes[dept_tid].dependencies |= {dep}
+            graph.nodes[dep].dependants |= {dept_tid}
+        for cat_dep_cid in node.cat_dependencies:
+            graph.nodes[dept_tid].cat_dependencies |= {cat_dep_cid}
+            graph.categories[cat_dep_cid].dependants |= {dept_tid}
+    if node.cat_dependant is not None:
+        for dep in node.dependencies:
+            dep_node = graph.nodes[dep]
+            if dep_node.cid == node.cid:
+                dep_node.cat_dependant = node.cat_dependant
+                graph.categories[node.cat_dependant].dependencies |= {dep}
+            else:
+                for dept in graph.categories[node.cat_dependant].dependants:
+                    graph.nodes[dept].dependencies |= {dep}
+                    graph.nodes[dep].dependants |= {dept}
+        for cat_dep in node.cat_dependencies:
+            for dept in graph.categories[node.cat_dependant].dependants:
+                graph.nodes[dept].cat_dependencies |= {cat_dep}
+                graph.categories[cat_dep].dependants |= {dept}
+    for dep in node.dependencies:
+        graph.nodes[dep].dependants -= {tid}
+    for dep in node.dependants:
+        graph.nodes[dep].dependencies -= {tid}
+    for cat_dep in node.cat_dependencies:
+        graph.categories[cat_dep].dependants -= {tid}
+    if node.cat_dependant is not None:
+        graph.categories[node.cat_dependant].dependencies -= {tid}
+        if graph.categories[node.cat_dependant].dependencies == set():
+            for dept in graph.categories[node.cat_dependant].dependants:
+                graph.nodes[dept].cat_dependencies -= {node.cid}
+            del graph.categories[node.cat_dependant]
+    del graph.nodes[tid]
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_remove_nodes_matches_one_at_a_time(seed):
+    rng = random.Random(seed)
+    size = rng.choice([10, 20, 30])
+    graph = _interleaved_graph(rng, size)
+    graph.build_ddm()
+    if seed % 2:
+        graph.dedupe()
+    removed = set(rng.sample(range(size), rng.randint(1, size // 2)))
+    expected_ddm = graph.ddm.filter(removed)
+    legacy = _clone(graph)
+    # One at a time depends on the order; dependencies first is the batch's order
+    for tid in graph._topological_order():
+        if tid in removed:
+            _legacy_remove_node(legacy, tid)
+
+    graph.remove_nodes(removed | {size + 1})  # unknown ids are ignored
+    assert _structure(graph) == _structure(legacy)
+    assert graph.validate()
+    assert graph.ddm == expected_ddm
+    assert _rebuilt_ddm(graph) == expected_ddm
+
+
+def test_filter_out_removes_in_one_pass(filled_graph, monkeypatch):
+    calls = []
+    monkeypatch.setattr(Graph, "remove_node", lambda self, tid: calls.append(tid))
+    filtered = filled_graph.filter_out({1, 3})
+    assert calls == []
+    assert set(filtered.nodes) == {0, 2, 4, 5}
+    assert filtered.nodes[0].dependencies == {2}
+    assert filtered.nodes[4].cat_dependencies == {0}
+    assert filtered.categories[0].dependencies == {0}
+    assert filtered.categories[0].dependants == {4, 5}
+
+
+def test_scope_subgraph(manager):
+    sub_graph = manager.scope_subgraph({2})
+    assert 2 not in sub_graph.nodes
+    assert sub_graph.ddm.get_deps(4) == {1, 3}
+    assert 2 in manager.full_graph.nodes
+
+
+def test_scope_subgraph_cached(manager):
+    sub_graph = manager.scope_subgraph({2})
+    assert manager.scope_subgraph({2}) is sub_graph
+    assert manager.scope_subgraph({2, 999}) is sub_graph  # unknown ids ignored
+    assert manager.scope_subgraph({1}) is not sub_graph
+
+
+def test_scope_subgraph_cache_lru(manager):
+    manager.SCOPE_CACHE_SIZE = 2
+    first = manager.scope_subgraph({1})
+    manager.scope_subgraph({2})
+    manager.scope_subgraph({1})  # refresh {1}, so {2} is evicted next
+    manager.scope_subgraph({3})
+    assert manager.scope_subgraph({1}) is first
+    assert frozenset({2}) not in manager._scope_cache
+
+
+def test_scope_subgraph_cache_invalidated_on_load(manager, manager_categories):
+    sub_graph = manager.scope_subgraph({2})
+    manager.load_from_db(manager_categories, [])
+    assert manager.scope_subgraph({2}) is not sub_graph
+
+
+def _event_manager(timestamp: datetime.datetime):
+    config = AppConfig(
+        categories=[
+            CategoryConfig(
+                name="morning",
+                todos=[
+                    TodoConfig(
+                        title="coffee",
+                        depends_on_events={"wake": TimeDependency(start=600)},
+                    )
+                ],
+            )
+        ]
+    )
+    dep_man = DependencyManager(config)
+    dep_man.load_from_db(
+        [Category(id=1, name="morning", todos=[Todo(id=1, title="coffee")])],
+        [Event(id=1, name="wake", timestamp=timestamp)],
+    )
+    return dep_man
+
+
+def test_cached_timeslots():
+    wake = datetime.datetime.now().replace(microsecond=0)
+    dep_man = _event_manager(wake)
+    timeslots = dep_man.cached_timeslots()
+    assert timeslots[1].start == wake + datetime.timedelta(seconds=600)
+    assert dep_man.cached_timeslots() is timeslots
+
+
+def test_cached_timeslots_invalidated_by_event():
+    wake = datetime.datetime.now().replace(microsecond=0)
+    dep_man = _event_manager(wake)
+    timeslots = dep_man.cached_timeslots()
+    later = wake + datetime.timedelta(hours=1)
+    dep_man.update_event(Event(id=1, name="wake", timestamp=later))
+    assert dep_man.cached_timeslots() is not timeslots
+    assert dep_man.cached_timeslots()[1].start == later + datetime.timedelta(
+        seconds=600
+    )
+
+
+def test_cached_timeslots_roll_over_at_midnight():
+    dep_man = _event_manager(datetime.datetime.now())
+    timeslots = dep_man.cached_timeslots()
+    dep_man._timeslots_day = datetime.date.today() - datetime.timedelta(days=1)
+    assert dep_man.cached_timeslots() is not timeslots
+
+
+def test_out_of_range_computed_section_is_ignored():
+    config = AppConfig(
+        categories=[
+            CategoryConfig(
+                name="morning",
+                todos=[
+                    TodoConfig(
+                        title="coffee",
+                        depends_on_events={"wake": TimeDependency(start=600)},
+                        depends_on_compute_times=[
+                            ComputeTimeDependency(name="slots", index=5)
+                        ],
+                    )
+                ],
+            )
+        ],
+        computed_times=[
+            ComputeTimeConfig(
+                name="slots",
+                src_event="wake",
+                end_time=72000,
+                sections=2,
+                minimum_window=0,
+            )
+        ],
+    )
+    dep_man = DependencyManager(config)
+    wake = datetime.datetime.now().replace(microsecond=0)
+    dep_man.load_from_db(
+        [Category(id=1, name="morning", todos=[Todo(id=1, title="coffee")])],
+        [Event(id=1, name="wake", timestamp=wake)],
+    )
+    # The bad section is dropped, so the explicit event dependency still applies
+    assert dep_man.cached_timeslots()[1].start == wake + datetime.timedelta(seconds=600)
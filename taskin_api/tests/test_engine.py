@@ -0,0 +1,42 @@
+import sys
+from pathlib import Path
+
+from sqlalchemy import text
+
+# Add parent directory to path to allow imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from models import (
+    DB_BUSY_TIMEOUT_MS,
+    DB_CACHE_SIZE_KB,
+    DB_JOURNAL_MODE,
+    DB_MMAP_SIZE,
+    DB_SYNCHRONOUS,
+    create_sqlite_engine,
+)
+
+SYNCHRONOUS_LEVELS = {"OFF": 0, "NORMAL": 1, "FULL": 2, "EXTRA": 3}
+
+
+def test_pragmas_applied_to_every_connection(tmp_path):
+    engine = create_sqlite_engine(f"sqlite:///{tmp_path / 'taskin.db'}")
+    with engine.connect() as first, engine.connect() as second:
+        for conn in (first, second):
+            pragmas = {
+                name: conn.execute(text(f"PRAGMA {name}")).scalar()
+                for name in (
+                    "journal_mode",
+                    "synchronous",
+                    "cache_size",
+                    "mmap_size",
+                    "busy_timeout",
+                )
+            }
+            assert pragmas == {
+                "journal_mode": DB_JOURNAL_MODE.lower(),
+                "synchronous": SYNCHRONOUS_LEVELS[DB_SYNCHRONOUS.upper()],
+                "cache_size": -DB_CACHE_SIZE_KB,
+                "mmap_size": DB_MMAP_SIZE,
+                "busy_timeout": DB_BUSY_TIMEOUT_MS,
+            }
+    engine.dispose()
@@ -0,0 +1,84 @@
+import datetime
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi import HTTPException, Request, Response
+from fastapi.routing import APIRoute
+
+# Add parent directory to path to allow imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from api import categories, dependencies, oneoffs, todos
+from deps import TimeslotContext, state_etag, timed_state_etag
+from schemas import Timeslot
+from state_signals import StateChange, state_signals
+
+MORNING = datetime.datetime(2025, 1, 1, 8, 0)
+
+
+def _request(if_none_match: str | None = None) -> Request:
+    headers = []
+    if if_none_match is not None:
+        headers.append((b"if-none-match", if_none_match.encode()))
+    return Request({"type": "http", "method": "GET", "headers": headers})
+
+
+def _etag(dependency=state_etag, **kwargs) -> str:
+    response = Response()
+    dependency(_request(), response, **kwargs)
+    assert response.headers["Cache-Control"] == "no-cache"
+    return response.headers["ETag"]
+
+
+def test_state_etag_not_modified():
+    etag = _etag()
+    with pytest.raises(HTTPException) as exc_info:
+        state_etag(_request(f'"other", W/{etag}'), Response())
+    assert exc_info.value.status_code == 304
+    assert exc_info.value.headers == {"ETag": etag}
+
+
+def test_state_etag_changes_with_every_mutation():
+    etag = _etag()
+    state_signals.emit(StateChange.status)
+    changed = _etag()
+    assert changed != etag
+    response = Response()
+    state_etag(_request(etag), response)  # stale copy gets the full response
+    assert response.headers["ETag"] == changed
+
+
+def test_timed_state_etag_follows_windows():
+    table = {1: Timeslot(start=MORNING, end=MORNING + datetime.timedelta(hours=1))}
+
+    def etag_at(now: datetime.datetime) -> str:
+        return _etag(timed_state_etag, timeslots=TimeslotContext(table, now))
+
+    before = etag_at(MORNING - datetime.timedelta(minutes=1))
+    assert etag_at(MORNING - datetime.timedelta(seconds=1)) == before
+    inside = etag_at(MORNING)
+    assert inside != before
+    assert etag_at(MORNING + datetime.timedelta(hours=1)) == inside
+    assert etag_at(MORNING + datetime.timedelta(hours=1, seconds=1)) != inside
+
+
+@pytest.mark.parametrize(
+    "router,path,dependency",
+    [
+        (categories.router, "/categories", state_etag),
+        (oneoffs.router, "/oneoff-todos", state_etag),
+        (todos.router, "/recommended-todos", timed_state_etag),
+        (dependencies.router, "/dependency-graph", timed_state_etag),
+    ],
+)
+def test_etag_resolved_before_other_dependencies(router, path, dependency):
+    route = next(
+        route
+        for route in router.routes
+        if isinstance(route, APIRoute)
+        and route.path == path
+        and route.methods
+        and "GET" in route.methods
+    )
+    assert route.dependant.dependencies[0].call is dependency
@@ -0,0 +1,130 @@
+import asyncio
+import datetime
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path to allow imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from deps import TimeslotContext
+from notifier_service import RecommendedTodosNotifier
+from schemas import Timeslot
+from state_signals import StateChange, state_signals
+
+
+class FakeNotifier(RecommendedTodosNotifier):
+    """Notifier with a settable recommended list that counts checks and sends"""
+
+    def __init__(self):
+        super().__init__(None)
+        self.recommended: set[int] = {1}
+        self.checks = 0
+        self.sent = 0
+
+    async def _get_recommended_todo_ids(self) -> set[int]:
+        self.checks += 1
+        return set(self.recommended)
+
+    def _send_webhook_notification(self):
+        self.sent += 1
+
+    def _seconds_to_next_boundary(self) -> float:
+        return 3600.0
+
+
+@pytest.fixture
+def notifier():
+    return FakeNotifier()
+
+
+async def _settle():
+    for _ in range(20):
+        await asyncio.sleep(0.01)
+
+
+def _run(notifier, scenario):
+    async def main():
+        task = asyncio.create_task(notifier.run())
+        await _settle()
+        try:
+            await scenario()
+        finally:
+            notifier.stop()
+            await task
+
+    asyncio.run(main())
+
+
+def test_notifier_idle_does_no_work(notifier):
+    async def scenario():
+        await _settle()
+
+    _run(notifier, scenario)
+    assert notifier.checks == 1  # baseline only
+    assert notifier.sent == 0
+
+
+def test_notifier_event_change_notifies(notifier):
+    async def scenario():
+        notifier.recommended = {1, 2}
+        state_signals.emit(StateChange.event)
+        await _settle()
+
+    _run(notifier, scenario)
+    assert notifier.checks == 2
+    assert notifier.sent == 1
+
+
+def test_notifier_status_change_moves_baseline(notifier):
+    async def scenario():
+        notifier.recommended = {2}
+        state_signals.emit(StateChange.status)
+        await _settle()
+        state_signals.emit(StateChange.oneoff)
+        await _settle()
+
+    _run(notifier, scenario)
+    assert notifier.checks == 3
+    assert notifier.sent == 0
+
+
+def test_notifier_wakes_at_boundary(notifier, monkeypatch):
+    monkeypatch.setattr(notifier, "_seconds_to_next_boundary", lambda: 0.05)
+
+    async def scenario():
+        notifier.recommended = {1, 3}
+        await asyncio.sleep(0.2)
+
+    _run(notifier, scenario)
+    assert notifier.checks >= 2
+    assert notifier.sent == 1
+
+
+def test_notifier_unsubscribes_on_stop(notifier):
+    async def scenario():
+        pass
+
+    _run(notifier, scenario)
+    state_signals.emit(StateChange.event)  # must not touch the closed loop
+    assert notifier.checks == 1
+
+
+def test_next_boundary():
+    now = datetime.datetime(2025, 1, 1, 12, 0)
+    context = TimeslotContext(
+        {
+            1: Timeslot(start=now - datetime.timedelta(hours=1), end=None),
+            2: Timeslot(start=None, end=now + datetime.timedelta(hours=3)),
+            3: Timeslot(start=now + datetime.timedelta(hours=2), end=None),
+        },
+        now,
+    )
+    assert context.next_boundary() == now + datetime.timedelta(hours=2)
+
+
+def test_next_boundary_defaults_to_midnight():
+    now = datetime.datetime(2025, 1, 1, 12, 0)
+    context = TimeslotContext({1: Timeslot(start=None, end=None)}, now)
+    assert context.next_boundary() == datetime.datetime(2025, 1, 2)
@@ -0,0 +1,214 @@
+import asyncio
+import datetime
+import sys
+from pathlib import Path
+
+import pytest
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+# Add parent directory to path to allow imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from api.categories import get_categories, get_category
+from api.dependencies import get_dependency_graph
+from api.reports import get_report
+from api.todos import get_todo, get_todos
+from config_loader import AppConfig
+from dep_manager import DependencyManager
+from deps import TimeslotContext
+from models import (
+    Base,
+    Category,
+    Report,
+    TaskReport,
+    TaskStatus,
+    Todo,
+    create_async_sqlite_engine,
+    create_sqlite_engine,
+)
+from schemas import (
+    CategoryWithTodos,
+    DependencyGraph,
+    NodeType,
+    ResetReportResponse,
+    TodoWithCategory,
+)
+
+CATEGORIES = 5
+TODOS_PER_CATEGORY = 8
+REPORTS = 10
+
+
+@pytest.fixture
+def db_url(tmp_path):
+    url = f"sqlite:///{tmp_path / 'taskin.db'}"
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    with Session(engine) as session:
+        for cid in range(1, CATEGORIES + 1):
+            session.add(Category(id=cid, name=f"category-{cid}"))
+            session.add_all(
+                [
+                    Todo(title=f"todo-{cid}-{i}", category_id=cid)
+                    for i in range(TODOS_PER_CATEGORY)
+                ]
+            )
+        for day in range(REPORTS):
+            report = Report(
+                created_at=datetime.datetime(2025, 1, 1 + day, 21),
+                total_todos=2,
+                completed_todos=1,
+                skipped_todos=0,
+                incomplete_todos=1,
+            )
+            report.task_reports = [
+                TaskReport(
+                    todo_id=tid,
+                    todo_title=f"todo-{tid}",
+                    category_name="category-1",
+                    final_status=status,
+                )
+                for tid, status in (
+                    (1, TaskStatus.complete),
+                    (2, TaskStatus.incomplete),
+                )
+            ]
+            session.add(report)
+        session.commit()
+    engine.dispose()
+    return url
+
+
+class QueryCounter:
+    """Count the statements executed on an engine"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def before_cursor_execute(self, conn, cursor, statement, *args):
+        self.count += 1
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self.before_cursor_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self.before_cursor_execute)
+
+
+def _count_queries(db_url, read):
+    """Run read and serialise its result, returning (result, statements executed)"""
+    engine = create_sqlite_engine(db_url)
+    try:
+        with QueryCounter(engine) as counter, Session(engine) as db:
+            result = read(db)
+    finally:
+        engine.dispose()
+    return result, counter.count
+
+
+def _count_async_queries(db_url, read):
+    """Async counterpart of _count_queries, for endpoints on an AsyncSession"""
+
+    async def main():
+        engine = create_async_sqlite_engine(db_url)
+        try:
+            with QueryCounter(engine.sync_engine) as counter:
+                async with AsyncSession(engine, expire_on_commit=False) as db:
+                    result = await read(db)
+        finally:
+            await engine.dispose()
+        return result, counter.count
+
+    return asyncio.run(main())
+
+
+def test_get_categories_query_count(db_url):
+    adapter = TypeAdapter(list[CategoryWithTodos])
+
+    async def read_all(db):
+        return adapter.validate_python(await get_categories(db=db))
+
+    result, queries = _count_async_queries(db_url, read_all)
+    assert len(result) == CATEGORIES
+    assert all(len(c.todos) == TODOS_PER_CATEGORY for c in result)
+    assert queries == 2
+
+    async def read_one(db):
+        return TypeAdapter(CategoryWithTodos).validate_python(
+            await get_category(2, db=db)
+        )
+
+    result, queries = _count_async_queries(db_url, read_one)
+    assert len(result.todos) == TODOS_PER_CATEGORY
+    assert queries == 2
+
+
+def test_get_todos_query_count(db_url):
+    adapter = TypeAdapter(list[TodoWithCategory])
+
+    async def read_all(db):
+        return adapter.validate_python(await get_todos(db=db))
+
+    result, queries = _count_async_queries(db_url, read_all)
+    assert len(result) == CATEGORIES * TODOS_PER_CATEGORY
+    assert all(todo.category.id == todo.category_id for todo in result)
+    assert queries == 1
+
+    async def read_category(db):
+        return adapter.validate_python(await get_todos(category_id=3, db=db))
+
+    result, queries = _count_async_queries(db_url, read_category)
+    assert {todo.category.name for todo in result} == {"category-3"}
+    assert queries == 1
+
+    async def read_one(db):
+        return TypeAdapter(TodoWithCategory).validate_python(await get_todo(5, db=db))
+
+    result, queries = _count_async_queries(db_url, read_one)
+    assert result.category.id == 1
+    assert queries == 1
+
+
+def test_get_report_query_count(db_url):
+    adapter = TypeAdapter(list[ResetReportResponse])
+    result, queries = _count_queries(
+        db_url,
+        lambda db: adapter.validate_python(
+            get_report(
+                datetime.datetime(2025, 1, 1), datetime.datetime(2025, 2, 1), db=db
+            )
+        ),
+    )
+    assert len(result) == REPORTS
+    assert all(len(report.task_reports) == 2 for report in result)
+    assert queries == 2
+
+
+def test_get_dependency_graph_query_count(db_url, monkeypatch):
+    dep_man = DependencyManager(AppConfig(categories=[]))
+    engine = create_engine(db_url)
+    with Session(engine) as db:
+        dep_man.load_from_db(db.query(Category).all(), [])
+    engine.dispose()
+    monkeypatch.setattr("api.dependencies.dep_man", dep_man)
+
+    result, queries = _count_queries(
+        db_url,
+        lambda db: DependencyGraph.model_validate(
+            get_dependency_graph(
+                db=db,
+                graph_type="full",
+                filter_time_deps=False,
+                timeslots=TimeslotContext({}, datetime.datetime.now()),
+            )
+        ),
+    )
+    todos = [node for node in result.nodes if node.node_type == NodeType.todo]
+    assert len(todos) == CATEGORIES * TODOS_PER_CATEGORY
+    # Todos with their categories, categories and one-offs
+    assert queries == 3
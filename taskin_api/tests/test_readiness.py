@@ -0,0 +1,163 @@
+import datetime
+import random
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+# Add parent directory to path to allow imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from dep_manager import BitsetDDM, DependencyManager, Graph
+from deps import TimeslotContext
+from models import Base, Category, OneOffTodo, TaskStatus, Todo
+from readiness import ReadinessEngine
+from schemas import Timeslot
+from status_store import StatusStore
+
+ONEOFF = DependencyManager.ONEOFF_START_ID
+MORNING = datetime.datetime(2025, 1, 1, 6, 0)
+
+
+def _random_graph(rng: random.Random, size: int = 40) -> Graph:
+    """A random DAG: todos only depend on lower ids, and on categories below them"""
+    graph = Graph()
+    cids = [tid // 5 + 1 for tid in range(size)]
+    for tid in range(1, size + 1):
+        graph.add_todo(tid, cids[tid - 1])
+    graph.add_todo(ONEOFF, DependencyManager.ONEOFF_END_ID)
+    for tid in range(2, size + 1):
+        for dep in rng.sample(range(1, tid), min(tid - 1, rng.choice([0, 1, 1, 2]))):
+            graph.add_dep_node(tid, dep)
+        below = [cid for cid in set(cids[: tid - 1]) if cid < cids[tid - 1]]
+        if below and rng.random() < 0.2:
+            graph.add_cat_dep(tid, rng.choice(below))
+        if tid > size // 2 and rng.random() < 0.15:
+            graph.add_cat_dep(tid, DependencyManager.ONEOFF_END_ID)
+    for dep in rng.sample(range(1, size // 2), 2):
+        graph.add_dep_node(ONEOFF, dep)
+    graph.build_ddm()
+    graph.dedupe()
+    return graph
+
+
+def _random_timeslots(rng: random.Random, size: int) -> dict[int, Timeslot]:
+    timeslots = {}
+    for tid in rng.sample(range(1, size + 1), size // 4):
+        start = MORNING + datetime.timedelta(minutes=rng.randint(0, 600))
+        timeslots[tid] = Timeslot(
+            start=rng.choice([None, start]),
+            end=start + datetime.timedelta(minutes=rng.randint(0, 300)),
+        )
+    return timeslots
+
+
+def _expected_ready(
+    graph: Graph, open_tids: set[int], oneoffs_open: bool, timeslots: TimeslotContext
+) -> set[int]:
+    """The bitset check get_recommended_todos did before the engine"""
+    ddm = BitsetDDM.from_ddm(graph.ddm)
+    blocking = {tid for tid in open_tids if timeslots.in_window(tid)}
+    blocking_mask = ddm.mask_of(blocking)
+    if oneoffs_open:
+        blocking_mask |= ddm.mask_of((ONEOFF,))
+    return {tid for tid in blocking if not ddm.get_mask(tid) & blocking_mask}
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_engine_matches_bitset_check(seed):
+    rng = random.Random(seed)
+    size = 40
+    graph = _random_graph(rng, size)
+    open_tids = {tid for tid in range(1, size + 1) if rng.random() < 0.7}
+    oneoffs_open = True
+    table = _random_timeslots(rng, size)
+    now = MORNING
+
+    engine = ReadinessEngine()
+    engine.reset(open_tids, oneoffs_open)
+    for _ in range(300):
+        action = rng.random()
+        if action < 0.6:
+            tid = rng.randint(1, size)
+            is_open = rng.random() < 0.5
+            if is_open:
+                open_tids.add(tid)
+            else:
+                open_tids.discard(tid)
+            engine.set_open(tid, is_open)
+        elif action < 0.7:
+            oneoffs_open = not oneoffs_open
+            engine.set_oneoffs_open(oneoffs_open)
+        elif action < 0.9:
+            now += datetime.timedelta(minutes=rng.randint(0, 40))
+        elif action < 0.97:
+            table = _random_timeslots(rng, size)  # an event fired
+        else:
+            graph = _random_graph(rng, size)  # config reloaded
+
+        timeslots = TimeslotContext(table, now)
+        engine.sync(graph, timeslots)
+        assert engine.ready == _expected_ready(
+            graph, open_tids, oneoffs_open, timeslots
+        )
+
+
+def test_engine_window_edges_are_inclusive():
+    graph = Graph()
+    graph.add_todo(1, 1)
+    graph.add_todo(2, 1)
+    graph.add_dep_node(2, 1)
+    graph.build_ddm()
+    end = MORNING + datetime.timedelta(hours=1)
+    table = {1: Timeslot(start=MORNING, end=end)}
+    engine = ReadinessEngine()
+    engine.reset({1, 2}, False)
+
+    engine.sync(graph, TimeslotContext(table, MORNING - datetime.timedelta(seconds=1)))
+    assert engine.ready == {2}
+    engine.sync(graph, TimeslotContext(table, MORNING))
+    assert engine.ready == {1}
+    engine.sync(graph, TimeslotContext(table, end))
+    assert engine.ready == {1}
+    engine.sync(graph, TimeslotContext(table, end + datetime.timedelta(seconds=1)))
+    assert engine.ready == {2}
+
+
+def test_store_keeps_recommendations_current():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    with Session(engine) as session:
+        session.add(Category(id=1, name="morning"))
+        session.add_all([Todo(id=i, title=f"todo-{i}", category_id=1) for i in (1, 2)])
+        session.add(OneOffTodo(id=1, title="oneoff-1"))
+        session.commit()
+        store = StatusStore()
+        store.load(session)
+    engine.dispose()
+
+    graph = Graph()
+    graph.add_todo(1, 1)
+    graph.add_todo(2, 1)
+    graph.add_todo(ONEOFF, DependencyManager.ONEOFF_END_ID)
+    graph.add_dep_node(2, 1)
+    graph.add_cat_dep(1, DependencyManager.ONEOFF_END_ID)
+    graph.build_ddm()
+    timeslots = TimeslotContext({}, MORNING)
+
+    def recommended():
+        return [todo.id for todo in store.recommended_todos(graph, timeslots)]
+
+    assert recommended() == []
+    with store.editing():
+        store.edit_oneoff(1).status = TaskStatus.complete
+    assert recommended() == [1]
+    with store.editing():
+        store.edit_todo(1).status = TaskStatus.skipped
+    assert recommended() == [2]
+    store.remove_oneoff(1)
+    with store.editing():
+        store.edit_todo(1).status = TaskStatus.in_progress
+    assert recommended() == [1]
@@ -0,0 +1,227 @@
+import datetime
+import random
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+# Add parent directory to path to allow imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from api.reset import bulk_reset
+from models import Base, Category, Report, TaskReport, TaskStatus, Todo
+
+NOW = datetime.datetime(2025, 6, 1, 21, 30, 15, 250000)
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    with Session(engine) as session:
+        yield session
+    engine.dispose()
+
+
+def _populate(db: Session, seed: int, count: int = 60):
+    rng = random.Random(seed)
+    categories = [Category(id=i + 1, name=f"cat-{i}") for i in range(3)]
+    db.add_all(categories)
+    for i in range(count):
+        status = rng.choice(list(TaskStatus))
+        in_progress_start = None
+        if status == TaskStatus.in_progress and rng.random() < 0.8:
+            in_progress_start = NOW - datetime.timedelta(
+                seconds=rng.randint(1, 7200), microseconds=rng.randint(0, 999999)
+            )
+        db.add(
+            Todo(
+                id=i + 1,
+                title=f"todo-{i}",
+                status=status,
+                # Category 99 does not exist, which reports as "Unknown"
+                category_id=rng.choice([1, 2, 3, 99]),
+                reset_interval=rng.randint(1, 4),
+                reset_count=rng.choice([0, 0, rng.randint(1, 3)]),
+                in_progress_start=in_progress_start,
+                cumulative_in_progress_seconds=rng.choice([0.0, rng.uniform(1, 500)]),
+            )
+        )
+    db.commit()
+
+
+def _legacy_reset(db: Session, now: datetime.datetime):
+    """The per-row reset that bulk_reset replaced"""
+    todos = db.query(Todo).all()
+    report = Report(
+        created_at=now,
+        total_todos=len([todo for todo in todos if todo.reset_count == 0]),
+        completed_todos=0,
+        skipped_todos=0,
+        incomplete_todos=0,
+    )
+    db.add(report)
+    db.flush()
+    total_todos = 0
+    for todo in todos:
+        if todo.reset_count == 0:
+            in_progress_duration = todo.cumulative_in_progress_seconds
+            if (
+                todo.status == TaskStatus.in_progress
+                and todo.in_progress_start is not None
+            ):
+                in_progress_duration += (now - todo.in_progress_start).total_seconds()
+            if in_progress_duration == 0:
+                in_progress_duration = None
+            if todo.status == TaskStatus.complete:
+                report.completed_todos += 1
+                final_status = TaskStatus.complete
+            elif todo.status == TaskStatus.skipped:
+                report.skipped_todos += 1
+                final_status = TaskStatus.skipped
+            else:
+                report.incomplete_todos += 1
+                final_status = TaskStatus.incomplete
+            db.add(
+                TaskReport(
+                    report_id=report.id,
+                    todo_id=todo.id,
+                    todo_title=todo.title,
+                    category_name=todo.category.name if todo.category else "Unknown",
+                    final_status=final_status,
+                    in_progress_duration_seconds=in_progress_duration,
+                )
+            )
+        if todo.status in (TaskStatus.skipped, TaskStatus.in_progress):
+            todo.status = TaskStatus.incomplete
+            todo.reset_count = 0
+        elif todo.status == TaskStatus.complete:
+            todo.reset_count += 1
+            if todo.reset_count % todo.reset_interval == 0:
+                todo.status = TaskStatus.incomplete
+                todo.reset_count = 0
+        if todo.status == TaskStatus.incomplete:
+            total_todos += 1
+        todo.in_progress_start = None
+        todo.cumulative_in_progress_seconds = 0.0
+    return report, len(todos), total_todos
+
+
+def _snapshot(db: Session, report: Report):
+    db.expire_all()
+    todos = [
+        (
+            todo.id,
+            todo.status,
+            todo.reset_count,
+            todo.in_progress_start,
+            todo.cumulative_in_progress_seconds,
+        )
+        for todo in db.query(Todo).order_by(Todo.id)
+    ]
+    task_reports = [
+        (
+            task.todo_id,
+            task.todo_title,
+            task.category_name,
+            task.final_status,
+            task.in_progress_duration_seconds,
+        )
+        for task in db.query(TaskReport)
+        .filter(TaskReport.report_id == report.id)
+        .order_by(TaskReport.todo_id)
+    ]
+    counts = (
+        report.total_todos,
+        report.completed_todos,
+        report.skipped_todos,
+        report.incomplete_todos,
+    )
+    return todos, task_reports, counts
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_bulk_reset_matches_legacy(seed):
+    results = []
+    for reset in (_legacy_reset, bulk_reset):
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(bind=engine)
+        with Session(engine) as db:
+            _populate(db, seed)
+            report, total, total_todos = reset(db, NOW)
+            db.commit()
+            results.append((_snapshot(db, report), total, total_todos))
+        engine.dispose()
+
+    (legacy, legacy_total, legacy_tasks), (bulk, bulk_total, bulk_tasks) = results
+    assert (bulk_total, bulk_tasks) == (legacy_total, legacy_tasks)
+    assert bulk[0] == legacy[0]
+    assert bulk[2] == legacy[2]
+    assert len(bulk[1]) == len(legacy[1])
+    for bulk_row, legacy_row in zip(bulk[1], legacy[1]):
+        assert bulk_row[:4] == legacy_row[:4]
+        if legacy_row[4] is None:
+            assert bulk_row[4] is None
+        else:
+            assert bulk_row[4] == pytest.approx(legacy_row[4], abs=1e-3)
+
+
+def test_bulk_reset_transitions(db):
+    db.add(Category(id=1, name="morning"))
+    db.add_all(
+        [
+            Todo(id=1, title="a", category_id=1, status=TaskStatus.skipped),
+            Todo(
+                id=2,
+                title="b",
+                category_id=1,
+                status=TaskStatus.in_progress,
+                in_progress_start=NOW - datetime.timedelta(minutes=10),
+                cumulative_in_progress_seconds=30.0,
+            ),
+            Todo(
+                id=3,
+                title="c",
+                category_id=1,
+                status=TaskStatus.complete,
+                reset_interval=3,
+            ),
+            Todo(
+                id=4,
+                title="d",
+                category_id=1,
+                status=TaskStatus.complete,
+                reset_interval=3,
+                reset_count=2,
+            ),
+            Todo(id=5, title="e", category_id=1, status=TaskStatus.incomplete),
+        ]
+    )
+    db.commit()
+
+    report, total, total_todos = bulk_reset(db, NOW)
+    db.commit()
+
+    todos = {todo.id: todo for todo in db.query(Todo)}
+    assert todos[1].status == TaskStatus.incomplete
+    assert todos[2].status == TaskStatus.incomplete
+    assert (todos[3].status, todos[3].reset_count) == (TaskStatus.complete, 1)
+    assert (todos[4].status, todos[4].reset_count) == (TaskStatus.incomplete, 0)
+    assert todos[2].in_progress_start is None
+    assert todos[2].cumulative_in_progress_seconds == 0.0
+    assert (total, total_todos) == (5, 4)
+
+    # Todo 4 was mid-interval, so it is not part of this report
+    assert (report.total_todos, report.completed_todos, report.skipped_todos) == (
+        4,
+        1,
+        1,
+    )
+    assert report.incomplete_todos == 2
+    durations = {
+        task.todo_id: task.in_progress_duration_seconds for task in db.query(TaskReport)
+    }
+    assert durations[2] == pytest.approx(630.0, abs=1e-3)
+    assert durations[1] is None
@@ -0,0 +1,287 @@
+import datetime
+import itertools
+import random
+import sys
+from pathlib import Path
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+# Add parent directory to path to allow imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from models import (
+    Base,
+    Report,
+    ReportRollup,
+    RollupPeriod,
+    TaskReport,
+    TaskStatRollup,
+    TaskStatus,
+)
+from rollups import (
+    aggregate_statistics,
+    query_statistics,
+    record_report,
+    split_range,
+)
+
+API_DIR = Path(__file__).parent.parent
+EPOCH = datetime.datetime(2024, 12, 20, 6, 0)
+TASKS = [("wake", "morning"), ("shower", "morning"), ("email", "work")]
+
+
+def _add_reports(db: Session, seed: int, days: int = 120, rollup: bool = True):
+    """One report a day (sometimes two or none) with a random outcome per task"""
+    rng = random.Random(seed)
+    for day in range(days):
+        for _ in range(rng.choice([0, 1, 1, 1, 2])):
+            created_at = EPOCH + datetime.timedelta(
+                days=day, seconds=rng.randint(0, 86399), microseconds=rng.randint(0, 1)
+            )
+            report = Report(
+                created_at=created_at,
+                total_todos=len(TASKS),
+                completed_todos=0,
+                skipped_todos=0,
+                incomplete_todos=0,
+            )
+            db.add(report)
+            db.flush()
+            for todo_id, (title, category) in enumerate(TASKS, start=1):
+                db.add(
+                    TaskReport(
+                        report_id=report.id,
+                        todo_id=todo_id,
+                        todo_title=title,
+                        category_name=category,
+                        final_status=rng.choice(list(TaskStatus)),
+                        in_progress_duration_seconds=rng.choice(
+                            [None, None, rng.uniform(1, 600)]
+                        ),
+                    )
+                )
+            db.flush()
+            if rollup:
+                record_report(db, report)
+    db.commit()
+
+
+def _legacy_statistics(db: Session, start: datetime.datetime, end: datetime.datetime):
+    """Aggregate the raw task reports the way the statistics endpoint used to"""
+    reports = (
+        db.query(Report)
+        .filter(Report.created_at >= start, Report.created_at <= end)
+        .all()
+    )
+    stats: dict[tuple[str, str], list] = {}
+    for report in reports:
+        for task in report.task_reports:
+            entry = stats.setdefault((task.todo_title, task.category_name), [0] * 6)
+            entry[0] += 1
+            if task.final_status == TaskStatus.complete:
+                entry[1] += 1
+            elif task.final_status == TaskStatus.skipped:
+                entry[2] += 1
+            else:
+                entry[3] += 1
+            duration = task.in_progress_duration_seconds
+            if duration is not None and duration > 0:
+                entry[4] += duration
+                entry[5] += 1
+    return len(reports), stats
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    with Session(engine) as session:
+        yield session
+    engine.dispose()
+
+
+def test_split_range_whole_month():
+    buckets, raw = split_range(
+        datetime.datetime(2025, 2, 1), datetime.datetime(2025, 3, 1)
+    )
+    assert buckets == [(RollupPeriod.month, datetime.datetime(2025, 2, 1))]
+    assert raw == []
+
+
+def test_split_range_mixed():
+    start = datetime.datetime(2025, 1, 25, 12, 30)
+    end = datetime.datetime(2025, 3, 12, 8, 0)
+    buckets, raw = split_range(start, end)
+    assert raw == [
+        (start, datetime.datetime(2025, 1, 26)),
+        (datetime.datetime(2025, 3, 12), end),
+    ]
+    assert buckets == [
+        *((RollupPeriod.day, datetime.datetime(2025, 1, day)) for day in range(26, 32)),
+        (RollupPeriod.month, datetime.datetime(2025, 2, 1)),
+        (RollupPeriod.day, datetime.datetime(2025, 3, 1)),
+        (RollupPeriod.day, datetime.datetime(2025, 3, 2)),
+        (RollupPeriod.week, datetime.datetime(2025, 3, 3)),
+        (RollupPeriod.day, datetime.datetime(2025, 3, 10)),
+        (RollupPeriod.day, datetime.datetime(2025, 3, 11)),
+    ]
+    # The pieces tile the range exactly
+    edges = sorted(
+        [(lo, hi) for lo, hi in raw]
+        + [
+            (bucket_start, bucket_start + datetime.timedelta(days=1))
+            if period == RollupPeriod.day
+            else (bucket_start, bucket_start + datetime.timedelta(days=7))
+            if period == RollupPeriod.week
+            else (bucket_start, datetime.datetime(2025, 3, 1))
+            for period, bucket_start in buckets
+        ]
+    )
+    assert edges[0][0] == start and edges[-1][1] == end
+    assert all(a[1] == b[0] for a, b in itertools.pairwise(edges))
+
+
+def test_split_range_bounded_by_months():
+    buckets, _ = split_range(
+        datetime.datetime(2023, 1, 4, 9), datetime.datetime(2025, 11, 20, 18)
+    )
+    months = sum(period == RollupPeriod.month for period, _ in buckets)
+    assert months == 33
+    assert len(buckets) - months < 2 * (6 + 4)
+
+
+def test_split_range_within_one_day():
+    start = datetime.datetime(2025, 1, 1, 8)
+    end = datetime.datetime(2025, 1, 1, 20)
+    assert split_range(start, end) == ([], [(start, end)])
+    assert split_range(end, start) == ([], [])
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_query_statistics_matches_raw(db, seed):
+    _add_reports(db, seed)
+    rng = random.Random(seed)
+    for _ in range(20):
+        start = EPOCH + datetime.timedelta(seconds=rng.randint(-86400, 86400 * 120))
+        end = start + datetime.timedelta(seconds=rng.randint(0, 86400 * 100))
+        report_count, expected = _legacy_statistics(db, start, end)
+        result = query_statistics(db, start, end)
+
+        assert result.report_count == report_count
+        got = {(ts.todo_title, ts.category_name): ts for ts in result.task_statistics}
+        assert got.keys() == expected.keys()
+        for key, (
+            appearances,
+            completed,
+            skipped,
+            incomplete,
+            secs,
+            used,
+        ) in expected.items():
+            ts = got[key]
+            assert ts.total_appearances == appearances
+            assert (ts.times_completed, ts.times_skipped, ts.times_incomplete) == (
+                completed,
+                skipped,
+                incomplete,
+            )
+            assert ts.completion_rate == pytest.approx(completed / appearances)
+            assert ts.tot_in_progress_duration_seconds == pytest.approx(secs)
+            assert ts.avg_in_progress_duration_seconds == pytest.approx(
+                secs / (used or 1)
+            )
+        assert result.total_completions == sum(v[1] for v in expected.values())
+        rates = [ts.completion_rate for ts in result.task_statistics]
+        assert rates == sorted(rates, reverse=True)
+
+
+def test_query_statistics_inclusive_end(db):
+    _add_reports(db, 0, days=10)
+    created = db.scalars(select(Report.created_at).order_by(Report.created_at)).all()
+    result = query_statistics(db, created[0], created[2])
+    assert result.report_count == 3
+
+
+def test_query_statistics_mixed_timezones(db):
+    _add_reports(db, 2, days=40)
+    start = EPOCH + datetime.timedelta(days=2, hours=3)
+    end = EPOCH + datetime.timedelta(days=35, hours=20)
+    expected = query_statistics(db, start, end)
+    # The same moments, one given as an aware local time
+    assert query_statistics(db, start.astimezone(), end) == expected
+    assert query_statistics(db, start, end.astimezone(datetime.UTC)) == expected
+
+
+def test_aggregate_statistics_raw_only(db):
+    _add_reports(db, 1, days=30, rollup=False)
+    start = EPOCH + datetime.timedelta(days=3, hours=5)
+    end = EPOCH + datetime.timedelta(days=21, hours=17)
+    report_count, expected = _legacy_statistics(db, start, end)
+    result = aggregate_statistics(db, [], [(start, end)])
+
+    assert result.report_count == report_count
+    assert {
+        (ts.todo_title, ts.category_name): [
+            ts.total_appearances,
+            ts.times_completed,
+            ts.times_skipped,
+            ts.times_incomplete,
+        ]
+        for ts in result.task_statistics
+    } == {key: entry[:4] for key, entry in expected.items()}
+
+
+def test_migration_backfills_rollups(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("ENV", "dev")
+    config = Config(str(API_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(API_DIR / "alembic"))
+    command.upgrade(config, "30677878a0ed")
+
+    engine = create_engine("sqlite:///./taskin.db")
+    with Session(engine) as db:
+        _add_reports(db, 3, days=60, rollup=False)
+    command.upgrade(config, "head")
+
+    live_engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=live_engine)
+    with Session(live_engine) as live:
+        _add_reports(live, 3, days=60)
+
+    def rollup_rows(session: Session):
+        task_rows = session.execute(
+            select(
+                TaskStatRollup.period,
+                TaskStatRollup.period_start,
+                TaskStatRollup.todo_title,
+                TaskStatRollup.category_name,
+                TaskStatRollup.appearances,
+                TaskStatRollup.times_completed,
+                TaskStatRollup.times_skipped,
+                TaskStatRollup.times_incomplete,
+                TaskStatRollup.in_progress_count,
+                TaskStatRollup.last_seen,
+            ).order_by(
+                TaskStatRollup.period,
+                TaskStatRollup.period_start,
+                TaskStatRollup.todo_title,
+            )
+        ).all()
+        report_rows = session.execute(
+            select(
+                ReportRollup.period,
+                ReportRollup.period_start,
+                ReportRollup.report_count,
+            ).order_by(ReportRollup.period, ReportRollup.period_start)
+        ).all()
+        return task_rows, report_rows
+
+    with Session(engine) as db, Session(live_engine) as live:
+        assert rollup_rows(db) == rollup_rows(live)
+        assert len(rollup_rows(db)[1]) > 0
+    engine.dispose()
+    live_engine.dispose()
@@ -0,0 +1,183 @@
+import asyncio
+import sys
+import threading
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+from sqlalchemy import event, select, update
+from sqlalchemy.orm import Session, sessionmaker
+
+# Add parent directory to path to allow imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from models import OneOffTodo, TaskStatus, Todo
+from status_store import StatusStore, apply_status
+
+
+@pytest.fixture
+def store(engine):
+    store = StatusStore(sessionmaker(bind=engine), flush_delay=0.01)
+    with Session(engine) as db:
+        store.load(db)
+    return store
+
+
+def _statuses(engine, model):
+    with Session(engine) as db:
+        return {row.id: row.status for row in db.query(model)}
+
+
+def _complete(store, todo_id):
+    with store.editing():
+        store.edit_todo(todo_id).status = TaskStatus.complete
+
+
+def _skip(store, todo_id):
+    with store.editing():
+        apply_status(store.edit_todo(todo_id), TaskStatus.skipped, datetime.now())
+
+
+def test_load(store):
+    assert list(store.todos) == [1, 2, 3]
+    assert store.todos[3].category.name == "work"
+    assert store.open_todo_ids() == {1, 2, 3}
+    assert store.open_oneoff_ids() == {1, 2, 3}
+    assert not store.pending
+
+
+def test_edits_update_open_sets(store):
+    with store.editing():
+        store.edit_todo(1).status = TaskStatus.complete
+        store.edit_todo(2).status = TaskStatus.in_progress
+        store.edit_oneoff(3).status = TaskStatus.complete
+    assert store.open_todo_ids() == {2, 3}
+    assert store.open_oneoff_ids() == {1, 2}
+    assert store.pending
+
+
+def test_copies_are_detached(store):
+    todos, oneoffs = store.copies([2, 99], [1])
+    assert [todo.id for todo in todos] == [2]
+    assert [item.id for item in oneoffs] == [1]
+    _complete(store, 2)
+    assert todos[0].status == TaskStatus.incomplete
+
+
+def test_flush_writes_one_batch_per_table(store, engine):
+    statements = []
+    event.listen(
+        engine,
+        "before_cursor_execute",
+        lambda conn, cursor, statement, *args: statements.append(statement),
+    )
+    with store.editing():
+        for tid in range(1, 4):
+            store.edit_todo(tid).status = TaskStatus.skipped
+    with store.editing():
+        store.edit_oneoff(2).title = "renamed"
+    store.flush()
+
+    assert len([s for s in statements if s.startswith("UPDATE")]) == 2
+    assert set(_statuses(engine, Todo).values()) == {TaskStatus.skipped}
+    with Session(engine) as db:
+        assert db.scalar(select(OneOffTodo.title).filter_by(id=2)) == "renamed"
+    assert not store.pending
+
+
+def test_background_flush(store, engine):
+    async def scenario():
+        store.start()
+        with store.editing():
+            store.edit_todo(2).status = TaskStatus.complete
+        await asyncio.sleep(0.2)
+        assert _statuses(engine, Todo)[2] == TaskStatus.complete
+
+        # Anything left is written on stop
+        with store.editing():
+            store.edit_todo(3).status = TaskStatus.complete
+        await store.stop()
+        assert _statuses(engine, Todo)[3] == TaskStatus.complete
+
+    asyncio.run(scenario())
+
+
+def test_failed_flush_keeps_changes(store, engine, monkeypatch):
+    with store.editing():
+        store.edit_todo(1).status = TaskStatus.complete
+
+    def broken_session():
+        raise RuntimeError("database unavailable")
+
+    monkeypatch.setattr(store, "session_factory", broken_session)
+    with pytest.raises(RuntimeError):
+        store.flush()
+    assert store.pending
+
+    monkeypatch.undo()
+    store.flush()
+    assert _statuses(engine, Todo)[1] == TaskStatus.complete
+
+
+def test_removed_oneoff_is_not_written(store, engine):
+    with store.editing():
+        store.edit_oneoff(1).status = TaskStatus.complete
+    assert store.remove_oneoff(1)
+    assert not store.remove_oneoff(1)
+    assert store.open_oneoff_ids() == {2, 3}
+    assert not store.pending
+
+
+def test_rewriting_flushes_then_reloads(store, engine):
+    with store.editing():
+        store.edit_todo(1).status = TaskStatus.complete
+    with Session(engine) as db, store.rewriting(db):
+        # The pending change reached the database before the rewrite
+        assert _statuses(engine, Todo)[1] == TaskStatus.complete
+        db.execute(update(Todo).values(status=TaskStatus.skipped))
+        db.commit()
+    assert {todo.status for todo in store.todos.values()} == {TaskStatus.skipped}
+    assert store.open_todo_ids() == set()
+
+
+def test_rewriting_leaves_the_store_usable(store, engine):
+    with Session(engine) as db, store.rewriting(db):
+        db.execute(update(Todo).values(status=TaskStatus.skipped))
+        # Other threads can still edit; the edit is newer than the rewrite
+        editor = threading.Thread(target=_complete, args=(store, 2))
+        editor.start()
+        editor.join(timeout=1)
+        assert not editor.is_alive()
+        db.commit()
+    assert [todo.status for todo in store.todos.values()] == [
+        TaskStatus.skipped,
+        TaskStatus.complete,
+        TaskStatus.skipped,
+    ]
+    assert store.pending
+    store.flush()
+    assert _statuses(engine, Todo)[2] == TaskStatus.complete
+
+
+def test_rewriting_replays_status_edits(store, engine):
+    with store.editing():
+        todo = store.edit_todo(2)
+        todo.status = TaskStatus.complete
+        todo.cumulative_in_progress_seconds = 120.0
+    with Session(engine) as db, store.rewriting(db):
+        # A reset that reports the time and counts the completion
+        db.execute(
+            update(Todo)
+            .filter_by(id=2)
+            .values(reset_count=1, cumulative_in_progress_seconds=0.0)
+        )
+        editor = threading.Thread(target=_skip, args=(store, 2))
+        editor.start()
+        editor.join(timeout=1)
+        db.commit()
+    store.flush()
+    with Session(engine) as db:
+        todo = db.get_one(Todo, 2)
+        assert todo.status == TaskStatus.skipped
+        assert todo.reset_count == 1
+        assert todo.cumulative_in_progress_seconds == 0.0
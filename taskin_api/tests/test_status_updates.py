@@ -0,0 +1,97 @@
+import asyncio
+import datetime
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+# Add parent directory to path to allow imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from api.oneoffs import update_oneoff_statuses
+from api.todos import apply_status, update_todo_statuses
+from models import OneOffTodo, TaskStatus, Todo
+from schemas import StatusUpdate
+from status_store import status_store
+
+
+def _statuses(engine, model):
+    with Session(engine) as db:
+        return {row.id: row.status for row in db.query(model)}
+
+
+def test_apply_status_tracks_in_progress_time():
+    start = datetime.datetime(2025, 1, 1, 9, 0)
+    todo = Todo(
+        status=TaskStatus.incomplete, reset_count=2, cumulative_in_progress_seconds=5.0
+    )
+    apply_status(todo, TaskStatus.in_progress, start)
+    assert todo.in_progress_start == start
+    apply_status(todo, TaskStatus.complete, start + datetime.timedelta(minutes=1))
+    assert todo.in_progress_start is None
+    assert todo.cumulative_in_progress_seconds == 65.0
+    apply_status(todo, TaskStatus.incomplete, start)
+    assert todo.reset_count == 0
+
+
+def test_update_todo_statuses(engine, live_store):
+    updated = asyncio.run(
+        update_todo_statuses(
+            [
+                StatusUpdate(id=2, status=TaskStatus.in_progress),
+                StatusUpdate(id=1, status=TaskStatus.complete),
+                StatusUpdate(id=2, status=TaskStatus.skipped),
+            ]
+        )
+    )
+    assert [(todo.id, todo.status) for todo in updated] == [
+        (2, TaskStatus.skipped),
+        (1, TaskStatus.complete),
+    ]
+    # Left in-progress within the same batch
+    assert updated[0].in_progress_start is None
+    assert status_store.open_todo_ids() == {3}
+
+    # Written behind, so the database catches up on flush
+    assert _statuses(engine, Todo)[2] == TaskStatus.incomplete
+    status_store.flush()
+    assert _statuses(engine, Todo) == {
+        1: TaskStatus.complete,
+        2: TaskStatus.skipped,
+        3: TaskStatus.incomplete,
+    }
+
+
+def test_update_todo_statuses_missing_is_atomic(live_store):
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(
+            update_todo_statuses(
+                [
+                    StatusUpdate(id=1, status=TaskStatus.complete),
+                    StatusUpdate(id=99, status=TaskStatus.complete),
+                ]
+            )
+        )
+    assert exc.value.status_code == 404
+    assert status_store.todos[1].status == TaskStatus.incomplete
+    assert not status_store.pending
+
+
+def test_update_oneoff_statuses(engine, live_store):
+    updated = asyncio.run(
+        update_oneoff_statuses(
+            [
+                StatusUpdate(id=1, status=TaskStatus.complete),
+                StatusUpdate(id=2, status=TaskStatus.in_progress),
+            ]
+        )
+    )
+    assert [(item.id, item.status) for item in updated] == [
+        (1, TaskStatus.complete),
+        (2, TaskStatus.in_progress),
+    ]
+    assert status_store.open_oneoff_ids() == {2, 3}
+    status_store.flush()
+    assert _statuses(engine, OneOffTodo)[1] == TaskStatus.complete
@@ -0,0 +1,119 @@
+import asyncio
+import json
+import sys
+from pathlib import Path
+from typing import Any, cast
+
+import pytest
+from fastapi import Request
+
+# Add parent directory to path to allow imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from models import TaskStatus
+from state_signals import StateChange, state_signals
+from status_store import status_store
+from stream_service import LiveStream
+
+pytestmark = pytest.mark.usefixtures("live_store")
+
+
+def _parse(message: str | None) -> tuple[str, Any]:
+    assert message is not None, "stream closed"
+    fields = dict(line.split(": ", 1) for line in message.strip().split("\n"))
+    return fields["event"], json.loads(fields["data"])
+
+
+def _drain(queue: asyncio.Queue) -> dict[str, Any]:
+    events = {}
+    while not queue.empty():
+        event, data = _parse(queue.get_nowait())
+        events[event] = data
+    return events
+
+
+def test_publish_sends_only_changes():
+    async def scenario():
+        stream = LiveStream()
+        queue = stream.subscribe()
+        stream.publish()
+        assert queue.empty()
+
+        with status_store.editing():
+            status_store.edit_todo(2).status = TaskStatus.complete
+            status_store.edit_oneoff(1).title = "renamed"
+        stream.publish()
+        events = _drain(queue)
+        assert [todo["id"] for todo in events["todos"]] == [2]
+        assert events["todos"][0]["status"] == "complete"
+        assert events["oneoffs"] == {
+            "changed": [
+                {
+                    "id": 1,
+                    "title": "renamed",
+                    "description": None,
+                    "status": "incomplete",
+                }
+            ],
+            "deleted": [],
+        }
+        assert events["recommended"] == {"todo_ids": [1, 3]}
+
+        status_store.remove_oneoff(1)
+        stream.publish()
+        assert _drain(queue) == {"oneoffs": {"changed": [], "deleted": [1]}}
+        stream.unsubscribe(queue)
+
+    asyncio.run(scenario())
+
+
+def test_slow_client_is_told_to_resync(monkeypatch):
+    monkeypatch.setattr(LiveStream, "QUEUE_SIZE", 2)
+
+    async def scenario():
+        stream = LiveStream()
+        queue = stream.subscribe()
+        for status in (TaskStatus.complete, TaskStatus.incomplete) * 2:
+            with status_store.editing():
+                status_store.edit_todo(1).status = status
+            stream.publish()
+        # Whatever was queued is dropped in favour of a full refetch
+        assert _parse(queue.get_nowait())[0] == "resync"
+        assert queue.qsize() < stream.QUEUE_SIZE
+
+    asyncio.run(scenario())
+
+
+def test_event_ids_are_state_tags():
+    async def scenario():
+        stream = LiveStream()
+        queue = stream.subscribe()
+        with status_store.editing():
+            status_store.edit_todo(1).status = TaskStatus.complete
+        state_signals.emit(StateChange.status)
+        stream.publish()
+        message = queue.get_nowait()
+        assert message is not None and message.startswith(
+            f"id: {state_signals.tag()}\n"
+        )
+
+    asyncio.run(scenario())
+
+
+def test_events_end_when_stream_stops():
+    class FakeRequest:
+        async def is_disconnected(self):
+            return False
+
+    async def scenario():
+        stream = LiveStream()
+        events = stream.events(cast(Request, FakeRequest()))
+        assert await anext(events) == "retry: 5000\n\n"
+        waiting = asyncio.ensure_future(anext(events))
+        await asyncio.sleep(0)
+        stream.stop()
+        with pytest.raises(StopAsyncIteration):
+            await waiting
+        assert not stream._clients
+
+    asyncio.run(scenario())
@@ -0,0 +1,101 @@
+import datetime
+import sys
+from pathlib import Path
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session, sessionmaker
+
+# Add parent directory to path to allow imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from api.reset import bulk_reset
+from change_log import changes_since, prune_change_log
+from models import (
+    ChangeEntity,
+    ChangeLog,
+    Event,
+    OneOffTodo,
+    TaskStatus,
+    Todo,
+)
+from status_store import StatusStore
+
+
+def _version(engine) -> int:
+    with Session(engine) as db:
+        return changes_since(db, 0).version
+
+
+def test_orm_changes_are_logged(engine):
+    with Session(engine) as db:
+        logged = db.execute(select(ChangeLog.entity, ChangeLog.entity_id)).all()
+    assert sorted(logged, key=lambda row: (row[0].value, row[1])) == [
+        (ChangeEntity.category, 1),
+        (ChangeEntity.category, 2),
+        (ChangeEntity.event, 1),
+        *((ChangeEntity.oneoff, i) for i in range(1, 4)),
+        *((ChangeEntity.todo, i) for i in range(1, 4)),
+    ]
+    since = _version(engine)
+
+    with Session(engine) as db:
+        db.add(OneOffTodo(id=4, title="milk"))
+        db.get_one(Todo, 2).description = "now with a description"
+        db.get_one(Event, 1).timestamp = datetime.datetime(2025, 1, 2)
+        db.get(Todo, 3)  # loaded but unchanged
+        db.commit()
+        db.delete(db.get_one(Todo, 1))
+        db.commit()
+
+    with Session(engine) as db:
+        changes = changes_since(db, since)
+    assert not changes.full
+    assert changes.version == since + 4
+    assert [todo.id for todo in changes.todos] == [2]
+    assert changes.todos[0].description == "now with a description"
+    assert [item.title for item in changes.oneoffs] == ["milk"]
+    assert [event.timestamp.day for event in changes.events] == [2]
+    assert changes.categories == []
+    assert changes.deleted.todos == [1]
+
+
+def test_unknown_or_pruned_versions_need_full_sync(engine):
+    latest = _version(engine)
+    with Session(engine) as db:
+        assert changes_since(db, 0).full
+        assert changes_since(db, latest + 1).full
+        assert not changes_since(db, latest).full
+        assert changes_since(db, latest).todos == []
+
+        # Age the log; pruning keeps the newest entry so the version survives
+        db.execute(update(ChangeLog).values(changed_at=datetime.datetime(2000, 1, 1)))
+        prune_change_log(db)
+        db.commit()
+        assert db.scalars(select(ChangeLog.id)).all() == [latest]
+        assert changes_since(db, latest).version == latest
+        assert not changes_since(db, latest - 1).full
+        assert changes_since(db, latest - 2).full
+
+
+def test_bulk_writes_are_logged(engine):
+    store = StatusStore(sessionmaker(bind=engine))
+    with Session(engine) as db:
+        store.load(db)
+    since = _version(engine)
+
+    with store.editing():
+        store.edit_todo(2).status = TaskStatus.complete
+    store.flush()
+    with Session(engine) as db:
+        changes = changes_since(db, since)
+    assert [(todo.id, todo.status) for todo in changes.todos] == [
+        (2, TaskStatus.complete)
+    ]
+
+    since = changes.version
+    with Session(engine) as db:
+        bulk_reset(db, datetime.datetime.now())
+        db.commit()
+        changes = changes_since(db, since)
+    assert [todo.id for todo in changes.todos] == [1, 2, 3]
+    assert changes.todos[1].status == TaskStatus.incomplete
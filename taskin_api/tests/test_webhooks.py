@@ -0,0 +1,176 @@
+import asyncio
+import json
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path to allow imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from webhooks import WebhookDispatcher
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length))
+        server = self.server
+        assert isinstance(server, StubServer)
+        with server.lock:
+            server.received.append((self.path, body))
+            status = server.statuses.pop(0) if server.statuses else 200
+        if server.delay:
+            server.release.wait(server.delay)
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    """Records the payloads posted to it and answers with queued statuses"""
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), StubHandler)
+        self.lock = threading.Lock()
+        self.received: list[tuple[str, dict]] = []
+        self.statuses: list[int] = []
+        self.delay: float = 0
+        self.release = threading.Event()
+        self.url = f"http://127.0.0.1:{self.server_address[1]}"
+
+
+@pytest.fixture
+def stub_server():
+    server = StubServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.release.set()
+    server.shutdown()
+    server.server_close()
+
+
+def _run(dispatcher: WebhookDispatcher, scenario):
+    async def main():
+        dispatcher.start()
+        try:
+            await scenario()
+        finally:
+            await dispatcher.stop()
+
+    asyncio.run(main())
+
+
+async def _wait_for(predicate, timeout: float = 5):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        if asyncio.get_running_loop().time() > deadline:
+            raise AssertionError("Timed out waiting for webhook delivery")
+        await asyncio.sleep(0.01)
+
+
+def test_send_delivers_payload(stub_server):
+    dispatcher = WebhookDispatcher()
+
+    async def scenario():
+        dispatcher.send(f"{stub_server.url}/hook", {"title": "milk"})
+        await _wait_for(lambda: stub_server.received)
+
+    _run(dispatcher, scenario)
+    assert stub_server.received == [("/hook", {"title": "milk"})]
+
+
+def test_send_does_not_block(stub_server):
+    stub_server.delay = 5
+    dispatcher = WebhookDispatcher()
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        dispatcher.send(stub_server.url, {"n": 1})
+        assert loop.time() - start < 0.5
+        await _wait_for(lambda: stub_server.received)
+        stub_server.release.set()
+
+    _run(dispatcher, scenario)
+
+
+def test_queued_before_start_is_delivered(stub_server):
+    dispatcher = WebhookDispatcher()
+    dispatcher.send(stub_server.url, {"n": 1})
+
+    async def scenario():
+        await _wait_for(lambda: stub_server.received)
+
+    _run(dispatcher, scenario)
+    assert stub_server.received == [("/", {"n": 1})]
+
+
+def test_per_url_ordering_and_coalescing(stub_server):
+    stub_server.delay = 5
+    dispatcher = WebhookDispatcher()
+
+    async def scenario():
+        dispatcher.send(stub_server.url, {"n": 1})
+        await _wait_for(lambda: stub_server.received)
+        # Queued while the first post is in flight
+        dispatcher.send(stub_server.url, {"n": 2})
+        dispatcher.send(stub_server.url, {"n": 2})
+        dispatcher.send(stub_server.url, {"n": 3})
+        stub_server.release.set()
+        await _wait_for(lambda: len(stub_server.received) == 3)
+
+    _run(dispatcher, scenario)
+    assert [body["n"] for _, body in stub_server.received] == [1, 2, 3]
+
+
+def test_retries_with_backoff(stub_server):
+    stub_server.statuses = [503, 500]
+    dispatcher = WebhookDispatcher(backoff_seconds=0.01)
+
+    async def scenario():
+        dispatcher.send(stub_server.url, {"n": 1})
+        await _wait_for(lambda: len(stub_server.received) == 3)
+
+    _run(dispatcher, scenario)
+    assert len(stub_server.received) == 3
+
+
+def test_client_errors_are_not_retried(stub_server):
+    stub_server.statuses = [400]
+    dispatcher = WebhookDispatcher(backoff_seconds=0.01)
+
+    async def scenario():
+        dispatcher.send(stub_server.url, {"n": 1})
+        dispatcher.send(stub_server.url, {"n": 2})
+        await _wait_for(lambda: len(stub_server.received) == 2)
+        await asyncio.sleep(0.1)
+
+    _run(dispatcher, scenario)
+    assert [body["n"] for _, body in stub_server.received] == [1, 2]
+
+
+def test_unreachable_url_gives_up(stub_server):
+    dispatcher = WebhookDispatcher(max_attempts=2, backoff_seconds=0.01, timeout=1)
+
+    async def scenario():
+        dispatcher.send("http://127.0.0.1:1/", {"n": 1})
+        dispatcher.send(stub_server.url, {"n": 2})
+        await _wait_for(lambda: stub_server.received)
+        await _wait_for(lambda: not dispatcher._active)
+
+    _run(dispatcher, scenario)
+    assert stub_server.received == [("/", {"n": 2})]
+
+
+def test_max_pending_drops_oldest():
+    dispatcher = WebhookDispatcher(max_pending=2)
+    for n in range(4):
+        dispatcher.send("http://127.0.0.1:1/", {"n": n})
+    assert list(dispatcher._pending["http://127.0.0.1:1/"]) == [{"n": 2}, {"n": 3}]
@@ -0,0 +1,151 @@
+"""
+Outbound webhook delivery.
+
+Webhooks are queued per URL and delivered by background tasks on the server's event
+loop, so request handlers and the notifier never wait on a remote endpoint. Posts go
+through a pooled requests session with bounded concurrency and retry with backoff.
+"""
+
+import asyncio
+import threading
+from collections import deque
+
+import requests
+import structlog
+from requests.adapters import HTTPAdapter
+
+RETRY_STATUSES = frozenset({408, 425, 429, 500, 502, 503, 504})
+
+
+class WebhookDispatcher:
+    """
+    Queue of outbound webhook posts, drained by one worker per URL.
+
+    Payloads queued for a URL while its worker is busy are sent back to back over the
+    same pooled connection, and identical consecutive payloads are coalesced.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 4,
+        max_attempts: int = 3,
+        backoff_seconds: float = 0.5,
+        timeout: float = 10,
+        max_pending: int = 100,
+    ):
+        self.logger = structlog.stdlib.get_logger().bind(module="webhooks")
+        self.max_concurrency = max_concurrency
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.timeout = timeout
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._pending: dict[str, deque[dict]] = {}
+        self._active: set[str] = set()
+        self._tasks: set[asyncio.Task] = set()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._semaphore: asyncio.Semaphore | None = None
+        self._session: requests.Session | None = None
+
+    def send(self, url: str, payload: dict):
+        """Queue a JSON payload for url. Safe to call from any thread."""
+        with self._lock:
+            queue = self._pending.setdefault(url, deque())
+            if queue and queue[-1] == payload:
+                return
+            if len(queue) >= self.max_pending:
+                dropped = queue.popleft()
+                self.logger.warning(
+                    "Webhook queue full, dropping oldest payload",
+                    webhook_url=url,
+                    payload=dropped,
+                )
+            queue.append(payload)
+            loop = self._loop
+            if loop is None or url in self._active:
+                return
+            self._active.add(url)
+        loop.call_soon_threadsafe(self._spawn, url)
+
+    def start(self):
+        """Start delivering on the running event loop, including anything queued."""
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.max_concurrency, pool_maxsize=self.max_concurrency
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        self._session = session
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        with self._lock:
+            self._loop = asyncio.get_running_loop()
+            urls = [url for url in self._pending if url not in self._active]
+            self._active.update(urls)
+        for url in urls:
+            self._spawn(url)
+
+    async def stop(self, timeout: float = 5):
+        """Stop accepting work, give in-flight deliveries time to finish, then cancel."""
+        with self._lock:
+            self._loop = None
+        tasks = list(self._tasks)
+        if tasks:
+            _, not_done = await asyncio.wait(tasks, timeout=timeout)
+            for task in not_done:
+                task.cancel()
+            await asyncio.gather(*not_done, return_exceptions=True)
+        with self._lock:
+            self._active.clear()
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+    def _spawn(self, url: str):
+        task = asyncio.get_running_loop().create_task(self._drain(url))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _drain(self, url: str):
+        assert self._semaphore is not None, "Dispatcher not started"
+        async with self._semaphore:
+            while True:
+                with self._lock:
+                    queue = self._pending.get(url)
+                    if not queue:
+                        self._pending.pop(url, None)
+                        self._active.discard(url)
+                        return
+                    payloads = list(queue)
+                    queue.clear()
+                for payload in payloads:
+                    await self._deliver(url, payload)
+
+    def _post(self, url: str, payload: dict) -> requests.Response:
+        assert self._session is not None, "Dispatcher not started"
+        return self._session.post(url, json=payload, timeout=self.timeout)
+
+    async def _deliver(self, url: str, payload: dict):
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                response = await asyncio.to_thread(self._post, url, payload)
+                if response.ok:
+                    return
+                error = f"HTTP {response.status_code}"
+                retryable = response.status_code in RETRY_STATUSES
+            except requests.exceptions.RequestException as e:
+                error = str(e)
+                retryable = True
+
+            if not retryable or attempt == self.max_attempts:
+                self.logger.error(
+                    "Failed to deliver webhook",
+                    error=error,
+                    webhook_url=url,
+                    attempts=attempt,
+                )
+                return
+            await asyncio.sleep(self.backoff_seconds * 2 ** (attempt - 1))
+
+
+# Global dispatcher, started and stopped with the application
+webhooks = WebhookDispatcher()
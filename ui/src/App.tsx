@@ -1,6 +1,6 @@
 import { useState, useEffect, useCallback, useRef, useMemo } from 'react';
 import { useLocation, useNavigate, Routes, Route, Navigate } from 'react-router-dom';
-import { CategoryWithTodos, TodoWithCategory, TaskStatus, OneOffTodo, Timeslot } from './types';
+import { CategoryWithTodos, TodoWithCategory, TaskStatus, OneOffTodo, Timeslot, SyncResponse } from './types';
 import { api } from './api';
 import { RefreshCw, RotateCcw, ListTodo, Sparkles, Moon, Sun, Plus, Menu, Network, FileText } from 'lucide-react';
 import { Collapsible, CollapsibleContent } from './components/ui/collapsible';
@@ -107,6 +107,7 @@ function App() {
     const LS_ONEOFFS = 'taskin_oneoffs';
     const LS_REC_ONEOFFS = 'taskin_rec_oneoffs';
     const LS_ONEOFFS_PENDING = 'taskin_oneoffs_pending';
+    const LS_SYNC_VERSION = 'taskin_sync_version';
 
     const saveCache = (cats: CategoryWithTodos[], rec: TodoWithCategory[]) => {
         try {
@@ -245,6 +246,81 @@ function App() {
         }
     };
 
+    // Catch up from the cached state: fetch only what changed since the last sync, or
+    // everything when there is no usable cache or the server no longer has the history
+    const syncData = async (initial = false) => {
+        const since = initial ? 0 : Number(localStorage.getItem(LS_SYNC_VERSION) || 0);
+        let delta: SyncResponse;
+        try {
+            delta = await api.sync(since);
+        } catch {
+            await loadData(initial);
+            return;
+        }
+        if (delta.full) {
+            // The version is taken before the reload, so anything that changes while it
+            // runs is sent again by the next sync
+            await loadData(initial);
+        } else {
+            applySync(delta);
+        }
+        try { localStorage.setItem(LS_SYNC_VERSION, String(delta.version)); } catch { }
+    };
+
+    const applySync = (delta: SyncResponse) => {
+        const { deleted } = delta;
+        const changedCount = delta.categories.length + delta.todos.length + delta.oneoffs.length + delta.events.length
+            + deleted.categories.length + deleted.todos.length + deleted.oneoffs.length + deleted.events.length;
+        if (changedCount === 0) return;
+
+        const changedCats = new Map(delta.categories.map(c => [c.id, c]));
+        const changedTodos = new Map(delta.todos.map(t => [t.id, t]));
+        const deletedCats = new Set(deleted.categories);
+        const deletedTodos = new Set(deleted.todos);
+        setCategories(prev => {
+            // Pull changed todos out of wherever they were, then file them by category
+            const next: CategoryWithTodos[] = prev
+                .filter(c => !deletedCats.has(c.id))
+                .map(c => ({
+                    ...c,
+                    ...changedCats.get(c.id),
+                    todos: c.todos.filter(t => !changedTodos.has(t.id) && !deletedTodos.has(t.id)),
+                }));
+            const known = new Set(next.map(c => c.id));
+            for (const c of delta.categories) {
+                if (!known.has(c.id)) next.push({ ...c, todos: [] });
+            }
+            for (const todo of delta.todos) {
+                const cat = next.find(c => c.id === todo.category_id);
+                if (cat) cat.todos.push(todo);
+            }
+            for (const cat of next) {
+                cat.todos.sort((a, b) => (a.position ?? 0) - (b.position ?? 0) || a.id - b.id);
+            }
+            try { localStorage.setItem(LS_CATEGORIES, JSON.stringify(next)); } catch { }
+            return next;
+        });
+
+        if (delta.oneoffs.length || deleted.oneoffs.length) {
+            const changed = new Map(delta.oneoffs.map(o => [o.id, o]));
+            const gone = new Set(deleted.oneoffs);
+            setOneOffs(prev => {
+                const kept = prev.filter(o => !gone.has(o.id));
+                const known = new Set(kept.map(o => o.id));
+                const next = [
+                    ...kept.map(o => changed.get(o.id) ?? o),
+                    ...delta.oneoffs.filter(o => !known.has(o.id)),
+                ];
+                try { localStorage.setItem(LS_ONEOFFS, JSON.stringify(next)); } catch { }
+                return next;
+            });
+        }
+
+        // Timeslots follow events and config; they are small, so just refetch them
+        api.getTimeslots().then(data => setTimeslots(data || {})).catch(() => { });
+        refreshRecommended();
+    };
+
     // On first load, if at root path, redirect to last tab or default recommended
     useEffect(() => {
         if (location.pathname === '/') {
@@ -313,7 +389,7 @@ function App() {
         } catch { }
 
         // Initial fetch in background
-        loadData(!localStorage.getItem(LS_CATEGORIES));
+        syncData(!localStorage.getItem(LS_CATEGORIES));
 
         const handleOnline = () => { setIsOnline(true); checkServerHealth(); };
         const handleOffline = () => { setIsOnline(false); setServerOnline(false); };
@@ -453,8 +529,23 @@ function App() {
         isProcessingRef.current = true;
         setIsSyncing(true);
         try {
-            // First process main todo status queue
+            // First process main todo status queue, in a single batch when possible
             let work = compressQueue(pendingQueue);
+            if (work.length > 1) {
+                try {
+                    await api.updateTodoStatuses(work);
+                    const sent = new Map<number, TaskStatus>(work.map(item => [item.id, item.status]));
+                    // Drop flushed items unless they were changed again meanwhile
+                    setPendingQueue(prev => {
+                        const next = compressQueue(prev).filter(q => sent.get(q.id) !== q.status);
+                        savePending(next);
+                        return next;
+                    });
+                    work = [];
+                } catch {
+                    // fall back to per-item updates so one bad id does not block the rest
+                }
+            }
             for (const item of work) {
                 if (!(navigator.onLine && serverOnline)) break;
                 try {
@@ -473,7 +564,28 @@ function App() {
             }
 
             // Then process one-off queue (compressed to final intents)
-            const workOps = compressOneOffOps(oneOffPending);
+            let workOps = compressOneOffOps(oneOffPending);
+            const statusOps = workOps.filter(
+                (op): op is Extract<OneOffOp, { kind: 'update' }> =>
+                    op.kind === 'update' && op.title === undefined && op.description === undefined && op.status !== undefined
+            );
+            if (statusOps.length > 1 && navigator.onLine && serverOnline) {
+                try {
+                    await api.updateOneOffStatuses(statusOps.map(op => ({ id: op.id, status: op.status as TaskStatus })));
+                    const sent = new Map<number, TaskStatus | undefined>(statusOps.map(op => [op.id, op.status]));
+                    // Drop flushed ops unless they were changed again meanwhile
+                    setOneOffPending(prev => {
+                        const next = compressOneOffOps(prev).filter(x => !(
+                            x.kind === 'update' && x.title === undefined && x.description === undefined && sent.get(x.id) === x.status
+                        ));
+                        saveOneOffPending(next);
+                        return next;
+                    });
+                    workOps = workOps.filter(op => !(op.kind === 'update' && sent.has(op.id)));
+                } catch {
+                    // fall back to per-item updates below
+                }
+            }
             for (const op of workOps) {
                 if (!(navigator.onLine && serverOnline)) break;
                 try {
@@ -551,21 +663,71 @@ function App() {
         return () => { cancelled = true; clearInterval(id); };
     }, [pendingQueue.length, oneOffPending.length, checkServerHealth, processPending]);
 
-    // Background refresh: poll the API every 30s without blocking UI
+    // Live updates: apply pushed todo and one-off changes, refetch the small recommended
+    // lists when they may have moved, and fall back to a full reload on (re)connect
+    const recommendedTimerRef = useRef<number | null>(null);
     useEffect(() => {
-        let cancelled = false;
-        const poll = async () => {
-            // Only refresh when online and server reachable
-            if (navigator.onLine && serverOnline && !cancelled) {
-                // Lightweight refresh; do not set loading spinner
-                loadData(false);
+        const scheduleRecommended = () => {
+            // One server change can arrive as several events; refetch once
+            if (recommendedTimerRef.current !== null) return;
+            recommendedTimerRef.current = window.setTimeout(() => {
+                recommendedTimerRef.current = null;
+                refreshRecommended();
+            }, 100);
+        };
+        const unsubscribe = api.subscribeToStream((event) => {
+            switch (event.type) {
+                case 'todos': {
+                    const changed = new Map(event.data.map(t => [t.id, t]));
+                    setCategories(prev => {
+                        const next = prev.map(c => c.todos.some(t => changed.has(t.id))
+                            ? { ...c, todos: c.todos.map(t => (changed.has(t.id) ? { ...t, ...changed.get(t.id) } : t)) }
+                            : c);
+                        try { localStorage.setItem(LS_CATEGORIES, JSON.stringify(next)); } catch { }
+                        return next;
+                    });
+                    setRecommendedTodos(prev => prev.map(t => (changed.has(t.id) ? { ...t, ...changed.get(t.id) } : t)));
+                    scheduleRecommended();
+                    break;
+                }
+                case 'oneoffs': {
+                    const changed = new Map(event.data.changed.map(o => [o.id, o]));
+                    const deleted = new Set(event.data.deleted);
+                    setOneOffs(prev => {
+                        const kept = prev.filter(o => !deleted.has(o.id));
+                        const known = new Set(kept.map(o => o.id));
+                        const next = [
+                            ...kept.map(o => changed.get(o.id) ?? o),
+                            ...event.data.changed.filter(o => !known.has(o.id)),
+                        ];
+                        try { localStorage.setItem(LS_ONEOFFS, JSON.stringify(next)); } catch { }
+                        return next;
+                    });
+                    scheduleRecommended();
+                    break;
+                }
+                case 'timeslots':
+                    api.getTimeslots().then(data => setTimeslots(data || {})).catch(() => { });
+                    scheduleRecommended();
+                    break;
+                case 'recommended':
+                    scheduleRecommended();
+                    break;
+                case 'resync':
+                    setServerOnline(true);
+                    syncData(false);
+                    break;
+            }
+        });
+        return () => {
+            unsubscribe();
+            if (recommendedTimerRef.current !== null) {
+                clearTimeout(recommendedTimerRef.current);
+                recommendedTimerRef.current = null;
             }
         };
-        // Initial slight delay to avoid clashing with first load
-        const first = setTimeout(poll, 5000);
-        const interval = setInterval(poll, 30000);
-        return () => { cancelled = true; clearTimeout(first); clearInterval(interval); };
-    }, [serverOnline]);
+        // eslint-disable-next-line react-hooks/exhaustive-deps
+    }, [refreshRecommended]);
 
     const handleStatusChange = async (id: number, status: TaskStatus) => {
         // Optimistic update locally
@@ -1,7 +1,33 @@
-import { CategoryWithTodos, TaskStatus, TodoWithCategory, OneOffTodo, DependencyGraph, ResetReport, AggregatedStatistics, Timeslot, EventItem } from './types';
+import { CategoryWithTodos, TaskStatus, TodoWithCategory, OneOffTodo, DependencyGraph, ResetReport, AggregatedStatistics, Timeslot, EventItem, StreamEvent, SyncResponse } from './types';
 
 const API_BASE = '/api';
 
+// One shared EventSource for every stream subscriber; closed when the last one leaves
+type StreamListener = (event: StreamEvent) => void;
+const streamListeners = new Set<StreamListener>();
+let streamSource: EventSource | null = null;
+
+function dispatchStream(event: StreamEvent) {
+  for (const listener of streamListeners) listener(event);
+}
+
+function openStream() {
+  const source = new EventSource(`${API_BASE}/stream`);
+  // EventSource reconnects by itself; changes made while disconnected are missed, so resync
+  let connected = false;
+  source.onopen = () => {
+    if (connected) dispatchStream({ type: 'resync' });
+    connected = true;
+  };
+  for (const type of ['todos', 'oneoffs', 'recommended', 'timeslots'] as const) {
+    source.addEventListener(type, (e) => {
+      dispatchStream({ type, data: JSON.parse((e as MessageEvent).data) } as StreamEvent);
+    });
+  }
+  source.addEventListener('resync', () => dispatchStream({ type: 'resync' }));
+  return source;
+}
+
 export const api = {
   // Categories
   async getCategories(): Promise<CategoryWithTodos[]> {
@@ -36,6 +62,15 @@ export const api = {
     if (!response.ok) throw new Error('Failed to update todo status');
   },
 
+  async updateTodoStatuses(updates: Array<{ id: number; status: TaskStatus }>): Promise<void> {
+    const response = await fetch(`${API_BASE}/todos/status`, {
+      method: 'PATCH',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify(updates),
+    });
+    if (!response.ok) throw new Error('Failed to update todo statuses');
+  },
+
   // One-off todos
   async getOneOffTodos(): Promise<OneOffTodo[]> {
     const response = await fetch(`${API_BASE}/oneoff-todos`);
@@ -66,6 +101,15 @@ export const api = {
     if (!response.ok) throw new Error('Failed to update one-off status');
   },
 
+  async updateOneOffStatuses(updates: Array<{ id: number; status: TaskStatus }>): Promise<void> {
+    const response = await fetch(`${API_BASE}/oneoff-todos/status`, {
+      method: 'PATCH',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify(updates),
+    });
+    if (!response.ok) throw new Error('Failed to update one-off statuses');
+  },
+
   async updateOneOffTodo(id: number, data: { title?: string; description?: string | null; status?: TaskStatus }): Promise<OneOffTodo> {
     const response = await fetch(`${API_BASE}/oneoff-todos/${id}`, {
       method: 'PATCH',
@@ -124,10 +168,30 @@ export const api = {
     return response.json();
   },
 
+  // Live state stream: returns an unsubscribe function
+  subscribeToStream(listener: StreamListener): () => void {
+    streamListeners.add(listener);
+    if (!streamSource) streamSource = openStream();
+    return () => {
+      streamListeners.delete(listener);
+      if (streamListeners.size === 0 && streamSource) {
+        streamSource.close();
+        streamSource = null;
+      }
+    };
+  },
+
   // Events
   async getEventList(): Promise<EventItem[]> {
     const response = await fetch(`${API_BASE}/event-list`);
     if (!response.ok) throw new Error('Failed to fetch event list');
     return response.json();
   },
+
+  // Delta sync
+  async sync(since: number): Promise<SyncResponse> {
+    const response = await fetch(`${API_BASE}/sync?since=${since}`);
+    if (!response.ok) throw new Error('Failed to sync');
+    return response.json();
+  },
 };
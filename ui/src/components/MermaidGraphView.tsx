@@ -49,8 +49,17 @@ export default function MermaidGraphView() {
     useEffect(() => {
         mermaid.initialize({ startOnLoad: false, securityLevel: 'loose', theme: 'dark' });
         load();
-        const id = setInterval(load, 30000);
-        return () => clearInterval(id);
+        // Reload when the server reports a change rather than on a timer
+        let timer: number | null = null;
+        const unsubscribe = api.subscribeToStream((event) => {
+            if (event.type === 'recommended') return; // always accompanied by the change behind it
+            if (timer !== null) clearTimeout(timer);
+            timer = window.setTimeout(() => { timer = null; load(); }, 250);
+        });
+        return () => {
+            unsubscribe();
+            if (timer !== null) clearTimeout(timer);
+        };
     }, [graphType, filterTimeDeps]);
 
     // Build Mermaid code from API data
@@ -122,6 +122,34 @@ export interface Timeslot {
 
 // Events
 export interface EventItem {
+  id: number;
   name: string;
   timestamp: string; // ISO datetime string
 }
+
+// Delta sync (/api/sync): rows changed since a state version, and ids of deleted rows.
+// When full is set the version is too old or unknown and the client should refetch
+// everything, then sync from the returned version.
+export interface SyncResponse {
+  version: number;
+  full: boolean;
+  categories: Category[];
+  todos: Todo[];
+  oneoffs: OneOffTodo[];
+  events: EventItem[];
+  deleted: {
+    categories: number[];
+    todos: number[];
+    oneoffs: number[];
+    events: number[];
+  };
+}
+
+// Live state stream (server-sent events from /api/stream)
+export type StreamEvent =
+  | { type: 'todos'; data: Todo[] }
+  | { type: 'oneoffs'; data: { changed: OneOffTodo[]; deleted: number[] } }
+  | { type: 'recommended'; data: { todo_ids: number[] } }
+  | { type: 'timeslots'; data: { entered: number[]; left: number[] } }
+  // Sent on reconnect and when the client fell behind: refetch everything
+  | { type: 'resync' };